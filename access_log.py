@@ -0,0 +1,118 @@
+"""
+Queue-backed logging and the structured per-request access log
+
+Request threads only put records on a bounded queue; a QueueListener
+thread formats and writes them, so neither string formatting nor the
+write to stderr happens on the request latency path.
+"""
+import atexit
+import logging
+import os
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+from config import Config
+from metrics import LOG_RECORDS_DROPPED
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+access_logger = logging.getLogger('weather_api.access')
+
+_listener = None
+_handler = None
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that defers all formatting to the listener thread and
+    drops records instead of blocking when the queue is full
+    """
+    
+    def prepare(self, record):
+        # The queue never leaves the process, so the record can be passed
+        # as is; the stock handler would merge its args here
+        return record
+    
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+def configure_logging():
+    """
+    Route all logging through a background writer thread
+    
+    Safe to call more than once; only the first call installs handlers.
+    Forked children (e.g. preloaded gunicorn workers) start their own
+    writer thread, since threads do not survive a fork.
+    
+    Returns:
+        QueueListener: The running listener
+    """
+    global _listener, _handler
+    if _listener is not None:
+        return _listener
+    
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter(LOG_FORMAT))
+    records = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+    _listener = QueueListener(records, stream, respect_handler_level=True)
+    _listener.start()
+    _handler = DroppingQueueHandler(records)
+    atexit.register(_stop_listener)
+    os.register_at_fork(after_in_child=_restart_listener)
+    
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    root.setLevel(Config.LOG_LEVEL)
+    return _listener
+
+
+def _stop_listener():
+    # Flush queued records at exit
+    if _listener is not None:
+        _listener.stop()
+
+
+def _restart_listener():
+    global _listener
+    records = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+    _listener = QueueListener(records, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+    _handler.queue = records
+
+
+def log_request(method, path, status, cache_status, duration, size, client):
+    """
+    Write one access log line for a finished request
+    
+    Cache hits are sampled at ACCESS_LOG_SAMPLE_RATE; each line carries the
+    rate it was sampled at so counts can be scaled back up.
+    
+    Args:
+        method (str): HTTP method
+        path (str): Request path
+        status (int): Response status code
+        cache_status (str): X-Cache header value, or None
+        duration (float): Request duration in seconds
+        size (int): Response body length in bytes, or None
+        client (str): Client address
+    """
+    if not Config.ACCESS_LOG_ENABLED:
+        return
+    
+    sample_rate = 1.0
+    if cache_status == 'HIT' and status < 400:
+        sample_rate = Config.ACCESS_LOG_SAMPLE_RATE
+        if sample_rate < 1.0 and random.random() >= sample_rate:
+            return
+    
+    access_logger.info(
+        'method=%s path="%s" status=%s cache=%s duration_ms=%.1f bytes=%s client=%s sample_rate=%s',
+        method, path, status, cache_status or '-', duration * 1000,
+        '-' if size is None else size, client, sample_rate
+    )
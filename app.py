@@ -1,57 +1,217 @@
-from flask import Flask, jsonify, request
+from flask import Blueprint, Flask, current_app, g, jsonify, request
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 import logging
+import os
+import threading
+import time
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
 from config import Config
 from cache import RedisCache
+from circuit_breaker import CircuitBreaker
 from weather_service import WeatherService
+from singleflight import SingleFlight
+from locations import (
+    LocationIndex,
+    qualify_location,
+    split_location,
+    upstream_location
+)
+from negative_cache import NegativeCache
+from ranges import DateConverter, InvalidDate, day_expiration, day_key, days_between, meta_key, missing_runs
+from invalidation import CachePurger
+from access_log import configure_logging, log_request
+from metrics import (
+    CONTENT_TYPE,
+    REGISTRY,
+    REQUEST_LATENCY,
+    REQUESTS_IN_FLIGHT,
+    STAGE_LATENCY
+)
+from scheduler import RefreshScheduler
+from serving import Services, get_fresh_data, load_weather, refresh_weather, run, serve_weather
+from warmup import CacheWarmer
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
-# Initialize Flask app
-app = Flask(__name__)
-
-# Validate configuration
-try:
-    Config.validate()
-except ValueError as e:
-    logger.error(f"Configuration error: {e}")
-    raise
-
-# Initialize services
-cache = RedisCache()
-weather_service = WeatherService()
-
-# Initialize rate limiter with fallback to memory if Redis unavailable
-try:
-    if cache.enabled:
-        # Try to use Redis for rate limiting
-        limiter = Limiter(
-            app=app,
-            key_func=get_remote_address,
-            default_limits=[Config.RATE_LIMIT],
-            storage_uri=f"redis://{Config.REDIS_HOST}:{Config.REDIS_PORT}/{Config.REDIS_DB}"
+# Routes live on a blueprint; create_app() builds the application
+api = Blueprint('api', __name__)
+
+# Rate limiter, attached to the application in create_app(). Limits are
+# kept in memory while Redis is unreachable and move back once it recovers.
+# Only the request that first hits the outage switches storage; others
+# already checking against Redis would fail with a 500, so their errors
+# are swallowed and they are let through
+limiter = Limiter(
+    key_func=get_remote_address,
+    default_limits=[Config.RATE_LIMIT],
+    storage_uri=f"redis://{Config.REDIS_HOST}:{Config.REDIS_PORT}/{Config.REDIS_DB}",
+    storage_options={
+        'socket_connect_timeout': Config.REDIS_CONNECT_TIMEOUT,
+        'socket_timeout': Config.REDIS_SOCKET_TIMEOUT
+    },
+    in_memory_fallback_enabled=True,
+    swallow_errors=True
+)
+
+# Per-worker services, created by init_services() on first use
+cache = None
+circuit_breaker = None
+weather_service = None
+single_flight = None
+location_index = None
+negative_cache = None
+purger = None
+batch_executor = None
+refresh_scheduler = None
+services = None
+warmer = None
+_services_pid = None
+_services_lock = threading.Lock()
+
+
+def create_app():
+    """
+    Build the Flask application
+    
+    Validates configuration and wires up routes and the rate limiter, but
+    opens no connections and starts no threads: each worker process
+    creates its own services on its first request (see init_services), so
+    pre-forked workers never share sockets and boot without waiting on
+    Redis.
+    
+    Returns:
+        Flask: The application
+    """
+    try:
+        Config.validate()
+    except ValueError as e:
+        logger.error(f"Configuration error: {e}")
+        raise
+    
+    app = Flask(__name__)
+    app.url_map.converters['date'] = DateConverter
+    # Registered before the limiter so the request timer runs first
+    app.register_blueprint(api)
+    limiter.init_app(app)
+    return app
+
+
+def init_services():
+    """
+    Create this process's services if it has none yet
+    
+    Sets up the Redis pool, upstream session, thread pools, refresh
+    scheduler and hot-key snapshots, and starts the startup warm-up in
+    the background. Safe to call from any thread; services created before a
+    fork are replaced in the child.
+    """
+    global cache, circuit_breaker, weather_service, single_flight, location_index
+    global negative_cache, purger, batch_executor, refresh_scheduler, services, warmer, _services_pid
+    
+    if _services_pid == os.getpid():
+        return
+    with _services_lock:
+        if _services_pid == os.getpid():
+            return
+        
+        cache = RedisCache()
+        circuit_breaker = CircuitBreaker(cache) if Config.CIRCUIT_ENABLED else None
+        weather_service = WeatherService(circuit_breaker)
+        single_flight = SingleFlight(cache)
+        location_index = LocationIndex(cache)
+        negative_cache = NegativeCache(cache) if Config.NEGATIVE_CACHE_ENABLED else None
+        purger = CachePurger(cache, location_index, negative_cache)
+        
+        # Bounds concurrent upstream fetches for batch misses in this worker
+        batch_executor = ThreadPoolExecutor(
+            max_workers=Config.BATCH_MAX_WORKERS,
+            thread_name_prefix='batch'
         )
-        logger.info("Rate limiter using Redis storage")
-    else:
-        raise Exception("Redis not available")
-except Exception as e:
-    # Fall back to in-memory rate limiting
-    limiter = Limiter(
-        app=app,
-        key_func=get_remote_address,
-        default_limits=[Config.RATE_LIMIT],
-        storage_uri="memory://"
+        
+        # Always started: it also flushes the request counts record() keeps,
+        # which would otherwise grow without bound
+        refresh_scheduler = RefreshScheduler(cache, refresh_location)
+        refresh_scheduler.start()
+        services = Services(
+            cache, weather_service, single_flight, location_index, negative_cache, refresh_scheduler
+        )
+        
+        warmer = CacheWarmer(cache, location_index, warm_location)
+        if Config.WARMUP_SNAPSHOT_INTERVAL > 0:
+            warmer.start_snapshots()
+        if Config.WARMUP_ON_STARTUP:
+            # Only one worker warms; the others find the lease taken
+            warmer.start(warmer.load_snapshot() + warmer.seed_locations(), 'startup', exclusive=True)
+        
+        _services_pid = os.getpid()
+        logger.info(f"Services initialized in worker {_services_pid} (cache enabled: {cache.enabled})")
+
+
+def refresh_location(name):
+    """Schedule a forced background refresh of a qualified location name"""
+    canonical, profile = split_location(name)
+    return single_flight.do_in_background(
+        f"weather:{name}",
+        lambda: run(refresh_weather(services, canonical, profile)),
+        lookup=lambda: None
     )
-    logger.warning(f"Rate limiter using in-memory storage (Redis unavailable)")
 
 
-@app.route('/')
+def warm_location(name):
+    """Fetch and cache a qualified location name, coalesced with requests for it"""
+    canonical, profile = split_location(name)
+    return single_flight.do(
+        f"weather:{name}",
+        lambda: run(refresh_weather(services, canonical, profile)),
+        lookup=lambda: run(get_fresh_data(services, canonical, profile))
+    )
+
+
+@api.before_app_request
+def start_request_timer():
+    """
+    Time each request and make sure this worker's services exist
+    
+    Runs before the limiter, so its check is included in the timing.
+    """
+    g.request_started = time.perf_counter()
+    REQUESTS_IN_FLIGHT.inc()
+    init_services()
+
+
+@api.after_app_request
+def remember_response(response):
+    """Keep what the access log needs from the response"""
+    g.response_status = response.status_code
+    g.response_size = response.content_length
+    g.cache_status = response.headers.get('X-Cache')
+    return response
+
+
+@api.teardown_app_request
+def observe_request(exc=None):
+    """Record request latency and write the access log, including failed requests"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        duration = time.perf_counter() - started
+        REQUESTS_IN_FLIGHT.dec()
+        REQUEST_LATENCY.observe(duration, endpoint=request.endpoint or 'unknown')
+        log_request(
+            request.method,
+            request.full_path.rstrip('?'),
+            g.get('response_status', 500),
+            g.get('cache_status'),
+            duration,
+            g.get('response_size'),
+            request.remote_addr
+        )
+
+
+@api.route('/')
 def home():
     """API home endpoint with usage information"""
     return jsonify({
@@ -61,19 +221,27 @@ def home():
             '/': 'API information (this page)',
             '/health': 'Health check endpoint',
             '/weather/<location>': 'Get weather data for a location',
+            '/weather/<location>/<start>/<end>': 'Get daily weather data for a date range (YYYY-MM-DD)',
+            '/weather/batch': 'Get weather data for many locations (POST)',
             '/cache/stats': 'Get cache statistics',
-            '/cache/clear': 'Clear all cache (DELETE method)'
+            '/metrics': 'Prometheus metrics',
+            '/cache/clear': 'Purge cache by pattern, location or unit in the background (DELETE method)',
+            '/cache/clear/<job_id>': 'Get the progress of a cache purge',
+            '/cache/warm': 'Re-warm the cache from the hot-key snapshot or seed list in the background (POST method)',
+            '/cache/warm/<job_id>': 'Get the progress of a cache warm-up'
         },
         'usage': {
             'example': '/weather/London,UK',
             'parameters': {
-                'unit': 'Optional - metric (default), us, or uk'
+                'unit': 'Optional - metric (default), us, or uk',
+                'format': 'Optional - simple (default) or full',
+                'fields': 'Optional - dotted paths to return, e.g. current.temperature,forecast.temp_max'
             }
         }
     })
 
 
-@app.route('/health')
+@api.route('/health')
 def health():
     """Health check endpoint"""
     cache_stats = cache.get_stats()
@@ -81,11 +249,13 @@ def health():
     return jsonify({
         'status': 'healthy',
         'cache': cache_stats,
+        'upstream': weather_service.get_pool_stats(),
+        'circuit_breaker': circuit_breaker.get_stats() if circuit_breaker else {'enabled': False},
         'rate_limiter': rate_limiter_storage
     })
 
 
-@app.route('/weather/<path:location>')
+@api.route('/weather/<path:location>')
 @limiter.limit(Config.RATE_LIMIT)
 def get_weather(location):
     """
@@ -97,88 +267,411 @@ def get_weather(location):
     Query Parameters:
         unit (str): Unit system - 'metric' (default), 'us', or 'uk'
         format (str): Response format - 'full' or 'simple' (default)
+        fields (str): Optional comma-separated dotted paths to return, e.g.
+            'current.temperature,forecast.temp_max'
     """
-    if not location or location.strip() == '':
-        return jsonify({
-            'error': 'Location parameter is required',
-            'example': '/weather/London,UK'
-        }), 400
+    STAGE_LATENCY.observe(time.perf_counter() - g.request_started, stage='limiter')
     
-    # Get query parameters
+    return build_response(*run(serve_weather(
+        services,
+        location,
+        request.args.get('unit', 'metric'),
+        request.args.get('format', 'simple'),
+        request.args.get('fields'),
+        request.if_none_match,
+        current_app.json.dumps
+    )))
+
+
+def build_response(status, body, headers):
+    """Build a response from a serving reply (see serving.py)"""
+    if body is None:
+        response = current_app.response_class(status=status)
+    elif isinstance(body, dict):
+        response = jsonify(body)
+        response.status_code = status
+    else:
+        response = current_app.response_class(body, status=status, mimetype='application/json')
+    response.headers.update(headers)
+    return response
+
+
+@api.route('/weather/<path:location>/<date:start>/<date:end>')
+def get_weather_range(location, start, end):
+    """
+    Get daily weather data for a date range (historical or forecast)
+    
+    Each day is cached separately, so overlapping ranges only fetch the
+    days that are not cached yet, in as few upstream calls as possible.
+    
+    Args:
+        location (str): Location name (e.g., "London,UK" or "New York")
+        start (date): First day, YYYY-MM-DD
+        end (date): Last day, YYYY-MM-DD
+        
+    Query Parameters:
+        unit (str): Unit system - 'metric' (default), 'us', or 'uk'
+        format (str): Response format - 'full' or 'simple' (default)
+    """
     unit_group = request.args.get('unit', 'metric')
     response_format = request.args.get('format', 'simple')
     
-    # Validate unit group
     if unit_group not in ['metric', 'us', 'uk']:
         return jsonify({
             'error': 'Invalid unit parameter',
             'valid_values': ['metric', 'us', 'uk']
         }), 400
     
-    # Create cache key
-    cache_key = f"weather:{location.lower()}:{unit_group}"
+    if end < start:
+        return jsonify({
+            'error': 'end must not be before start',
+            'example': '/weather/London,UK/2024-01-01/2024-01-07'
+        }), 400
     
-    # Try to get from cache
-    cached_data = cache.get(cache_key)
-    if cached_data:
-        logger.info(f"Returning cached data for: {location}")
+    dates = days_between(start, end)
+    if len(dates) > Config.RANGE_MAX_DAYS:
         return jsonify({
-            'location': location,
-            'cached': True,
-            'data': cached_data
-        })
+            'error': f'Date range too long (max {Config.RANGE_MAX_DAYS} days)'
+        }), 400
+    
+    profile = weather_service.range_profile(response_format)
+    name = qualify_location(location_index.resolve(location), profile)
+    started = time.perf_counter()
+    entries = cache.get_entries([day_key(name, day) for day in dates] + [meta_key(name)])
+    STAGE_LATENCY.observe(time.perf_counter() - started, stage='cache_get')
+    meta_entry = entries.pop()
     
-    # Fetch from weather API
-    logger.info(f"Fetching fresh data for: {location}")
-    result = weather_service.get_weather(location, unit_group)
+    fresh = {day: entry for day, entry in zip(dates, entries) if entry and not entry['stale']}
+    days = {day: entry['data'] for day, entry in fresh.items()}
+    meta = meta_entry['data'] if meta_entry else {}
+    cached_days = len(days)
+    # When each served day stops being fresh
+    expirations = [entry['expires_at'] for entry in fresh.values()]
+    
+    for run_start, run_end in missing_runs(dates, set(dates) - set(days)):
+        result = single_flight.do(
+            f"{day_key(name, run_start)}:{run_end.isoformat()}",
+            lambda: fetch_days(location, profile, run_start, run_end),
+            lookup=lambda: get_fresh_days(location, profile, run_start, run_end)
+        )
+        if 'error' in result:
+            response = jsonify({
+                'error': result['error'],
+                'location': location
+            })
+            if result.get('retry_after'):
+                response.headers['Retry-After'] = str(result['retry_after'])
+            return response, result.get('status_code', 500)
+        
+        for day in result['data'].get('days', []):
+            days[date.fromisoformat(day['datetime'])] = day
+        meta = {
+            key: value for key, value in result['data'].items() if key not in ('days', 'expires_at')
+        } or meta
+        if result.get('cached'):
+            expirations.append(result['data']['expires_at'])
+        else:
+            expirations.append(
+                time.time() + min(day_expiration(day) for day in days_between(run_start, run_end))
+            )
+    
+    with STAGE_LATENCY.time(stage='format'):
+        data = weather_service.render_days(
+            [days[day] for day in dates if day in days], meta, unit_group, response_format
+        )
     
-    # Handle errors
+    response = jsonify({
+        'location': location,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'cached_days': cached_days,
+        'fetched_days': len(dates) - cached_days,
+        'data': data
+    })
+    response.headers['X-Cache'] = (
+        'HIT' if cached_days == len(dates) else 'MISS' if cached_days == 0 else 'PARTIAL'
+    )
+    max_age = max(0, int(min(expirations) - time.time()))
+    response.headers['Cache-Control'] = f"public, max-age={max_age}"
+    return response
+
+
+def get_fresh_days(location, profile, start, end):
+    """
+    Get a date range as a days payload if every day is cached and fresh,
+    with the time the first of them expires
+    """
+    name = qualify_location(location_index.resolve(location), profile)
+    dates = days_between(start, end)
+    entries = cache.get_entries([day_key(name, day) for day in dates])
+    if not all(entry and not entry['stale'] for entry in entries):
+        return None
+    return {
+        'days': [entry['data'] for entry in entries],
+        'expires_at': min(entry['expires_at'] for entry in entries)
+    }
+
+
+def fetch_days(location, profile, start, end):
+    """
+    Fetch a date range upstream and cache each day under the location's
+    canonical name and fetch profile
+    
+    Args:
+        location (str): Location as given by the client
+        profile (str): Range fetch profile (see WeatherService.range_profile)
+        start (date): First day
+        end (date): Last day
+        
+    Returns:
+        dict: {'success': True, 'data': ...} or the service's error dict
+    """
+    result = weather_service.get_weather(upstream_location(location), 'metric', profile, start, end)
     if 'error' in result:
-        status_code = result.get('status_code', 500)
+        return result
+    
+    data = result['data']
+    canonical = location_index.learn(location, data.get('resolvedAddress'))
+    name = qualify_location(canonical, profile)
+    items = {
+        meta_key(name): (
+            {key: value for key, value in data.items() if key != 'days'},
+            Config.DAY_CACHE_PAST_TTL
+        )
+    }
+    for day in data.get('days', []):
+        try:
+            day_date = date.fromisoformat(day['datetime'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        items[day_key(name, day_date)] = (day, day_expiration(day_date))
+    cache.set_many(items)
+    return result
+
+
+@api.route('/weather/batch', methods=['POST'])
+@limiter.limit(
+    Config.BATCH_RATE_LIMIT,
+    # Each location counts; oversized batches are rejected with a 400 anyway
+    cost=lambda: min(max(1, len(get_batch_locations())), Config.BATCH_MAX_LOCATIONS),
+    # Only answered batches use up quota, so a rejected one does not lock
+    # the client out for the rest of the window
+    deduct_when=lambda response: response.status_code < 400
+)
+def get_weather_batch():
+    """
+    Get weather data for several locations in one request
+    
+    JSON Body:
+        locations (list): Location names (at most BATCH_MAX_LOCATIONS)
+        unit (str): Unit system - 'metric' (default), 'us', or 'uk'
+        format (str): Response format - 'full' or 'simple' (default)
+        fields (str): Optional comma-separated dotted paths to return
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
         return jsonify({
-            'error': result['error'],
-            'location': location
-        }), status_code
-    
-    # Format response
-    weather_data = result['data']
-    if response_format == 'simple':
-        formatted_data = weather_service.format_weather_response(weather_data)
-    else:
-        formatted_data = weather_data
+            'error': 'Request body must be a JSON object',
+            'example': {'locations': ['London,UK', 'Paris'], 'unit': 'metric'}
+        }), 400
+    
+    locations = get_batch_locations()
+    unit_group = body.get('unit', 'metric')
+    response_format = body.get('format', 'simple')
+    
+    if not locations or not all(isinstance(loc, str) and loc.strip() for loc in locations):
+        return jsonify({
+            'error': 'locations must be a non-empty list of location names',
+            'example': {'locations': ['London,UK', 'Paris'], 'unit': 'metric'}
+        }), 400
+    
+    if len(locations) > Config.BATCH_MAX_LOCATIONS:
+        return jsonify({
+            'error': f'Too many locations (max {Config.BATCH_MAX_LOCATIONS})'
+        }), 400
     
-    # Cache the result
-    cache.set(cache_key, formatted_data)
+    if unit_group not in ['metric', 'us', 'uk']:
+        return jsonify({
+            'error': 'Invalid unit parameter',
+            'valid_values': ['metric', 'us', 'uk']
+        }), 400
+    
+    if response_format not in ['simple', 'full']:
+        return jsonify({
+            'error': 'Invalid format parameter',
+            'valid_values': ['simple', 'full']
+        }), 400
+    
+    if not isinstance(body.get('fields'), (str, type(None))):
+        return jsonify({
+            'error': 'Invalid fields parameter',
+            'message': 'fields must be a comma-separated string of dotted paths',
+            'example': 'current.temperature,forecast.temp_max'
+        }), 400
+    
+    try:
+        fields = weather_service.parse_fields(body.get('fields'))
+    except ValueError as e:
+        return jsonify({
+            'error': 'Invalid fields parameter',
+            'message': str(e),
+            'example': 'current.temperature,forecast.temp_max'
+        }), 400
+    
+    # Resolve aliases and cache hits in two round trips for the whole batch
+    profile = weather_service.fetch_profile(response_format, fields)
+    canonicals = location_index.resolve_many(locations)
+    entries = cache.get_entries([
+        f"weather:{qualify_location(canonical, profile)}" for canonical in canonicals
+    ])
+    
+    # Hits are answered inline; misses are fetched concurrently
+    results = [None] * len(locations)
+    futures = {}
+    for i, (location, canonical, entry) in enumerate(zip(locations, canonicals, entries)):
+        if entry:
+            results[i] = run(load_weather(services, location, canonical, profile, entry))
+        else:
+            futures[i] = batch_executor.submit(run, load_weather(services, location, canonical, profile, None))
+    for i, future in futures.items():
+        results[i] = future.result()
+    
+    items = []
+    for location, result in zip(locations, results):
+        if 'error' in result:
+            items.append({
+                'location': location,
+                'error': result['error'],
+                'status_code': result.get('status_code', 500)
+            })
+        else:
+            items.append({
+                'location': location,
+                'cached': result['cached'],
+                'stale': result['stale'],
+                'data': weather_service.render_weather(result['data'], unit_group, response_format, fields)
+            })
     
     return jsonify({
-        'location': location,
-        'cached': False,
-        'data': formatted_data
+        'unit': unit_group,
+        'count': len(items),
+        'results': items
     })
 
 
-@app.route('/cache/stats')
+def get_batch_locations():
+    """Get the locations list from a batch request body"""
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict) or not isinstance(body.get('locations'), list):
+        return []
+    return body['locations']
+
+
+@api.route('/cache/stats')
 def cache_stats():
     """Get cache statistics"""
     stats = cache.get_stats()
+    stats['refresh_scheduler'] = refresh_scheduler.get_stats()
+    stats['negative'] = negative_cache.get_stats() if negative_cache else {'enabled': False}
+    stats['warmup'] = warmer.get_stats()
     return jsonify(stats)
 
 
-@app.route('/cache/clear', methods=['DELETE'])
+@api.route('/metrics')
+@limiter.exempt
+def metrics():
+    """Prometheus metrics for this worker"""
+    return current_app.response_class(REGISTRY.render(), mimetype=None, content_type=CONTENT_TYPE)
+
+
+@api.route('/cache/clear', methods=['DELETE'])
 def clear_cache():
-    """Clear all cache"""
-    success = cache.clear_all()
-    if success:
+    """Purge cache entries in the background"""
+    pattern = request.args.get('pattern')
+    location = request.args.get('location')
+    unit_group = request.args.get('unit')
+    
+    if pattern and (location or unit_group):
         return jsonify({
-            'message': 'Cache cleared successfully'
-        })
-    else:
+            'error': 'Use either pattern or location/unit, not both'
+        }), 400
+    
+    if unit_group is not None and unit_group not in ['metric', 'us', 'uk']:
         return jsonify({
-            'error': 'Failed to clear cache'
-        }), 500
+            'error': 'Invalid unit parameter',
+            'valid_values': ['metric', 'us', 'uk']
+        }), 400
+    
+    job = purger.start(purger.targets(pattern, location, unit_group))
+    return jsonify({
+        'message': 'Cache purge started',
+        'job': job,
+        'status_url': f"/cache/clear/{job['id']}"
+    }), 202
+
+
+@api.route('/cache/clear/<job_id>')
+def clear_cache_status(job_id):
+    """Get the progress of a cache purge"""
+    job = purger.get(job_id)
+    if job is None:
+        return jsonify({
+            'error': 'Unknown purge job'
+        }), 404
+    return jsonify(job)
+
+
+@api.route('/cache/warm', methods=['POST'])
+def warm_cache():
+    """
+    Re-warm the cache in the background
+    
+    Query Parameters:
+        source (str): 'all' (default) for the hot-key snapshot and the seed
+            list, 'snapshot' or 'seed'
+    """
+    source = request.args.get('source', 'all')
+    if source not in ['all', 'snapshot', 'seed']:
+        return jsonify({
+            'error': 'Invalid source parameter',
+            'valid_values': ['all', 'snapshot', 'seed']
+        }), 400
+    
+    names = []
+    if source in ['all', 'snapshot']:
+        names += warmer.load_snapshot()
+    if source in ['all', 'seed']:
+        names += warmer.seed_locations()
+    
+    job = warmer.start(names, source)
+    return jsonify({
+        'message': 'Cache warm-up started',
+        'job': job,
+        'status_url': f"/cache/warm/{job['id']}"
+    }), 202
+
+
+@api.route('/cache/warm/<job_id>')
+def warm_cache_status(job_id):
+    """Get the progress of a cache warm-up"""
+    job = warmer.get(job_id)
+    if job is None:
+        return jsonify({
+            'error': 'Unknown warm-up job'
+        }), 404
+    return jsonify(job)
+
+
+@api.app_errorhandler(InvalidDate)
+def invalid_date(e):
+    """Handle impossible dates in date range URLs"""
+    return jsonify({
+        'error': e.description,
+        'example': '/weather/London,UK/2024-01-01/2024-01-07'
+    }), 400
 
 
-@app.errorhandler(429)
+@api.app_errorhandler(429)
 def ratelimit_handler(e):
     """Handle rate limit exceeded"""
     return jsonify({
@@ -187,7 +680,7 @@ def ratelimit_handler(e):
     }), 429
 
 
-@app.errorhandler(404)
+@api.app_errorhandler(404)
 def not_found(e):
     """Handle 404 errors"""
     return jsonify({
@@ -196,7 +689,7 @@ def not_found(e):
     }), 404
 
 
-@app.errorhandler(500)
+@api.app_errorhandler(500)
 def internal_error(e):
     """Handle 500 errors"""
     logger.error(f"Internal server error: {e}")
@@ -207,9 +700,10 @@ def internal_error(e):
 
 
 if __name__ == '__main__':
+    app = create_app()
+    init_services()
     logger.info(f"Starting Weather API on port {Config.PORT}")
     logger.info(f"Debug mode: {Config.DEBUG}")
-    logger.info(f"Cache enabled: {cache.enabled}")
     
     app.run(
         host='0.0.0.0',
@@ -0,0 +1,228 @@
+"""
+Asyncio serving mode for the Weather API
+
+Serves the single-location endpoints with non-blocking upstream and Redis
+clients, so many in-flight cache misses share a few workers:
+
+    hypercorn asgi:app --workers 4 --bind 0.0.0.0:5000
+
+The /weather request logic is shared with app.py (see serving.py), so
+both apps use the same cache tiers, pre-rendered bodies and coalescing.
+Batch requests, date ranges, cache clearing and warm-up are served by
+the WSGI app in app.py, which can run alongside against the same Redis.
+Async workers count their requests into the shared popularity set, but
+the WSGI workers plan the hot-location refreshes and take the hot-key
+snapshots.
+"""
+from quart import Quart, g, jsonify, request
+from limits import parse
+from limits.aio.strategies import MovingWindowRateLimiter
+from limits.storage import storage_from_string
+import logging
+import time
+from config import Config
+from async_services import (
+    AsyncCircuitBreaker,
+    AsyncLocationIndex,
+    AsyncNegativeCache,
+    AsyncRedisCache,
+    AsyncRefreshScheduler,
+    AsyncSingleFlight,
+    AsyncWeatherService
+)
+from serving import Services, run_async, serve_weather
+from access_log import configure_logging, log_request
+from metrics import (
+    CONTENT_TYPE,
+    REGISTRY,
+    REQUEST_LATENCY,
+    REQUESTS_IN_FLIGHT,
+    STAGE_LATENCY
+)
+
+# Configure logging
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# Initialize Quart app
+app = Quart(__name__)
+
+# Validate configuration
+try:
+    Config.validate()
+except ValueError as e:
+    logger.error(f"Configuration error: {e}")
+    raise
+
+# Initialize services; connections are opened on the serving event loop
+cache = AsyncRedisCache()
+circuit_breaker = AsyncCircuitBreaker(cache) if Config.CIRCUIT_ENABLED else None
+weather_service = AsyncWeatherService(circuit_breaker)
+single_flight = AsyncSingleFlight(cache)
+location_index = AsyncLocationIndex(cache)
+negative_cache = AsyncNegativeCache(cache) if Config.NEGATIVE_CACHE_ENABLED else None
+refresh_scheduler = AsyncRefreshScheduler(cache)
+services = Services(cache, weather_service, single_flight, location_index, negative_cache, refresh_scheduler)
+
+rate_limit = parse(Config.RATE_LIMIT)
+limiter = None
+
+
+@app.before_serving
+async def startup():
+    """Connect to Redis, start flushing request counts and set up rate limiting"""
+    global limiter
+    await cache.connect()
+    refresh_scheduler.start()
+    
+    # Redis-backed async rate limiting needs the optional coredis package
+    try:
+        if not cache.enabled:
+            raise Exception("Redis not available")
+        storage = storage_from_string(
+            f"async+redis://{Config.REDIS_HOST}:{Config.REDIS_PORT}/{Config.REDIS_DB}"
+        )
+        logger.info("Rate limiter using Redis storage")
+    except Exception as e:
+        storage = storage_from_string("async+memory://")
+        logger.warning(f"Rate limiter using in-memory storage ({e})")
+    limiter = MovingWindowRateLimiter(storage)
+
+
+@app.before_request
+async def start_request_timer():
+    """Time each request"""
+    g.request_started = time.perf_counter()
+    REQUESTS_IN_FLIGHT.inc()
+
+
+@app.after_request
+async def remember_response(response):
+    """Keep what the access log needs from the response"""
+    g.response_status = response.status_code
+    g.response_size = response.content_length
+    g.cache_status = response.headers.get('X-Cache')
+    return response
+
+
+@app.teardown_request
+async def observe_request(exc=None):
+    """Record request latency and write the access log, including failed requests"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        duration = time.perf_counter() - started
+        REQUESTS_IN_FLIGHT.dec()
+        REQUEST_LATENCY.observe(duration, endpoint=request.endpoint or 'unknown')
+        log_request(
+            request.method,
+            request.full_path.rstrip('?'),
+            g.get('response_status', 500),
+            g.get('cache_status'),
+            duration,
+            g.get('response_size'),
+            request.remote_addr
+        )
+
+
+@app.after_serving
+async def shutdown():
+    """Flush request counts and close upstream and Redis connections"""
+    await refresh_scheduler.stop()
+    await weather_service.close()
+    await cache.close()
+
+
+@app.route('/')
+async def home():
+    """API home endpoint with usage information"""
+    return jsonify({
+        'message': 'Weather API (async)',
+        'version': '1.0.0',
+        'endpoints': {
+            '/': 'API information (this page)',
+            '/health': 'Health check endpoint',
+            '/weather/<location>': 'Get weather data for a location',
+            '/cache/stats': 'Get cache statistics'
+        }
+    })
+
+
+@app.route('/health')
+async def health():
+    """Health check endpoint"""
+    return jsonify({
+        'status': 'healthy',
+        'mode': 'async',
+        'cache': await cache.get_stats(),
+        'circuit_breaker': await circuit_breaker.get_stats() if circuit_breaker else {'enabled': False}
+    })
+
+
+@app.route('/weather/<path:location>')
+async def get_weather(location):
+    """
+    Get weather data for a location (see app.get_weather)
+    
+    Query Parameters:
+        unit (str): Unit system - 'metric' (default), 'us', or 'uk'
+        format (str): Response format - 'full' or 'simple' (default)
+        fields (str): Optional comma-separated dotted paths to return
+    """
+    with STAGE_LATENCY.time(stage='limiter'):
+        allowed = await limiter.hit(rate_limit, 'weather', request.remote_addr or '')
+    if not allowed:
+        return jsonify({
+            'error': 'Rate limit exceeded',
+            'message': str(rate_limit)
+        }), 429
+    
+    return build_response(*await run_async(serve_weather(
+        services,
+        location,
+        request.args.get('unit', 'metric'),
+        request.args.get('format', 'simple'),
+        request.args.get('fields'),
+        request.if_none_match,
+        app.json.dumps
+    )))
+
+
+def build_response(status, body, headers):
+    """Build a response from a serving reply (see serving.py)"""
+    if body is None:
+        response = app.response_class(status=status)
+    elif isinstance(body, dict):
+        response = jsonify(body)
+        response.status_code = status
+    else:
+        response = app.response_class(body, status=status, mimetype='application/json')
+    response.headers.update(headers)
+    return response
+
+
+@app.route('/metrics')
+async def metrics():
+    """Prometheus metrics for this worker"""
+    return REGISTRY.render(), 200, {'Content-Type': CONTENT_TYPE}
+
+
+@app.route('/cache/stats')
+async def cache_stats():
+    """Get cache statistics"""
+    stats = await cache.get_stats()
+    stats['refresh_scheduler'] = refresh_scheduler.get_stats()
+    stats['negative'] = negative_cache.get_stats() if negative_cache else {'enabled': False}
+    return jsonify(stats)
+
+
+@app.errorhandler(404)
+async def not_found(e):
+    """Handle 404 errors"""
+    return jsonify({
+        'error': 'Endpoint not found',
+        'message': 'Please check the API documentation at /'
+    }), 404
+
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=Config.PORT, debug=Config.DEBUG)
@@ -0,0 +1,811 @@
+"""
+Asyncio-native variants of the weather service, cache and coalescing
+helpers, used by the ASGI app in asgi.py
+
+They share the Redis key layout and entry format with the synchronous
+classes, so sync and async workers can serve from the same cache.
+"""
+import asyncio
+import logging
+import math
+import time
+import uuid
+from collections import Counter
+import httpx
+import redis.asyncio as aioredis
+from config import Config
+from circuit_breaker import (
+    ALLOW_SCRIPT,
+    RECORD_SCRIPT,
+    STATE_SCRIPT,
+    CircuitBreaker,
+    classify_status,
+    parse_retry_after
+)
+from cache import (
+    LocalCache,
+    RELEASE_LOCK_SCRIPT,
+    TieredCache,
+    namespaced,
+    with_staleness
+)
+from locations import normalize_location
+from metrics import CACHE_REQUESTS, STAGE_LATENCY, UPSTREAM_IN_FLIGHT, UPSTREAM_RESPONSES
+from negative_cache import NegativeCache
+from scheduler import RefreshScheduler
+from singleflight import in_flight_error
+from weather_service import WeatherService
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCircuitBreaker(CircuitBreaker):
+    """Asyncio variant of circuit_breaker.CircuitBreaker sharing its Redis state"""
+    
+    async def allow(self):
+        """Check whether an upstream call may be made now (see CircuitBreaker.allow)"""
+        now = time.time()
+        if now < self._open_until:
+            self.rejected += 1
+            return False, math.ceil(self._open_until - now)
+        result = await self.cache.run_script(ALLOW_SCRIPT, [self.key], [now, self.probe_timeout])
+        return self._admit(result, now)
+    
+    async def record(self, outcome, retry_after=0):
+        """Record the outcome of an upstream call"""
+        result = await self.cache.run_script(
+            RECORD_SCRIPT, [self.key], self._record_args(outcome, retry_after)
+        )
+        self._on_recorded(result, outcome)
+    
+    async def get_stats(self):
+        """Get circuit state and counters"""
+        return self._format_stats(await self.cache.run_script(STATE_SCRIPT, [self.key], []))
+
+
+class AsyncWeatherService(WeatherService):
+    """Non-blocking client for the Visual Crossing API"""
+    
+    def __init__(self, breaker=None):
+        super().__init__(breaker)
+        self.client = None
+    
+    def _get_client(self):
+        # Created lazily so the client binds to the serving event loop
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                timeout=httpx.Timeout(Config.HTTP_READ_TIMEOUT, connect=Config.HTTP_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=Config.ASYNC_MAX_CONNECTIONS,
+                    max_keepalive_connections=Config.HTTP_POOL_MAXSIZE
+                )
+            )
+        return self.client
+    
+    async def get_weather(self, location, unit_group='metric', profile=None, start=None, end=None):
+        """
+        Fetch weather data for a location without blocking the event loop
+        
+        Args:
+            location (str): Location name (e.g., "London,UK" or "New York")
+            unit_group (str): Unit system - 'metric', 'us', or 'uk'
+            profile (str): Fetch profile from fetch_profile, or None for
+                the full payload
+            start (date): First day of a date range, or None
+            end (date): Last day of the date range
+            
+        Returns:
+            dict: Weather data or error information
+        """
+        if self.breaker is not None:
+            allowed, retry_after = await self.breaker.allow()
+            if not allowed:
+                return self._circuit_open_error(retry_after)
+        
+        try:
+            url, params = self._build_request(location, unit_group, profile, start, end)
+            
+            logger.debug("Fetching weather data for location: %s", location)
+            
+            UPSTREAM_IN_FLIGHT.inc()
+            started = time.perf_counter()
+            try:
+                response = await self._get_client().get(url, params=params)
+            finally:
+                UPSTREAM_IN_FLIGHT.dec()
+                STAGE_LATENCY.observe(time.perf_counter() - started, stage='upstream')
+            UPSTREAM_RESPONSES.inc(status=str(response.status_code))
+            await self._record(
+                classify_status(response.status_code),
+                parse_retry_after(response.headers.get('Retry-After'))
+            )
+            
+            return self._parse_response(location, response.status_code, response.json)
+            
+        except httpx.TimeoutException:
+            UPSTREAM_RESPONSES.inc(status='timeout')
+            await self._record('failure')
+            logger.error("Weather API request timed out")
+            return {
+                'error': 'Weather API request timed out',
+                'status_code': 504
+            }
+        except httpx.ConnectError:
+            UPSTREAM_RESPONSES.inc(status='connection_error')
+            await self._record('failure')
+            logger.error("Failed to connect to weather API")
+            return {
+                'error': 'Failed to connect to weather API',
+                'status_code': 503
+            }
+        except httpx.HTTPError as e:
+            UPSTREAM_RESPONSES.inc(status='error')
+            await self._record('failure')
+            logger.error(f"Request error: {e}")
+            return {
+                'error': f'Request error: {str(e)}',
+                'status_code': 500
+            }
+        except Exception as e:
+            logger.error(f"Unexpected error: {e}")
+            return {
+                'error': f'Unexpected error: {str(e)}',
+                'status_code': 500
+            }
+    
+    async def _record(self, outcome, retry_after=0):
+        if self.breaker is not None:
+            await self.breaker.record(outcome, retry_after)
+    
+    async def close(self):
+        """Close the HTTP client"""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+
+class AsyncRedisCache(TieredCache):
+    """
+    Asyncio variant of cache.RedisCache
+    
+    Shares the memory and disk tiers and the outage handling with it (see
+    cache.TieredCache); disk reads and writes run in worker threads so
+    SQLite never blocks the event loop. While Redis is unreachable the
+    cache serves from those tiers, and a background task reconnects once
+    Redis answers again.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        # Unknown until connect() runs on the serving event loop
+        self.enabled = False
+        self._maintenance = None
+    
+    async def connect(self):
+        """Connect to Redis and start the maintenance task"""
+        self.client = aioredis.Redis(
+            host=Config.REDIS_HOST,
+            port=Config.REDIS_PORT,
+            password=Config.REDIS_PASSWORD if Config.REDIS_PASSWORD else None,
+            db=Config.REDIS_DB,
+            socket_connect_timeout=Config.REDIS_CONNECT_TIMEOUT,
+            socket_timeout=Config.REDIS_SOCKET_TIMEOUT,
+            max_connections=Config.REDIS_MAX_CONNECTIONS
+        )
+        try:
+            await self.client.ping()
+            self.enabled = True
+            logger.info("Redis cache connected successfully")
+        except (aioredis.ConnectionError, aioredis.TimeoutError) as e:
+            logger.warning(f"Redis connection failed: {e}. Serving from local tiers until it recovers.")
+            self.enabled = False
+        self._maintenance = asyncio.create_task(self._maintain())
+    
+    async def close(self):
+        """Stop the maintenance task and close the Redis connection pool"""
+        if self._maintenance is not None:
+            self._maintenance.cancel()
+            self._maintenance = None
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+    
+    async def _maintain(self):
+        """Reconnect to Redis after an outage and keep the disk tier within its limits"""
+        last_cleanup = time.monotonic()
+        while True:
+            if not self.enabled and self.client is not None:
+                await self._reconnect()
+            if self.disk is not None and time.monotonic() - last_cleanup >= Config.DISK_CACHE_CLEANUP_INTERVAL:
+                await asyncio.to_thread(self.disk.cleanup)
+                last_cleanup = time.monotonic()
+            await asyncio.sleep(Config.REDIS_RECONNECT_INTERVAL)
+    
+    async def _reconnect(self):
+        """Start using Redis again if it answers"""
+        try:
+            # Connections opened before the outage may be half-closed
+            await self.client.connection_pool.disconnect()
+            await self.client.ping()
+        except (aioredis.ConnectionError, aioredis.TimeoutError):
+            return False
+        self.enabled = True
+        logger.info("Redis cache reconnected")
+        return True
+    
+    async def _get_disk_entries(self, keys, backfill=False):
+        """Read entries from the disk tier (see RedisCache._get_disk_entries)"""
+        if self.disk is None or not keys:
+            return [None] * len(keys)
+        
+        found = await asyncio.to_thread(self.disk.get_many, keys)
+        purges = await self._get_purges() if backfill and found else None
+        entries, backfilled = self._decode_disk_entries(keys, found, purges)
+        if backfill and backfilled:
+            try:
+                # NX: never overwrite an entry another worker just stored
+                async with self.client.pipeline(transaction=False) as pipe:
+                    for key, (data, ttl) in backfilled.items():
+                        pipe.set(namespaced(key), data, ex=ttl, nx=True)
+                    await pipe.execute()
+            except Exception as e:
+                logger.error(f"Error copying disk entries to Redis: {e}")
+                self._connection_failed(e)
+        return entries
+    
+    async def _get_purges(self):
+        """Get purge times by pattern (see RedisCache._get_purges)"""
+        try:
+            return {
+                field.decode('utf-8'): float(purged_at)
+                for field, purged_at in (await self.client.hgetall(namespaced("purges"))).items()
+            }
+        except Exception as e:
+            logger.error(f"Error getting purge times: {e}")
+            self._connection_failed(e)
+            return None
+    
+    async def get(self, key):
+        """Get value from cache, whether fresh or stale"""
+        entry = await self.get_entry(key)
+        return entry['data'] if entry else None
+    
+    async def get_entry(self, key):
+        """
+        Get a cache entry along with its freshness
+        
+        Returns:
+            dict or None: {'data', 'stored_at', 'expires_at', 'stale'} or None
+        """
+        entry, local_entry = self._get_local_entry(key)
+        if entry is not None:
+            return entry
+        
+        if not self.enabled or not self.client:
+            entry = (await self._get_disk_entries([key]))[0]
+            return entry or (with_staleness(local_entry) if local_entry else None)
+        
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.get(namespaced(key))
+                pipe.ttl(namespaced(key))
+                cached_data, ttl = await pipe.execute()
+            if cached_data:
+                return self._store_local_entry(key, cached_data, ttl)
+            CACHE_REQUESTS.inc(tier='redis', result='miss')
+            # Redis may have restarted empty; the disk copy is reused
+            return (await self._get_disk_entries([key], backfill=True))[0]
+        except Exception as e:
+            logger.error(f"Error getting from cache: {e}")
+            self._connection_failed(e)
+            entry = (await self._get_disk_entries([key]))[0]
+            return entry or (with_staleness(local_entry) if local_entry else None)
+    
+    async def set(self, key, value, expiration=None):
+        """Set value in cache with expiration (see RedisCache.set)"""
+        serialized_value, hard_expiration = self._build_entry(key, value, expiration)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, serialized_value, hard_expiration)
+        
+        if not self.enabled or not self.client:
+            return False
+        
+        try:
+            # Responses rendered from the previous value are now outdated
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.setex(namespaced(key), hard_expiration, serialized_value)
+                pipe.delete(namespaced(f"rendered:{key}"))
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Error setting cache: {e}")
+            self._connection_failed(e)
+            return False
+    
+    async def get_rendered(self, key, variant, include_body=True):
+        """Get a pre-serialized response body (see RedisCache.get_rendered)"""
+        rendered_key = f"rendered:{key}"
+        rendered = self._get_local_rendered(rendered_key, variant)
+        if rendered is not None:
+            return rendered
+        
+        if not self.enabled or not self.client:
+            return None
+        
+        try:
+            fields = ['expires_at', f"{variant}:etag"]
+            if include_body:
+                fields.append(variant)
+            values = await self.client.hmget(namespaced(rendered_key), *fields)
+            if any(value is None for value in values):
+                return None
+            expires_at = float(values[0])
+            if expires_at <= time.time():
+                return None
+            rendered = {'etag': values[1].decode('utf-8'), 'expires_at': expires_at}
+            if include_body:
+                rendered['body'] = values[2]
+                self._set_local_rendered(rendered_key, variant, values[2], rendered['etag'], expires_at)
+            return rendered
+        except Exception as e:
+            logger.error(f"Error getting rendered response: {e}")
+            self._connection_failed(e)
+            return None
+    
+    async def set_rendered(self, key, variant, body, etag, expires_at):
+        """Store a pre-serialized response body (see RedisCache.set_rendered)"""
+        rendered_key = f"rendered:{key}"
+        self._set_local_rendered(rendered_key, variant, body, etag, expires_at)
+        
+        if not self.enabled or not self.client:
+            return False
+        
+        try:
+            ttl = max(1, int(expires_at + Config.CACHE_STALE_TTL - time.time()))
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.hset(namespaced(rendered_key), mapping={
+                    'expires_at': expires_at,
+                    variant: body,
+                    f"{variant}:etag": etag
+                })
+                pipe.expire(namespaced(rendered_key), ttl)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Error setting rendered response: {e}")
+            self._connection_failed(e)
+            return False
+    
+    async def get_alias(self, alias):
+        """Get the canonical location name stored for an alias"""
+        canonical = None
+        if self.enabled and self.client:
+            try:
+                canonical = await self.client.get(namespaced(f"alias:{alias}"))
+            except Exception as e:
+                logger.error(f"Error getting alias: {e}")
+                self._connection_failed(e)
+        
+        # Aliases Redis does not have (e.g. while it is down) come from disk
+        if canonical is None and self.disk is not None:
+            canonical = await asyncio.to_thread(self.disk.get, f"alias:{alias}")
+        return canonical.decode('utf-8') if canonical is not None else None
+    
+    async def set_alias(self, alias, canonical):
+        """Store the canonical location name for an alias"""
+        if self.disk is not None:
+            await asyncio.to_thread(
+                self.disk.set, f"alias:{alias}", canonical.encode('utf-8'), Config.ALIAS_EXPIRATION
+            )
+        
+        if not self.enabled or not self.client:
+            return False
+        
+        try:
+            await self.client.setex(namespaced(f"alias:{alias}"), Config.ALIAS_EXPIRATION, canonical)
+            return True
+        except Exception as e:
+            logger.error(f"Error setting alias: {e}")
+            self._connection_failed(e)
+            return False
+    
+    async def is_negative(self, name):
+        """Check whether a location is stored as known-invalid"""
+        if not self.enabled or not self.client:
+            return False
+        
+        try:
+            return bool(await self.client.exists(namespaced(f"neg:{name}")))
+        except Exception as e:
+            logger.error(f"Error checking negative cache: {e}")
+            self._connection_failed(e)
+            return False
+    
+    async def set_negative(self, name):
+        """Store a location as known-invalid for NEGATIVE_CACHE_TTL seconds"""
+        if not self.enabled or not self.client:
+            return False
+        
+        try:
+            await self.client.setex(namespaced(f"neg:{name}"), Config.NEGATIVE_CACHE_TTL, b'1')
+            return True
+        except Exception as e:
+            logger.error(f"Error setting negative cache: {e}")
+            self._connection_failed(e)
+            return False
+    
+    async def add_point(self, profile, canonical, latitude, longitude):
+        """
+        Index a cached location by position for nearby lookups
+        
+        Points live in one GEO set per fetch profile; the set expires when
+        no entry has been stored for a full entry lifetime.
+        """
+        if not self.enabled or not self.client:
+            return False
+        
+        key = namespaced(f"geo:{profile or 'full'}")
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.geoadd(key, (longitude, latitude, canonical))
+                pipe.expire(key, Config.CACHE_EXPIRATION + Config.CACHE_STALE_TTL)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Error indexing location position: {e}")
+            self._connection_failed(e)
+            return False
+    
+    async def find_nearby(self, profile, latitude, longitude, radius, count=5):
+        """
+        Get indexed locations within a radius, nearest first
+        
+        Args:
+            profile (str): Fetch profile whose index is searched
+            latitude (float): Latitude of the search center
+            longitude (float): Longitude of the search center
+            radius (float): Search radius in metres
+            count (int): Max locations returned
+            
+        Returns:
+            list: Canonical location names
+        """
+        if not self.enabled or not self.client:
+            return []
+        
+        try:
+            members = await self.client.geosearch(
+                namespaced(f"geo:{profile or 'full'}"),
+                longitude=longitude,
+                latitude=latitude,
+                radius=radius,
+                unit='m',
+                sort='ASC',
+                count=count
+            )
+            return [member.decode('utf-8') for member in members]
+        except Exception as e:
+            logger.error(f"Error searching nearby locations: {e}")
+            self._connection_failed(e)
+            return []
+    
+    async def remove_point(self, profile, canonical):
+        """Drop a location from the position index"""
+        if not self.enabled or not self.client:
+            return False
+        
+        try:
+            await self.client.zrem(namespaced(f"geo:{profile or 'full'}"), canonical)
+            return True
+        except Exception as e:
+            logger.error(f"Error removing location position: {e}")
+            self._connection_failed(e)
+            return False
+    
+    async def incr_popularity(self, counts):
+        """Add request counts to the popularity sorted set (see RedisCache.incr_popularity)"""
+        if not counts or not self.enabled or not self.client:
+            return False
+        
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for location, count in counts.items():
+                    pipe.zincrby(namespaced("popularity"), count, location)
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Error updating popularity: {e}")
+            self._connection_failed(e)
+            return False
+    
+    async def acquire_lock(self, key, timeout):
+        """Acquire a short-lived lease on a cache key (see RedisCache.acquire_lock)"""
+        token = uuid.uuid4().hex
+        if not self.enabled or not self.client:
+            return token
+        
+        try:
+            if await self.client.set(namespaced(f"lock:{key}"), token, nx=True, ex=timeout):
+                return token
+            return None
+        except Exception as e:
+            logger.error(f"Error acquiring lock: {e}")
+            self._connection_failed(e)
+            return token
+    
+    async def is_locked(self, key):
+        """Check whether a lease from acquire_lock is still held"""
+        if not self.enabled or not self.client:
+            return False
+        
+        try:
+            return bool(await self.client.exists(namespaced(f"lock:{key}")))
+        except Exception as e:
+            logger.error(f"Error checking lock: {e}")
+            self._connection_failed(e)
+            return False
+    
+    async def release_lock(self, key, token):
+        """Release a lease previously returned by acquire_lock"""
+        if not self.enabled or not self.client:
+            return False
+        
+        try:
+            return bool(await self.client.eval(RELEASE_LOCK_SCRIPT, 1, namespaced(f"lock:{key}"), token))
+        except Exception as e:
+            logger.error(f"Error releasing lock: {e}")
+            self._connection_failed(e)
+            return False
+    
+    async def run_script(self, script, keys, args):
+        """Run a Lua script atomically (see RedisCache.run_script)"""
+        if not self.enabled or not self.client:
+            return None
+        
+        try:
+            return await self.client.eval(script, len(keys), *[namespaced(key) for key in keys], *args)
+        except Exception as e:
+            logger.error(f"Error running script: {e}")
+            self._connection_failed(e)
+            return None
+    
+    async def get_stats(self):
+        """Get cache statistics"""
+        local_stats = self.local.get_stats() if self.local is not None else {"enabled": False}
+        disk_stats = await asyncio.to_thread(self.disk.get_stats) if self.disk is not None else {"enabled": False}
+        if not self.enabled or not self.client:
+            return {"enabled": False, "local": local_stats, "disk": disk_stats}
+        
+        try:
+            info = await self.client.info('stats')
+            return {
+                "enabled": True,
+                "total_keys": await self.client.dbsize(),
+                "hits": info.get('keyspace_hits', 0),
+                "misses": info.get('keyspace_misses', 0),
+                "serializer": self.serializer.name,
+                "local": local_stats,
+                "disk": disk_stats
+            }
+        except Exception as e:
+            logger.error(f"Error getting cache stats: {e}")
+            self._connection_failed(e)
+            return {"enabled": True, "error": str(e), "local": local_stats, "disk": disk_stats}
+
+
+class AsyncNegativeCache(NegativeCache):
+    """Asyncio variant of negative_cache.NegativeCache"""
+    
+    async def is_invalid(self, name):
+        """Check whether a location was recently rejected by the upstream API"""
+        if self._in_filter(name):
+            return True
+        if await self.cache.is_negative(name):
+            self._on_redis_hit(name)
+            return True
+        return False
+    
+    async def add(self, name):
+        """Record that the upstream API rejected a location"""
+        self._remember(name)
+        await self.cache.set_negative(name)
+        self.stored += 1
+        logger.info(f"Negative-cached invalid location: {name}")
+
+
+class AsyncLocationIndex:
+    """Asyncio variant of locations.LocationIndex"""
+    
+    def __init__(self, cache):
+        self.cache = cache
+        self.local = LocalCache(Config.ALIAS_LOCAL_SIZE, Config.LOCAL_CACHE_TTL)
+    
+    async def resolve(self, location):
+        """Get the canonical name for a location"""
+        alias = normalize_location(location)
+        canonical = self.local.get(alias)
+        if canonical is not None:
+            return canonical
+        
+        canonical = await self.cache.get_alias(alias)
+        if canonical is None:
+            if self.cache.enabled:
+                self.local.set(alias, alias)
+            return alias
+        self.local.set(alias, canonical)
+        return canonical
+    
+    async def learn(self, location, resolved_address):
+        """Record that a spelling resolves to the upstream's resolved address"""
+        alias = normalize_location(location)
+        if not resolved_address:
+            return alias
+        
+        canonical = normalize_location(resolved_address)
+        if not canonical:
+            return alias
+        if canonical != alias:
+            await self.cache.set_alias(alias, canonical)
+            self.local.set(alias, canonical)
+        self.local.set(canonical, canonical)
+        return canonical
+
+
+class AsyncSingleFlight:
+    """
+    Asyncio variant of singleflight.SingleFlight
+    
+    Coroutines asking for the same key await one shared future; across
+    workers the same Redis lease as the synchronous app is used.
+    """
+    
+    def __init__(self, cache):
+        self.cache = cache
+        self._calls = {}
+        self._pending = set()
+        self._tasks = set()
+    
+    async def do(self, key, loader, lookup=None, failure=None):
+        """
+        Run loader once per key, sharing its result with concurrent callers
+        
+        Args:
+            key (str): Cache key the loader populates
+            loader (callable): Coroutine function that fetches and caches data
+            lookup (callable): Coroutine function returning fresh cached data
+            failure (callable): Coroutine function returning the error dict
+                for a failure the loader recorded (see SingleFlight.do)
+            
+        Returns:
+            dict: The loader's result, or a cached result from another worker
+        """
+        lookup = lookup or (lambda: self.cache.get(key))
+        
+        future = self._calls.get(key)
+        if future is not None:
+            try:
+                result = await asyncio.wait_for(asyncio.shield(future), Config.FETCH_WAIT_TIMEOUT)
+                if result is not None:
+                    return result
+            except asyncio.TimeoutError:
+                pass
+            logger.warning(f"In-flight fetch of {key} produced no result")
+            return in_flight_error()
+        
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        result = None
+        try:
+            result = await self._load(key, loader, lookup, failure)
+            return result
+        finally:
+            self._calls.pop(key, None)
+            future.set_result(result)
+    
+    def do_in_background(self, key, loader, lookup=None):
+        """Schedule a non-blocking refresh of key (see SingleFlight.do_in_background)"""
+        if key in self._pending or key in self._calls:
+            return False
+        self._pending.add(key)
+        
+        lookup = lookup or (lambda: self.cache.get(key))
+        task = asyncio.create_task(self._refresh(key, loader, lookup))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+    
+    async def _refresh(self, key, loader, lookup):
+        try:
+            token = await self.cache.acquire_lock(key, Config.FETCH_LOCK_TIMEOUT)
+            if token is None:
+                return
+            try:
+                if await lookup() is None:
+                    await loader()
+            finally:
+                await self.cache.release_lock(key, token)
+        except Exception as e:
+            logger.error(f"Background refresh of {key} failed: {e}")
+        finally:
+            self._pending.discard(key)
+    
+    async def _load(self, key, loader, lookup, failure=None):
+        if not self.cache.enabled:
+            return await loader()
+        
+        token = await self.cache.acquire_lock(key, Config.FETCH_LOCK_TIMEOUT)
+        if token is None:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + Config.FETCH_WAIT_TIMEOUT
+            while loop.time() < deadline:
+                await asyncio.sleep(Config.FETCH_POLL_INTERVAL)
+                cached_data = await lookup()
+                if cached_data is None and not await self.cache.is_locked(key):
+                    # The value may have been stored just before the release
+                    cached_data = await lookup()
+                    if cached_data is None:
+                        break
+                if cached_data is not None:
+                    return {'success': True, 'data': cached_data, 'cached': True}
+            error = await failure() if failure is not None else None
+            if error is not None:
+                return error
+            logger.warning(f"Lease holder of {key} stored no value")
+            return in_flight_error()
+        
+        try:
+            cached_data = await lookup()
+            if cached_data is not None:
+                return {'success': True, 'data': cached_data, 'cached': True}
+            return await loader()
+        finally:
+            await self.cache.release_lock(key, token)
+
+
+class AsyncRefreshScheduler(RefreshScheduler):
+    """
+    Asyncio variant of scheduler.RefreshScheduler that only counts
+    
+    Request counts are flushed to the shared popularity set once per
+    REFRESH_INTERVAL, so async traffic is weighed by the refresh scheduler
+    and the hot-key snapshot. Planning refreshes, decaying the counts and
+    taking snapshots stay with the WSGI workers (app.py), which must run
+    alongside for hot locations to be refreshed ahead of expiry.
+    """
+    
+    def __init__(self, cache):
+        super().__init__(cache, None)
+        self._task = None
+    
+    def start(self):
+        """Start the flush task on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the flush task and flush what is left"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.tick()
+    
+    async def _run(self):
+        while True:
+            await asyncio.sleep(Config.REFRESH_INTERVAL)
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"Refresh scheduler flush failed: {e}")
+    
+    async def tick(self):
+        """Flush request counts to the popularity set"""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        await self.cache.incr_popularity(counts)
+    
+    def get_stats(self):
+        """Get scheduler statistics"""
+        return {
+            "enabled": False,
+            "flushing": self._task is not None and not self._task.done()
+        }
@@ -0,0 +1,292 @@
+"""
+Load benchmark for the /weather hit, miss, stale and batch paths
+
+Runs the Flask app in-process against the local stub upstream in
+stub_upstream.py, drives it with concurrent HTTP clients and reports
+throughput and p50/p95/p99 latency per path:
+
+    python benchmarks/load_benchmark.py --concurrency 16 --requests 2000 --output results.json
+    python benchmarks/load_benchmark.py --output new.json --compare results.json
+
+Redis is faked in-process by default (needs `pip install fakeredis lupa`).
+With --redis local the Redis at REDIS_HOST/REDIS_PORT is used; keys are
+written to --redis-db (15 by default) and nothing is flushed. With
+--redis down nothing listens on the Redis port, as during an outage; the
+stale path is skipped and the run fails if any request is not answered
+with 200.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+def configure_environment(args):
+    """Set app configuration before any app module reads it"""
+    os.environ['WEATHER_API_KEY'] = 'benchmark'
+    os.environ['RATE_LIMIT'] = '100000000 per hour'
+    os.environ['REFRESH_ENABLED'] = 'False'
+    # A fresh disk tier, so earlier runs cannot turn misses into hits
+    os.environ['DISK_CACHE_PATH'] = os.path.join(tempfile.mkdtemp(), 'weather_cache.db')
+    if args.redis in ('fake', 'down'):
+        # Make the app's own connection attempt fail fast; the fake client
+        # is swapped in after import
+        os.environ['REDIS_HOST'] = '127.0.0.1'
+        os.environ['REDIS_PORT'] = '1'
+    else:
+        os.environ['REDIS_DB'] = str(args.redis_db)
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def run_load(base_url, calls, concurrency):
+    """
+    Send calls from concurrent clients and measure each one
+    
+    Args:
+        base_url (str): App base URL
+        calls (list): (method, path, json_body) tuples
+        concurrency (int): Number of client threads
+    
+    Returns:
+        dict: Throughput and latency summary
+    """
+    latencies = []
+    statuses = Counter()
+    lock = threading.Lock()
+    start = threading.Barrier(concurrency + 1)
+    
+    def client(chunk):
+        session = requests.Session()
+        local_latencies = []
+        local_statuses = Counter()
+        start.wait()
+        for method, path, body in chunk:
+            started = time.perf_counter()
+            try:
+                status = session.request(method, base_url + path, json=body).status_code
+            except requests.RequestException:
+                status = 'error'
+            local_latencies.append(time.perf_counter() - started)
+            local_statuses[status] += 1
+        with lock:
+            latencies.extend(local_latencies)
+            statuses.update(local_statuses)
+    
+    threads = [
+        threading.Thread(target=client, args=(calls[i::concurrency],))
+        for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+    
+    latencies.sort()
+    ms = [value * 1000 for value in latencies]
+    return {
+        'requests': len(latencies),
+        'errors': sum(count for status, count in statuses.items() if status != 200),
+        'statuses': {str(status): count for status, count in statuses.items()},
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'mean_ms': round(sum(ms) / len(ms), 3) if ms else None,
+        'p50_ms': round(percentile(ms, 50), 3) if ms else None,
+        'p95_ms': round(percentile(ms, 95), 3) if ms else None,
+        'p99_ms': round(percentile(ms, 99), 3) if ms else None,
+        'max_ms': round(ms[-1], 3) if ms else None
+    }
+
+
+def seed_stale(weather_app, stub, locations):
+    """Store already-expired simple-format entries for locations"""
+    from cache import namespaced
+    from locations import normalize_location, qualify_location
+    from stub_upstream import narrow_payload
+    
+    cache = weather_app.cache
+    profile = weather_app.weather_service.fetch_profile('simple')
+    params = weather_app.weather_service.profile_params(profile)
+    now = time.time()
+    for location in locations:
+        payload = dict(stub.payload, address=location, resolvedAddress=location)
+        entry = {
+            'data': narrow_payload(payload, params.get('include'), params.get('elements')),
+            'stored_at': now - 3600,
+            'expires_at': now - 1
+        }
+        key = f"weather:{qualify_location(normalize_location(location), profile)}"
+        cache.client.setex(namespaced(key), 3600, cache.serializer.encode(entry))
+
+
+def print_results(results, previous=None):
+    header = f"{'path':<8}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header)
+    for name, summary in results.items():
+        print(
+            f"{name:<8}{summary['requests']:>10}{summary['errors']:>8}"
+            f"{summary['throughput_rps']:>10}{summary['p50_ms']:>10}"
+            f"{summary['p95_ms']:>10}{summary['p99_ms']:>10}"
+        )
+    
+    if not previous:
+        return
+    print("\nChange vs previous run (negative latency change is better)")
+    print(f"{'path':<8}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, summary in results.items():
+        before = previous.get('results', {}).get(name)
+        if not before:
+            continue
+        changes = []
+        for metric in ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms'):
+            if before.get(metric):
+                changes.append(f"{(summary[metric] - before[metric]) / before[metric]:>+10.1%}")
+            else:
+                changes.append(f"{'-':>10}")
+        print(f"{name:<8}{''.join(changes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients')
+    parser.add_argument('--requests', type=int, default=2000, help='Requests for the hit path')
+    parser.add_argument('--miss-requests', type=int, default=200, help='Requests for the miss and stale paths')
+    parser.add_argument('--batch-requests', type=int, default=100, help='Requests for the batch path')
+    parser.add_argument('--batch-size', type=int, default=50, help='Locations per batch request')
+    parser.add_argument('--locations', type=int, default=100, help='Distinct warm locations')
+    parser.add_argument('--latency-ms', type=float, default=100, help='Stub upstream latency')
+    parser.add_argument('--days', type=int, default=15, help='Forecast days per stub payload')
+    parser.add_argument('--redis', choices=['fake', 'local', 'down'], default='fake')
+    parser.add_argument('--redis-db', type=int, default=15)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--compare', help='Previous JSON results to compare against')
+    args = parser.parse_args()
+    
+    configure_environment(args)
+    if args.redis == 'fake' and fakeredis is None:
+        sys.exit("fakeredis is not installed; pip install fakeredis lupa or use --redis local")
+    
+    import logging
+    from werkzeug.serving import make_server
+    from config import Config
+    from stub_upstream import StubUpstream
+    
+    stub = StubUpstream(latency_ms=args.latency_ms, days=args.days).start()
+    Config.WEATHER_API_ENDPOINT = stub.endpoint
+    
+    import app as weather_app
+    # Request logging would dominate hit latency and flood the terminal
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    flask_app = weather_app.create_app()
+    weather_app.init_services()
+    if args.redis == 'fake':
+        weather_app.cache.client = fakeredis.FakeRedis()
+        weather_app.cache.pool = None
+        weather_app.cache.enabled = True
+    elif args.redis == 'local' and not weather_app.cache.enabled:
+        sys.exit(f"Redis at {Config.REDIS_HOST}:{Config.REDIS_PORT} is not reachable")
+    
+    server = make_server('127.0.0.1', 0, flask_app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    
+    # Unique names per run so reruns against a real Redis start cold
+    run_id = uuid.uuid4().hex[:8]
+    warm = [f"hit-{run_id}-{i}" for i in range(args.locations)]
+    misses = [f"miss-{run_id}-{i}" for i in range(args.miss_requests)]
+    stale = [f"stale-{run_id}-{i}" for i in range(args.miss_requests)]
+    
+    results = {}
+    print(f"Warming {len(warm)} locations...")
+    # The first concurrent burst is also where an unreachable Redis shows up
+    results['warm'] = run_load(
+        base_url, [('GET', f"/weather/{location}", None) for location in warm], args.concurrency
+    )
+    if args.redis != 'down':
+        seed_stale(weather_app, stub, stale)
+    
+    rng = random.Random(0)
+    print("Running hit path...")
+    results['hit'] = run_load(
+        base_url,
+        [('GET', f"/weather/{rng.choice(warm)}", None) for _ in range(args.requests)],
+        args.concurrency
+    )
+    print("Running miss path...")
+    results['miss'] = run_load(
+        base_url, [('GET', f"/weather/{location}", None) for location in misses], args.concurrency
+    )
+    if args.redis != 'down':
+        print("Running stale path...")
+        results['stale'] = run_load(
+            base_url, [('GET', f"/weather/{location}", None) for location in stale], args.concurrency
+        )
+    print("Running batch path...")
+    results['batch'] = run_load(
+        base_url,
+        [
+            ('POST', '/weather/batch', {'locations': rng.sample(warm, min(args.batch_size, len(warm)))})
+            for _ in range(args.batch_requests)
+        ],
+        args.concurrency
+    )
+    server.shutdown()
+    stub.stop()
+    
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'config': vars(args),
+        'upstream': {'requests': stub.requests, 'bytes': stub.bytes_sent},
+        'results': results
+    }
+    
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print()
+    print_results(results, previous)
+    print(f"\nUpstream: {stub.requests} requests, {stub.bytes_sent / 1e6:.1f} MB")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    
+    if args.redis == 'down':
+        failed = sum(summary['errors'] for summary in results.values())
+        if failed:
+            sys.exit(f"{failed} requests failed while Redis was down")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Compare cache value encodings by size and encode/decode time
+
+Usage:
+    python benchmarks/serializer_benchmark.py [payload.json] [--iterations N]
+
+Without a payload file, a synthetic format=full Visual Crossing document
+(15 days with hourly data) is used.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import JsonSerializer, MsgpackSerializer, build_entry, decode_value, msgpack, zstandard
+
+
+def synthetic_payload(days=15):
+    """Build a full-format payload shaped like a Visual Crossing response"""
+    def conditions(i):
+        return {
+            'datetime': f"{i % 24:02d}:00:00",
+            'datetimeEpoch': 1760000000 + i * 3600,
+            'temp': 10.0 + (i % 13) * 0.7,
+            'feelslike': 9.1 + (i % 11) * 0.6,
+            'humidity': 60.0 + (i % 30),
+            'dew': 4.2 + (i % 5) * 0.3,
+            'precip': round((i % 7) * 0.1, 1),
+            'precipprob': (i % 10) * 10.0,
+            'snow': 0.0,
+            'snowdepth': 0.0,
+            'preciptype': ['rain'] if i % 3 == 0 else None,
+            'windgust': 20.0 + (i % 9),
+            'windspeed': 12.0 + (i % 8),
+            'winddir': float(i * 17 % 360),
+            'pressure': 1010.0 + (i % 6),
+            'visibility': 10.0,
+            'cloudcover': float(i * 7 % 100),
+            'solarradiation': float(i * 31 % 700),
+            'solarenergy': round(i * 0.13 % 2.5, 1),
+            'uvindex': float(i % 8),
+            'conditions': 'Partially cloudy',
+            'icon': 'partly-cloudy-day',
+            'stations': ['EGLL', 'EGLC', 'EGWU'],
+            'source': 'fcst'
+        }
+    
+    return {
+        'queryCost': 1,
+        'latitude': 51.5064,
+        'longitude': -0.12721,
+        'resolvedAddress': 'London, England, United Kingdom',
+        'address': 'London',
+        'timezone': 'Europe/London',
+        'tzoffset': 1.0,
+        'description': 'Similar temperatures continuing with a chance of rain.',
+        'days': [
+            dict(conditions(d * 24), datetime=f"2026-10-{d + 1:02d}",
+                 tempmax=18.0, tempmin=9.0, description='Partly cloudy throughout the day.',
+                 hours=[conditions(d * 24 + h) for h in range(24)])
+            for d in range(days)
+        ],
+        'alerts': [],
+        'currentConditions': conditions(0)
+    }
+
+
+def measure(serializer, entry, iterations):
+    """Return (size, encode_ms, decode_ms) averaged over iterations"""
+    encoded = serializer.encode(entry)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        serializer.encode(entry)
+    encode_ms = (time.perf_counter() - start) * 1000 / iterations
+    
+    start = time.perf_counter()
+    for _ in range(iterations):
+        decode_value(encoded)
+    decode_ms = (time.perf_counter() - start) * 1000 / iterations
+    
+    assert decode_value(encoded) == entry
+    return len(encoded), encode_ms, decode_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('payload', nargs='?', help='JSON file with a raw upstream payload')
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+    
+    if args.payload:
+        with open(args.payload) as f:
+            payload = json.load(f)
+    else:
+        payload = synthetic_payload()
+    entry, _ = build_entry(payload, 43200)
+    
+    serializers = [JsonSerializer()]
+    if msgpack is not None:
+        serializers += [MsgpackSerializer('zlib', level) for level in (1, 3, 6)]
+        if zstandard is not None:
+            serializers += [MsgpackSerializer('zstd', level) for level in (1, 3)]
+    else:
+        print("msgpack not installed; only JSON is measured")
+    
+    print(f"{'serializer':<20}{'level':>6}{'bytes':>10}{'ratio':>8}{'encode ms':>12}{'decode ms':>12}")
+    baseline = None
+    for serializer in serializers:
+        size, encode_ms, decode_ms = measure(serializer, entry, args.iterations)
+        baseline = baseline or size
+        level = getattr(serializer, 'level', '-')
+        print(f"{serializer.name:<20}{level:>6}{size:>10}{size / baseline:>8.2f}{encode_ms:>12.3f}{decode_ms:>12.3f}")
+
+
+if __name__ == '__main__':
+    main()
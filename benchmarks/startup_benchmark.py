@@ -0,0 +1,118 @@
+"""
+Measure how long a worker takes to boot and answer its first request
+
+Each run starts a fresh interpreter that imports the app, builds it with
+create_app() and sends GET /health through the test client, timing each
+step:
+
+    python benchmarks/startup_benchmark.py --runs 5
+    python benchmarks/startup_benchmark.py --redis down --eager
+
+--redis down points the app at a local socket that accepts connections
+but never answers, like a Redis host that has stopped responding: every
+call hangs until --timeout. --eager creates the services before the first
+request, as a server that initializes workers at boot would.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints one JSON line of timings
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import app as weather_app
+imported = time.perf_counter()
+flask_app = weather_app.create_app()
+created = time.perf_counter()
+if {eager}:
+    weather_app.init_services()
+ready = time.perf_counter()
+status = flask_app.test_client().get('/health').status_code
+answered = time.perf_counter()
+print(json.dumps({{
+    'import_s': imported - started,
+    'create_app_s': created - imported,
+    'boot_s': ready - started,
+    'first_request_s': answered - ready,
+    'status': status
+}}))
+"""
+
+def start_unresponsive_redis():
+    """Accept connections and never reply; returns the port"""
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(64)
+    held = []
+    
+    def accept():
+        while True:
+            connection, _ = server.accept()
+            held.append(connection)
+    
+    threading.Thread(target=accept, daemon=True).start()
+    return server.getsockname()[1]
+
+
+def run_once(args, redis_port=None):
+    env = dict(
+        os.environ,
+        WEATHER_API_KEY=os.environ.get('WEATHER_API_KEY', 'benchmark'),
+        REFRESH_ENABLED='False',
+        LOG_LEVEL='WARNING'
+    )
+    if redis_port is not None:
+        env['REDIS_HOST'] = '127.0.0.1'
+        env['REDIS_PORT'] = str(redis_port)
+    env['REDIS_CONNECT_TIMEOUT'] = str(args.timeout)
+    env['REDIS_SOCKET_TIMEOUT'] = str(args.timeout)
+    
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD.format(eager=args.eager)],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to time')
+    parser.add_argument('--redis', choices=['local', 'down'], default='local',
+                        help='Use REDIS_HOST/REDIS_PORT, or simulate an outage')
+    parser.add_argument('--timeout', type=float, default=5, help='Redis connect and socket timeout')
+    parser.add_argument('--eager', action='store_true', help='Create services before the first request')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+    
+    redis_port = start_unresponsive_redis() if args.redis == 'down' else None
+    runs = [run_once(args, redis_port) for _ in range(args.runs)]
+    summary = {}
+    print(f"{'step':<18}{'median ms':>12}{'max ms':>12}")
+    for step in ('import_s', 'create_app_s', 'boot_s', 'first_request_s'):
+        values = [run[step] * 1000 for run in runs]
+        summary[step] = {
+            'median_ms': round(statistics.median(values), 1),
+            'max_ms': round(max(values), 1)
+        }
+        print(f"{step:<18}{summary[step]['median_ms']:>12}{summary[step]['max_ms']:>12}")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'config': vars(args), 'results': summary, 'runs': runs}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+Local stand-in for the Visual Crossing timeline API
+
+Serves synthetic payloads with a configurable delay so the app can be
+benchmarked without an API key or network access:
+
+    python benchmarks/stub_upstream.py --port 8081 --latency-ms 150 --days 15
+
+Point the app at it by setting Config.WEATHER_API_ENDPOINT to
+http://127.0.0.1:8081/timeline/. Locations containing "invalid" get a 400,
+/timeline/<location>/<start>/<end> returns one day per date in the range,
+and the include= and elements= parameters are honoured like upstream.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from serializer_benchmark import synthetic_payload
+
+# include= values and the payload keys they control
+SECTIONS = {
+    'current': 'currentConditions',
+    'days': 'days',
+    'alerts': 'alerts'
+}
+
+
+def range_days(days, start, end):
+    """Repeat the synthetic days over the dates from start to end inclusive"""
+    start, end = date.fromisoformat(start), date.fromisoformat(end)
+    return [
+        dict(days[offset % len(days)], datetime=(start + timedelta(days=offset)).isoformat())
+        for offset in range((end - start).days + 1)
+    ]
+
+
+def narrow_payload(payload, include, elements):
+    """Apply the include= and elements= parameters to a full payload"""
+    if include:
+        sections = set(include.split(','))
+        included = {SECTIONS[section] for section in sections if section in SECTIONS}
+        payload = {
+            key: value for key, value in payload.items()
+            if key not in SECTIONS.values() or key in included
+        }
+        if 'days' in payload and 'hours' not in sections:
+            payload['days'] = [{k: v for k, v in day.items() if k != 'hours'} for day in payload['days']]
+    
+    if elements:
+        keep = set(elements.split(',')) | {'hours'}
+        
+        def narrow(values):
+            narrowed = {k: v for k, v in values.items() if k in keep}
+            if 'hours' in narrowed:
+                narrowed['hours'] = [narrow(hour) for hour in narrowed['hours']]
+            return narrowed
+        
+        if 'currentConditions' in payload:
+            payload['currentConditions'] = narrow(payload['currentConditions'])
+        if 'days' in payload:
+            payload['days'] = [narrow(day) for day in payload['days']]
+    return payload
+
+
+class StubUpstream:
+    """Threaded HTTP server imitating the timeline endpoint"""
+    
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=100, days=15):
+        """
+        Args:
+            host (str): Interface to bind
+            port (int): Port to bind (0 picks a free port)
+            latency_ms (float): Delay before each response
+            days (int): Forecast days per payload (each with 24 hours)
+        """
+        self.latency = latency_ms / 1000
+        self.payload = synthetic_payload(days)
+        self.requests = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+    
+    @property
+    def endpoint(self):
+        """Base URL to use as WEATHER_API_ENDPOINT"""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/timeline/"
+    
+    def _handler(self):
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are written separately; avoid Nagle delays
+            disable_nagle_algorithm = True
+            
+            def log_message(self, *args):
+                pass
+            
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                # Split before unquoting; an encoded location may contain '/'
+                location, *dates = url.path.rsplit('/timeline/', 1)[-1].split('/')
+                location = unquote(location)
+                time.sleep(stub.latency)
+                
+                payload = dict(stub.payload, address=location, resolvedAddress=f"{location}, Benchland")
+                error = None
+                if 'invalid' in location.lower():
+                    error = b'Bad API Request:Invalid location parameter value.'
+                elif dates:
+                    try:
+                        payload['days'] = range_days(payload['days'], *dates)
+                    except (TypeError, ValueError):
+                        error = b'Bad API Request:Invalid start or end date.'
+                
+                if error:
+                    body = error
+                    status = 400
+                else:
+                    payload = narrow_payload(payload, params.get('include'), params.get('elements'))
+                    body = json.dumps(payload).encode('utf-8')
+                    status = 200
+                
+                with stub._lock:
+                    stub.requests += 1
+                    stub.bytes_sent += len(body)
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        
+        return Handler
+    
+    def start(self):
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Stop serving"""
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency-ms', type=float, default=100)
+    parser.add_argument('--days', type=int, default=15)
+    args = parser.parse_args()
+    
+    stub = StubUpstream(args.host, args.port, args.latency_ms, args.days)
+    print(f"Stub upstream listening on {stub.endpoint}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,38 +1,507 @@
 import redis
 import json
 import logging
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from fnmatch import fnmatchcase
 from config import Config
+from disk_cache import DiskCache
+from metrics import CACHE_REQUESTS
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 logger = logging.getLogger(__name__)
 
 
-class RedisCache:
-    """Redis cache manager for weather data"""
+# Deletes a lock only if it is still held by the caller's token
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Keys that are never written to the disk tier, so purging them needs no
+# record for disk copies (see RedisCache.purge)
+MEMORY_ONLY_PREFIXES = ('rendered:', 'neg:', 'lock:', 'job:')
+
+
+class JsonSerializer:
+    """Plain JSON text, the original cache format (no header byte)"""
+    
+    name = 'json'
+    header = b''
+    
+    def encode(self, value):
+        return json.dumps(value).encode('utf-8')
+    
+    def decode(self, payload):
+        return json.loads(payload)
+
+
+class MsgpackSerializer:
+    """MessagePack compressed with zlib or zstd, behind a format header byte"""
+    
+    def __init__(self, compression='zlib', level=3):
+        """
+        Args:
+            compression (str): 'zlib' or 'zstd'
+            level (int): Compression level
+        """
+        self.name = f"msgpack-{compression}"
+        self.compression = compression
+        self.level = level
+        self.header = b'\x02' if compression == 'zstd' else b'\x01'
+        # zstd contexts must not be shared between threads
+        self._zstd = threading.local()
+    
+    def encode(self, value):
+        packed = msgpack.packb(value, use_bin_type=True)
+        if self.compression == 'zstd':
+            if not hasattr(self._zstd, 'compressor'):
+                self._zstd.compressor = zstandard.ZstdCompressor(level=self.level)
+            return self.header + self._zstd.compressor.compress(packed)
+        return self.header + zlib.compress(packed, self.level)
+    
+    def decode(self, payload):
+        if self.compression == 'zstd':
+            if not hasattr(self._zstd, 'decompressor'):
+                self._zstd.decompressor = zstandard.ZstdDecompressor()
+            packed = self._zstd.decompressor.decompress(payload)
+        else:
+            packed = zlib.decompress(payload)
+        return msgpack.unpackb(packed, raw=False)
+
+
+def get_serializer(name=None):
+    """
+    Get the serializer for new cache values
+    
+    Args:
+        name (str): 'json', 'msgpack' (zlib) or 'msgpack-zstd';
+            defaults to CACHE_SERIALIZER
+            
+    Returns:
+        Serializer falling back to JSON if its optional packages are missing
+    """
+    name = name or Config.CACHE_SERIALIZER
+    if name == 'json':
+        return JsonSerializer()
+    if msgpack is None:
+        logger.warning(f"msgpack not installed, cache serializer '{name}' falls back to json")
+        return JsonSerializer()
+    if name == 'msgpack-zstd':
+        if zstandard is None:
+            logger.warning("zstandard not installed, cache values are compressed with zlib")
+            return MsgpackSerializer('zlib', Config.CACHE_COMPRESSION_LEVEL)
+        return MsgpackSerializer('zstd', Config.CACHE_COMPRESSION_LEVEL)
+    return MsgpackSerializer('zlib', Config.CACHE_COMPRESSION_LEVEL)
+
+
+# Decoders for each format header byte
+_DECODERS = {
+    b'\x01': MsgpackSerializer('zlib'),
+    b'\x02': MsgpackSerializer('zstd')
+}
+
+
+def decode_value(data):
+    """
+    Decode a cached value written by any serializer
+    
+    The first byte identifies the format; values without a known header
+    are legacy JSON text, so entries written before a serializer change
+    remain readable.
+    
+    Args:
+        data (bytes): Value as stored in Redis
+        
+    Returns:
+        Decoded value
+    """
+    decoder = _DECODERS.get(data[:1])
+    if decoder is None:
+        return json.loads(data)
+    return decoder.decode(data[1:])
+
+
+def namespaced(key):
+    """
+    Prefix a logical cache key with CACHE_NAMESPACE
+    
+    All keys the app writes share the prefix, so they can be scanned and
+    invalidated without touching other data in the database (such as
+    rate limiter counters).
+    """
+    return f"{Config.CACHE_NAMESPACE}:{key}" if Config.CACHE_NAMESPACE else key
+
+
+def build_entry(value, expiration=None):
+    """
+    Wrap a value in a cache entry envelope
+    
+    Args:
+        value (dict): Data to cache
+        expiration (int): Seconds the entry stays fresh
+        
+    Returns:
+        tuple: (entry, hard_expiration) where hard_expiration also covers
+            the CACHE_STALE_TTL grace period
+    """
+    expiration = expiration or Config.CACHE_EXPIRATION
+    now = time.time()
+    entry = {
+        'data': value,
+        'stored_at': now,
+        'expires_at': now + expiration
+    }
+    return entry, expiration + Config.CACHE_STALE_TTL
+
+
+def purge_time(purges, key):
+    """
+    Get the time of the latest purge whose pattern matches a key
+    
+    Args:
+        purges (dict or None): Pattern -> purge time, as recorded by
+            RedisCache.purge
+        key (str): Logical cache key
+        
+    Returns:
+        float: Purge time, or 0 if no recorded purge matches
+    """
+    if not purges:
+        return 0
+    return max((purged_at for pattern, purged_at in purges.items() if fnmatchcase(key, pattern)), default=0)
+
+
+def with_staleness(entry):
+    """Copy an entry with its stale flag set for the current time"""
+    return dict(entry, stale=entry['expires_at'] <= time.time())
+
+
+class LocalCache:
+    """In-process LRU cache with a TTL, used as a tier in front of Redis"""
+    
+    def __init__(self, max_size, ttl):
+        """
+        Args:
+            max_size (int): Maximum number of entries before LRU eviction
+            ttl (int): Maximum lifetime of an entry in seconds
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key):
+        """Return the live value for key, or None"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key, value, ttl=None):
+        """Store value for at most ttl seconds (capped at the tier's TTL)"""
+        ttl = min(ttl, self.ttl) if ttl else self.ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+    
+    def delete(self, key):
+        """Remove key if present"""
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+    
+    def get_stats(self):
+        """Get local tier statistics"""
+        with self._lock:
+            return {
+                "enabled": True,
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+
+class TieredCache:
+    """
+    Memory and disk tiers around Redis, shared by RedisCache and the
+    asyncio AsyncRedisCache
+    
+    Holds everything that does not talk to Redis: the optional per-worker
+    memory tier (in front of Redis), the optional per-host disk tier
+    (behind it), decoding disk copies and the outage policy. Subclasses do
+    the Redis I/O, synchronously or not.
+    """
     
     def __init__(self):
-        """Initialize Redis connection"""
         self.client = None
         self.enabled = True
+        self.serializer = get_serializer()
+        # Optional per-worker tier; its TTL never outlives the Redis entry
+        self.local = None
+        if Config.LOCAL_CACHE_ENABLED:
+            self.local = LocalCache(
+                Config.LOCAL_CACHE_SIZE,
+                min(Config.LOCAL_CACHE_TTL, Config.CACHE_EXPIRATION)
+            )
+        # Optional per-host tier that survives Redis and worker restarts
+        self.disk = None
+        if Config.DISK_CACHE_ENABLED:
+            try:
+                self.disk = DiskCache(Config.DISK_CACHE_PATH, Config.DISK_CACHE_MAX_MB * 1024 * 1024)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Disk cache unavailable: {e}. Disk tier will be disabled.")
+    
+    def _connection_failed(self, error):
+        """
+        Stop using Redis after a connection error
+        
+        Requests then skip Redis instead of each waiting for the socket
+        timeout, until Redis is reconnected in the background.
+        """
+        if not isinstance(error, (redis.ConnectionError, redis.TimeoutError)):
+            return
+        # A pool with every connection busy says nothing about the server
+        if str(error) == "No connection available.":
+            return
+        if self.enabled:
+            logger.warning(f"Lost connection to Redis: {error}. Serving from local tiers until it recovers.")
+            self.enabled = False
+    
+    def _decode_disk_entries(self, keys, found, purges=None):
+        """
+        Turn values read from the disk tier into entries and copy them to
+        the memory tier
+        
+        Args:
+            keys (list): Cache keys
+            found (dict): Key -> encoded value, from DiskCache.get_many
+            purges (dict): Purge times by pattern (see RedisCache.purge);
+                entries stored before a purge of a matching pattern are
+                ignored
+            
+        Returns:
+            tuple: (entry or None for each key, key -> (encoded value, ttl)
+                for the entries found, to copy back to Redis)
+        """
+        entries = []
+        backfill = {}
+        for key in keys:
+            data = found.get(key)
+            entry = decode_value(data) if data is not None else None
+            if entry is None or entry['stored_at'] <= purge_time(purges, key):
+                CACHE_REQUESTS.inc(tier='disk', result='miss')
+                entries.append(None)
+                continue
+            ttl = max(1, int(entry['expires_at'] + Config.CACHE_STALE_TTL - time.time()))
+            if self.local is not None:
+                self.local.set(key, entry, ttl)
+            backfill[key] = (data, ttl)
+            entry = with_staleness(entry)
+            CACHE_REQUESTS.inc(tier='disk', result='stale' if entry['stale'] else 'hit')
+            entries.append(entry)
+        return entries, backfill
+    
+    def _get_local_entry(self, key):
+        """
+        Look a key up in the memory tier
+        
+        Returns:
+            tuple: (fresh entry or None, local copy or None); a stale local
+                copy may already have been refreshed in Redis, so it is only
+                served when Redis cannot be asked
+        """
+        if self.local is None:
+            return None, None
+        local_entry = self.local.get(key)
+        if local_entry is not None and local_entry['expires_at'] > time.time():
+            CACHE_REQUESTS.inc(tier='local', result='hit')
+            return dict(local_entry, stale=False), local_entry
+        CACHE_REQUESTS.inc(tier='local', result='miss')
+        return None, local_entry
+    
+    def _store_local_entry(self, key, cached_data, ttl):
+        """Decode a value read from Redis and keep it in the memory tier for its remaining TTL"""
+        entry = decode_value(cached_data)
+        if self.local is not None:
+            self.local.set(key, entry, ttl if ttl > 0 else None)
+        entry = with_staleness(entry)
+        CACHE_REQUESTS.inc(tier='redis', result='stale' if entry['stale'] else 'hit')
+        return entry
+    
+    def _get_local_rendered(self, rendered_key, variant):
+        """Get a fresh rendered body from the memory tier, or None"""
+        if self.local is None:
+            return None
+        rendered = self.local.get(rendered_key)
+        if (rendered is not None and variant in rendered['bodies']
+                and rendered['expires_at'] > time.time()):
+            return dict(rendered['bodies'][variant], expires_at=rendered['expires_at'])
+        return None
+    
+    def _set_local_rendered(self, rendered_key, variant, body, etag, expires_at):
+        """Add a rendered body to the local tier's copy of the hash"""
+        if self.local is None:
+            return
+        rendered = self.local.get(rendered_key)
+        bodies = {}
+        if rendered is not None and rendered['expires_at'] == expires_at:
+            bodies = dict(rendered['bodies'])
+        bodies[variant] = {'body': body, 'etag': etag}
+        self.local.set(
+            rendered_key,
+            {'expires_at': expires_at, 'bodies': bodies},
+            max(1, int(expires_at + Config.CACHE_STALE_TTL - time.time()))
+        )
+    
+    def _build_entry(self, key, value, expiration=None):
+        """
+        Build and encode an entry, writing it to the memory tier
+        
+        Returns:
+            tuple: (encoded entry, hard expiration in seconds)
+        """
+        entry, hard_expiration = build_entry(value, expiration)
+        if self.local is not None:
+            self.local.set(key, entry, hard_expiration)
+            self.local.delete(f"rendered:{key}")
+        return self.serializer.encode(entry), hard_expiration
+
+
+class RedisCache(TieredCache):
+    """
+    Redis cache manager for weather data
+    
+    Entries are also written through to an optional per-worker memory tier
+    (in front of Redis) and a per-host disk tier (behind it). While Redis
+    is unreachable the cache serves from those tiers, and a background
+    thread reconnects once Redis answers again.
+    """
+    
+    def __init__(self):
+        """Initialize Redis connection"""
+        super().__init__()
+        self.pool = None
         try:
-            self.client = redis.Redis(
+            # Explicitly sized pool shared by all request and background
+            # threads; callers block briefly when every connection is busy
+            self.pool = redis.BlockingConnectionPool(
                 host=Config.REDIS_HOST,
                 port=Config.REDIS_PORT,
                 password=Config.REDIS_PASSWORD if Config.REDIS_PASSWORD else None,
                 db=Config.REDIS_DB,
-                decode_responses=True,
-                socket_connect_timeout=5
+                socket_connect_timeout=Config.REDIS_CONNECT_TIMEOUT,
+                socket_timeout=Config.REDIS_SOCKET_TIMEOUT,
+                max_connections=Config.REDIS_MAX_CONNECTIONS,
+                timeout=Config.REDIS_POOL_TIMEOUT
             )
+            self.client = redis.Redis(connection_pool=self.pool)
             # Test connection
             self.client.ping()
             logger.info("Redis cache connected successfully")
         except (redis.ConnectionError, redis.TimeoutError) as e:
-            logger.warning(f"Redis connection failed: {e}. Cache will be disabled.")
+            logger.warning(f"Redis connection failed: {e}. Serving from local tiers until it recovers.")
             self.enabled = False
-            self.client = None
+        
+        threading.Thread(target=self._maintain, name='cache-maintenance', daemon=True).start()
+    
+    def _maintain(self):
+        """Reconnect to Redis after an outage and keep the disk tier within its limits"""
+        last_cleanup = time.monotonic()
+        while True:
+            if not self.enabled and self.client is not None:
+                self._reconnect()
+            if self.disk is not None and time.monotonic() - last_cleanup >= Config.DISK_CACHE_CLEANUP_INTERVAL:
+                self.disk.cleanup()
+                last_cleanup = time.monotonic()
+            time.sleep(Config.REDIS_RECONNECT_INTERVAL)
+    
+    def _reconnect(self):
+        """Start using Redis again if it answers"""
+        try:
+            # Connections opened before the outage may be half-closed
+            if self.pool is not None:
+                self.pool.disconnect()
+            self.client.ping()
+        except (redis.ConnectionError, redis.TimeoutError):
+            return False
+        self.enabled = True
+        logger.info("Redis cache reconnected")
+        return True
+    
+    def _get_disk_entries(self, keys, backfill=False):
+        """
+        Read entries from the disk tier and copy them to the memory tier
+        
+        Args:
+            keys (list): Cache keys
+            backfill (bool): Also copy the entries found to Redis, unless
+                a purge of a matching pattern happened after they were
+                stored (see purge)
+            
+        Returns:
+            list: Entry (as returned by get_entry) or None for each key
+        """
+        if self.disk is None or not keys:
+            return [None] * len(keys)
+        
+        found = self.disk.get_many(keys)
+        purges = self._get_purges() if backfill and found else None
+        entries, backfilled = self._decode_disk_entries(keys, found, purges)
+        if backfill and backfilled:
+            try:
+                # NX: never overwrite an entry another worker just stored
+                pipe = self.client.pipeline(transaction=False)
+                for key, (data, ttl) in backfilled.items():
+                    pipe.set(namespaced(key), data, ex=ttl, nx=True)
+                pipe.execute()
+            except Exception as e:
+                logger.error(f"Error copying disk entries to Redis: {e}")
+                self._connection_failed(e)
+        return entries
     
     def get(self, key):
         """
-        Get value from cache
+        Get value from cache, whether fresh or stale
         
         Args:
             key (str): Cache key
@@ -40,40 +509,174 @@ class RedisCache:
         Returns:
             dict or None: Cached data or None if not found
         """
+        entry = self.get_entry(key)
+        return entry['data'] if entry else None
+    
+    def get_entry(self, key):
+        """
+        Get a cache entry along with its freshness
+        
+        Args:
+            key (str): Cache key
+            
+        Returns:
+            dict or None: {'data', 'stored_at', 'expires_at', 'stale'} or None
+                if not found. Stale entries are past their expiration but
+                still within the CACHE_STALE_TTL grace period.
+        """
+        entry, local_entry = self._get_local_entry(key)
+        if entry is not None:
+            return entry
+        
         if not self.enabled or not self.client:
-            return None
+            entry = self._get_disk_entries([key])[0]
+            return entry or (with_staleness(local_entry) if local_entry else None)
         
         try:
-            cached_data = self.client.get(key)
+            # Fetch the remaining TTL in the same round trip so the local
+            # copy never outlives the Redis entry
+            pipe = self.client.pipeline(transaction=False)
+            pipe.get(namespaced(key))
+            pipe.ttl(namespaced(key))
+            cached_data, ttl = pipe.execute()
             if cached_data:
-                logger.info(f"Cache HIT for key: {key}")
-                return json.loads(cached_data)
-            logger.info(f"Cache MISS for key: {key}")
-            return None
+                logger.debug("Cache HIT for key: %s", key)
+                return self._store_local_entry(key, cached_data, ttl)
+            logger.debug("Cache MISS for key: %s", key)
+            CACHE_REQUESTS.inc(tier='redis', result='miss')
+            # Redis may have restarted empty; the disk copy is reused
+            return self._get_disk_entries([key], backfill=True)[0]
         except Exception as e:
             logger.error(f"Error getting from cache: {e}")
-            return None
+            self._connection_failed(e)
+            entry = self._get_disk_entries([key])[0]
+            return entry or (with_staleness(local_entry) if local_entry else None)
+    
+    def get_entries(self, keys):
+        """
+        Get several cache entries in one round trip
+        
+        Args:
+            keys (list): Cache keys
+            
+        Returns:
+            list: Entry (as returned by get_entry) or None for each key
+        """
+        entries = [None] * len(keys)
+        remote = []
+        for i, key in enumerate(keys):
+            local_entry = self.local.get(key) if self.local is not None else None
+            if local_entry is not None:
+                entries[i] = with_staleness(local_entry)
+                # Stale local copies may have been refreshed in Redis
+                if not entries[i]['stale']:
+                    CACHE_REQUESTS.inc(tier='local', result='hit')
+                    continue
+            if self.local is not None:
+                CACHE_REQUESTS.inc(tier='local', result='miss')
+            remote.append(i)
+        
+        if not remote:
+            return entries
+        if not self.enabled or not self.client:
+            self._fill_from_disk(keys, entries, remote)
+            return entries
+        
+        try:
+            remote_keys = [keys[i] for i in remote]
+            pipe = self.client.pipeline(transaction=False)
+            pipe.mget([namespaced(key) for key in remote_keys])
+            for key in remote_keys:
+                pipe.ttl(namespaced(key))
+            values, *ttls = pipe.execute()
+            missing = []
+            for i, key, cached_data, ttl in zip(remote, remote_keys, values, ttls):
+                if not cached_data:
+                    CACHE_REQUESTS.inc(tier='redis', result='miss')
+                    missing.append(i)
+                    continue
+                entries[i] = self._store_local_entry(key, cached_data, ttl)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Batch cache lookup: %d/%d hits", sum(e is not None for e in entries), len(keys))
+            self._fill_from_disk(keys, entries, missing, backfill=True)
+        except Exception as e:
+            logger.error(f"Error getting batch from cache: {e}")
+            self._connection_failed(e)
+            self._fill_from_disk(keys, entries, remote)
+        return entries
+    
+    def _fill_from_disk(self, keys, entries, indexes, backfill=False):
+        """Replace entries at the given indexes with disk copies, where found"""
+        disk_entries = self._get_disk_entries([keys[i] for i in indexes], backfill)
+        for i, entry in zip(indexes, disk_entries):
+            if entry is not None:
+                entries[i] = entry
     
     def set(self, key, value, expiration=None):
         """
         Set value in cache with expiration
         
+        The entry stays fresh for `expiration` seconds and is kept for a
+        further CACHE_STALE_TTL seconds so it can be served stale while
+        being refreshed.
+        
         Args:
             key (str): Cache key
             value (dict): Data to cache
             expiration (int): Expiration time in seconds
         """
+        serialized_value, hard_expiration = self._build_entry(key, value, expiration)
+        if self.disk is not None:
+            self.disk.set(key, serialized_value, hard_expiration)
+        
         if not self.enabled or not self.client:
             return False
         
         try:
-            expiration = expiration or Config.CACHE_EXPIRATION
-            serialized_value = json.dumps(value)
-            self.client.setex(key, expiration, serialized_value)
-            logger.info(f"Cached data for key: {key} with expiration: {expiration}s")
+            # Responses rendered from the previous value are now outdated
+            pipe = self.client.pipeline(transaction=False)
+            pipe.setex(namespaced(key), hard_expiration, serialized_value)
+            pipe.delete(namespaced(f"rendered:{key}"))
+            pipe.execute()
+            logger.debug("Cached data for key: %s with expiration: %ss", key, hard_expiration)
             return True
         except Exception as e:
             logger.error(f"Error setting cache: {e}")
+            self._connection_failed(e)
+            return False
+    
+    def set_many(self, items):
+        """
+        Set several values in one round trip
+        
+        Unlike set, no pre-rendered responses are invalidated, so this is
+        meant for keys that are never rendered (such as per-day entries).
+        
+        Args:
+            items (dict): Cache key -> (value, expiration in seconds)
+        """
+        encoded = {}
+        for key, (value, expiration) in items.items():
+            entry, hard_expiration = build_entry(value, expiration)
+            if self.local is not None:
+                self.local.set(key, entry, hard_expiration)
+            encoded[key] = (self.serializer.encode(entry), hard_expiration)
+        if self.disk is not None:
+            self.disk.set_many(encoded)
+        
+        if not self.enabled or not self.client or not encoded:
+            return False
+        
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, (serialized_value, hard_expiration) in encoded.items():
+                pipe.setex(namespaced(key), hard_expiration, serialized_value)
+            pipe.execute()
+            logger.debug("Cached %d keys", len(encoded))
+            return True
+        except Exception as e:
+            logger.error(f"Error setting cache: {e}")
+            self._connection_failed(e)
             return False
     
     def delete(self, key):
@@ -83,34 +686,584 @@ class RedisCache:
         Args:
             key (str): Cache key to delete
         """
+        if self.local is not None:
+            self.local.delete(key)
+            self.local.delete(f"rendered:{key}")
+        if self.disk is not None:
+            self.disk.delete(key)
+        
         if not self.enabled or not self.client:
             return False
         
         try:
-            self.client.delete(key)
-            logger.info(f"Deleted cache key: {key}")
+            self.client.delete(namespaced(key), namespaced(f"rendered:{key}"))
+            logger.debug("Deleted cache key: %s", key)
             return True
         except Exception as e:
             logger.error(f"Error deleting from cache: {e}")
             return False
     
+    def get_rendered(self, key, variant, include_body=True):
+        """
+        Get a pre-serialized response body rendered from a cache entry
+        
+        Rendered bodies live in a hash `rendered:{key}` holding, per variant,
+        the body and its content hash (`{variant}:etag`). The hash is dropped
+        whenever the entry itself is rewritten.
+        
+        Args:
+            key (str): Cache key of the entry the body was rendered from
+            variant (str): Rendering variant, e.g. "metric:simple"
+            include_body (bool): Load the body, not just its ETag
+            
+        Returns:
+            dict or None: {'body', 'etag', 'expires_at'} or None if missing or
+                rendered from an expired entry (which may be mid-refresh)
+        """
+        rendered_key = f"rendered:{key}"
+        rendered = self._get_local_rendered(rendered_key, variant)
+        if rendered is not None:
+            return rendered
+        
+        if not self.enabled or not self.client:
+            return None
+        
+        try:
+            fields = ['expires_at', f"{variant}:etag"]
+            if include_body:
+                fields.append(variant)
+            values = self.client.hmget(namespaced(rendered_key), *fields)
+            if any(value is None for value in values):
+                return None
+            expires_at = float(values[0])
+            if expires_at <= time.time():
+                return None
+            rendered = {'etag': values[1].decode('utf-8'), 'expires_at': expires_at}
+            if include_body:
+                rendered['body'] = values[2]
+                self._set_local_rendered(rendered_key, variant, values[2], rendered['etag'], expires_at)
+            return rendered
+        except Exception as e:
+            logger.error(f"Error getting rendered response: {e}")
+            self._connection_failed(e)
+            return None
+    
+    def set_rendered(self, key, variant, body, etag, expires_at):
+        """
+        Store a pre-serialized response body rendered from a cache entry
+        
+        Args:
+            key (str): Cache key of the entry the body was rendered from
+            variant (str): Rendering variant, e.g. "metric:simple"
+            body (bytes): Serialized body
+            etag (str): Content hash of the body
+            expires_at (float): Expiry time of the source entry
+        """
+        rendered_key = f"rendered:{key}"
+        self._set_local_rendered(rendered_key, variant, body, etag, expires_at)
+        
+        if not self.enabled or not self.client:
+            return False
+        
+        try:
+            ttl = max(1, int(expires_at + Config.CACHE_STALE_TTL - time.time()))
+            pipe = self.client.pipeline(transaction=False)
+            pipe.hset(namespaced(rendered_key), mapping={
+                'expires_at': expires_at,
+                variant: body,
+                f"{variant}:etag": etag
+            })
+            pipe.expire(namespaced(rendered_key), ttl)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Error setting rendered response: {e}")
+            self._connection_failed(e)
+            return False
+    
+    def get_alias(self, alias):
+        """
+        Get the canonical location name stored for an alias
+        
+        Args:
+            alias (str): Normalized location spelling
+            
+        Returns:
+            str or None: Canonical name or None if the alias is unknown
+        """
+        return self.get_aliases([alias])[0]
+    
+    def get_aliases(self, aliases):
+        """
+        Get the canonical names for several aliases in one round trip
+        
+        Args:
+            aliases (list): Normalized location spellings
+            
+        Returns:
+            list: Canonical name or None for each alias
+        """
+        canonicals = [None] * len(aliases)
+        if aliases and self.enabled and self.client:
+            try:
+                canonicals = self.client.mget([namespaced(f"alias:{alias}") for alias in aliases])
+            except Exception as e:
+                logger.error(f"Error getting aliases: {e}")
+                self._connection_failed(e)
+        
+        # Aliases Redis does not have (e.g. while it is down) come from disk
+        missing = [f"alias:{alias}" for alias, c in zip(aliases, canonicals) if c is None]
+        if missing and self.disk is not None:
+            found = self.disk.get_many(missing)
+            canonicals = [c if c is not None else found.get(f"alias:{alias}") for alias, c in zip(aliases, canonicals)]
+        return [c.decode('utf-8') if c is not None else None for c in canonicals]
+    
+    def set_alias(self, alias, canonical):
+        """
+        Store the canonical location name for an alias
+        
+        Args:
+            alias (str): Normalized location spelling
+            canonical (str): Canonical location name
+        """
+        if self.disk is not None:
+            self.disk.set(f"alias:{alias}", canonical.encode('utf-8'), Config.ALIAS_EXPIRATION)
+        
+        if not self.enabled or not self.client:
+            return False
+        
+        try:
+            self.client.setex(namespaced(f"alias:{alias}"), Config.ALIAS_EXPIRATION, canonical)
+            return True
+        except Exception as e:
+            logger.error(f"Error setting alias: {e}")
+            self._connection_failed(e)
+            return False
+    
+    def is_negative(self, name):
+        """
+        Check whether a location is stored as known-invalid
+        
+        Args:
+            name (str): Normalized location, qualified by fetch profile
+            
+        Returns:
+            bool: True if the upstream recently rejected the location
+        """
+        if not self.enabled or not self.client:
+            return False
+        
+        try:
+            return bool(self.client.exists(namespaced(f"neg:{name}")))
+        except Exception as e:
+            logger.error(f"Error checking negative cache: {e}")
+            return False
+    
+    def set_negative(self, name):
+        """Store a location as known-invalid for NEGATIVE_CACHE_TTL seconds"""
+        if not self.enabled or not self.client:
+            return False
+        
+        try:
+            self.client.setex(namespaced(f"neg:{name}"), Config.NEGATIVE_CACHE_TTL, b'1')
+            return True
+        except Exception as e:
+            logger.error(f"Error setting negative cache: {e}")
+            return False
+    
+    def add_point(self, profile, canonical, latitude, longitude):
+        """
+        Index a cached location by position for nearby lookups
+        
+        Points live in one GEO set per fetch profile; the set expires when
+        no entry has been stored for a full entry lifetime.
+        """
+        if not self.enabled or not self.client:
+            return False
+        
+        key = namespaced(f"geo:{profile or 'full'}")
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.geoadd(key, (longitude, latitude, canonical))
+            pipe.expire(key, Config.CACHE_EXPIRATION + Config.CACHE_STALE_TTL)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Error indexing location position: {e}")
+            return False
+    
+    def find_nearby(self, profile, latitude, longitude, radius, count=5):
+        """
+        Get indexed locations within a radius, nearest first
+        
+        Args:
+            profile (str): Fetch profile whose index is searched
+            latitude (float): Latitude of the search center
+            longitude (float): Longitude of the search center
+            radius (float): Search radius in metres
+            count (int): Max locations returned
+            
+        Returns:
+            list: Canonical location names
+        """
+        if not self.enabled or not self.client:
+            return []
+        
+        try:
+            members = self.client.geosearch(
+                namespaced(f"geo:{profile or 'full'}"),
+                longitude=longitude,
+                latitude=latitude,
+                radius=radius,
+                unit='m',
+                sort='ASC',
+                count=count
+            )
+            return [member.decode('utf-8') for member in members]
+        except Exception as e:
+            logger.error(f"Error searching nearby locations: {e}")
+            return []
+    
+    def remove_point(self, profile, canonical):
+        """Drop a location from the position index"""
+        if not self.enabled or not self.client:
+            return False
+        
+        try:
+            self.client.zrem(namespaced(f"geo:{profile or 'full'}"), canonical)
+            return True
+        except Exception as e:
+            logger.error(f"Error removing location position: {e}")
+            return False
+    
+    def incr_popularity(self, counts):
+        """
+        Add request counts to the popularity sorted set
+        
+        Args:
+            counts (dict): Request count per canonical location
+        """
+        if not counts or not self.enabled or not self.client:
+            return False
+        
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for location, count in counts.items():
+                pipe.zincrby(namespaced("popularity"), count, location)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Error updating popularity: {e}")
+            return False
+    
+    def decay_popularity(self, factor):
+        """
+        Scale all popularity scores so old traffic fades out
+        
+        Args:
+            factor (float): Multiplier applied to every score
+        """
+        if not self.enabled or not self.client:
+            return False
+        
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.zunionstore(namespaced("popularity"), {namespaced("popularity"): factor})
+            pipe.zremrangebyscore(namespaced("popularity"), 0, 0.5)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Error decaying popularity: {e}")
+            return False
+    
+    def get_popular(self, count):
+        """
+        Get the most requested locations
+        
+        Args:
+            count (int): Number of locations to return
+            
+        Returns:
+            list: Canonical locations, most popular first
+        """
+        if not self.enabled or not self.client:
+            return []
+        
+        try:
+            return [m.decode('utf-8') for m in self.client.zrevrange(namespaced("popularity"), 0, count - 1)]
+        except Exception as e:
+            logger.error(f"Error getting popular locations: {e}")
+            return []
+    
+    def acquire_lock(self, key, timeout):
+        """
+        Acquire a short-lived lease on a cache key
+        
+        Args:
+            key (str): Cache key to lock
+            timeout (int): Lease duration in seconds
+            
+        Returns:
+            str or None: Lease token, or None if another holder owns the lease.
+                If Redis errors, a token is returned so the caller can proceed.
+        """
+        token = uuid.uuid4().hex
+        if not self.enabled or not self.client:
+            return token
+        
+        try:
+            if self.client.set(namespaced(f"lock:{key}"), token, nx=True, ex=timeout):
+                return token
+            return None
+        except Exception as e:
+            logger.error(f"Error acquiring lock: {e}")
+            return token
+    
+    def is_locked(self, key):
+        """Check whether a lease from acquire_lock is still held"""
+        if not self.enabled or not self.client:
+            return False
+        
+        try:
+            return bool(self.client.exists(namespaced(f"lock:{key}")))
+        except Exception as e:
+            logger.error(f"Error checking lock: {e}")
+            self._connection_failed(e)
+            return False
+    
+    def release_lock(self, key, token):
+        """
+        Release a lease previously returned by acquire_lock
+        
+        Args:
+            key (str): Cache key that was locked
+            token (str): Token returned by acquire_lock
+        """
+        if not self.enabled or not self.client:
+            return False
+        
+        try:
+            return bool(self.client.eval(RELEASE_LOCK_SCRIPT, 1, namespaced(f"lock:{key}"), token))
+        except Exception as e:
+            logger.error(f"Error releasing lock: {e}")
+            return False
+    
+    def run_script(self, script, keys, args):
+        """
+        Run a Lua script atomically
+        
+        Args:
+            script (str): Lua source
+            keys (list): Redis keys the script touches
+            args (list): Script arguments
+            
+        Returns:
+            The script's result, or None if Redis is unavailable
+        """
+        if not self.enabled or not self.client:
+            return None
+        
+        try:
+            return self.client.eval(script, len(keys), *[namespaced(key) for key in keys], *args)
+        except Exception as e:
+            logger.error(f"Error running script: {e}")
+            return None
+    
     def clear_all(self):
-        """Clear all keys from the current database"""
+        """Delete every key in the cache namespace (see purge)"""
+        if self.local is not None:
+            self.local.clear()
+        self.purge_disk('*')
+        return self.purge('*') is not None
+    
+    def purge_disk(self, pattern):
+        """
+        Delete keys matching a pattern from this host's disk tier
+        
+        Returns:
+            int: Number of keys deleted
+        """
+        if self.disk is None:
+            return 0
+        return self.disk.purge(pattern) or 0
+    
+    def purge(self, pattern, on_progress=None):
+        """
+        Delete keys matching a pattern from Redis with incremental SCAN and UNLINK
+        
+        Unlike FLUSHDB this never blocks Redis for long, and keys outside
+        CACHE_NAMESPACE (such as rate limiter counters) are left alone.
+        Memory is reclaimed by Redis in the background. The purge time is
+        recorded per pattern (see purge_time), so disk copies of matching
+        keys stored before it are no longer copied back into Redis and
+        other hosts' disk tiers cannot undo the purge. The memory and disk
+        tiers are purged separately (see purge_disk).
+        
+        Args:
+            pattern (str): Glob pattern of logical keys, e.g. "weather:lon*"
+            on_progress (callable): Called with (matched, deleted) after
+                each batch
+            
+        Returns:
+            int or None: Number of keys deleted, or None if Redis is
+                unavailable or failed
+        """
+        if not self.enabled or not self.client:
+            return None
+        
+        matched = deleted = 0
+        cursor = 0
+        try:
+            self._record_purge(pattern)
+            while True:
+                cursor, keys = self.client.scan(
+                    cursor, match=namespaced(pattern), count=Config.PURGE_BATCH_SIZE
+                )
+                matched += len(keys)
+                if keys:
+                    deleted += self.client.unlink(*keys)
+                if on_progress is not None:
+                    on_progress(matched, deleted)
+                if cursor == 0:
+                    break
+            self._record_purge(pattern)
+            logger.info(f"Purged {deleted} keys matching {pattern}")
+            return deleted
+        except Exception as e:
+            logger.error(f"Error purging {pattern}: {e}")
+            self._connection_failed(e)
+            return None
+    
+    def _record_purge(self, pattern):
+        """Store the time of a purge of pattern, dropping records older than any disk entry"""
+        if pattern.startswith(MEMORY_ONLY_PREFIXES):
+            return
+        now = time.time()
+        lifetime = max(Config.CACHE_EXPIRATION, Config.DAY_CACHE_PAST_TTL) + Config.CACHE_STALE_TTL
+        purges = self.client.hgetall(namespaced("purges"))
+        pipe = self.client.pipeline(transaction=False)
+        expired = [field for field, purged_at in purges.items() if float(purged_at) < now - lifetime]
+        if expired:
+            pipe.hdel(namespaced("purges"), *expired)
+        pipe.hset(namespaced("purges"), pattern, now)
+        pipe.expire(namespaced("purges"), lifetime)
+        pipe.execute()
+    
+    def _get_purges(self):
+        """
+        Get purge times by pattern (see purge)
+        
+        Returns:
+            dict or None: Pattern -> time, or None if Redis failed
+        """
+        try:
+            return {
+                field.decode('utf-8'): float(purged_at)
+                for field, purged_at in self.client.hgetall(namespaced("purges")).items()
+            }
+        except Exception as e:
+            logger.error(f"Error getting purge times: {e}")
+            self._connection_failed(e)
+            return None
+    
+    def purge_variants(self, pattern, unit_group, on_progress=None):
+        """
+        Drop one unit group's bodies from pre-rendered response hashes
+        
+        Args:
+            pattern (str): Glob pattern of rendered hash keys, e.g.
+                "rendered:weather:*"
+            unit_group (str): Unit group whose variants are removed
+            on_progress (callable): Called with (matched, deleted) after
+                each batch
+            
+        Returns:
+            int or None: Number of hash fields deleted, or None if Redis is
+                unavailable or failed
+        """
+        if not self.enabled or not self.client:
+            return None
+        
+        prefix = f"{unit_group}:".encode('utf-8')
+        matched = deleted = 0
+        cursor = 0
+        try:
+            while True:
+                cursor, keys = self.client.scan(
+                    cursor, match=namespaced(pattern), count=Config.PURGE_BATCH_SIZE
+                )
+                matched += len(keys)
+                if keys:
+                    pipe = self.client.pipeline(transaction=False)
+                    for key in keys:
+                        pipe.hkeys(key)
+                    fields = pipe.execute()
+                    pipe = self.client.pipeline(transaction=False)
+                    for key, key_fields in zip(keys, fields):
+                        variants = [field for field in key_fields if field.startswith(prefix)]
+                        if variants:
+                            pipe.hdel(key, *variants)
+                    deleted += sum(pipe.execute())
+                if on_progress is not None:
+                    on_progress(matched, deleted)
+                if cursor == 0:
+                    break
+            if self.local is not None:
+                self.local.clear()
+            logger.info(f"Purged {deleted} {unit_group} variants from {pattern}")
+            return deleted
+        except Exception as e:
+            logger.error(f"Error purging {unit_group} variants from {pattern}: {e}")
+            return None
+    
+    def get_job(self, job_id):
+        """Get the status of a background job stored by set_job"""
+        if not self.enabled or not self.client:
+            return None
+        
+        try:
+            status = self.client.get(namespaced(f"job:{job_id}"))
+            return json.loads(status) if status is not None else None
+        except Exception as e:
+            logger.error(f"Error getting job status: {e}")
+            return None
+    
+    def set_job(self, job_id, status, expiration=86400):
+        """Store the status of a background job so any worker can report it"""
         if not self.enabled or not self.client:
             return False
         
         try:
-            self.client.flushdb()
-            logger.info("Cleared all cache")
+            self.client.setex(namespaced(f"job:{job_id}"), expiration, json.dumps(status))
             return True
         except Exception as e:
-            logger.error(f"Error clearing cache: {e}")
+            logger.error(f"Error setting job status: {e}")
             return False
     
+    def get_pool_stats(self):
+        """Get Redis connection pool utilization"""
+        if self.pool is None:
+            return {"enabled": False}
+        
+        try:
+            created = len(self.pool._connections)
+            idle = sum(1 for connection in list(self.pool.pool.queue) if connection is not None)
+            return {
+                "max_connections": self.pool.max_connections,
+                "created": created,
+                "in_use": created - idle,
+                "idle": idle
+            }
+        except Exception as e:
+            logger.error(f"Error getting pool stats: {e}")
+            return {"max_connections": self.pool.max_connections, "error": str(e)}
+    
     def get_stats(self):
         """Get cache statistics"""
+        local_stats = self.local.get_stats() if self.local is not None else {"enabled": False}
+        disk_stats = self.disk.get_stats() if self.disk is not None else {"enabled": False}
         if not self.enabled or not self.client:
-            return {"enabled": False}
+            return {"enabled": False, "local": local_stats, "disk": disk_stats}
         
         try:
             info = self.client.info('stats')
@@ -118,8 +1271,12 @@ class RedisCache:
                 "enabled": True,
                 "total_keys": self.client.dbsize(),
                 "hits": info.get('keyspace_hits', 0),
-                "misses": info.get('keyspace_misses', 0)
+                "misses": info.get('keyspace_misses', 0),
+                "serializer": self.serializer.name,
+                "local": local_stats,
+                "disk": disk_stats,
+                "pool": self.get_pool_stats()
             }
         except Exception as e:
             logger.error(f"Error getting cache stats: {e}")
-            return {"enabled": True, "error": str(e)}
+            return {"enabled": True, "error": str(e), "local": local_stats, "disk": disk_stats}
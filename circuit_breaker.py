@@ -0,0 +1,236 @@
+import math
+import time
+import logging
+from email.utils import parsedate_to_datetime
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+# Decide whether a call may go upstream. Once the open period has passed
+# the circuit is half-open: one caller at a time gets a probe lease.
+# KEYS[1] = circuit hash, ARGV = now, probe lease seconds
+ALLOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local state = redis.call('HMGET', KEYS[1], 'open_until', 'probe_until')
+local open_until = tonumber(state[1]) or 0
+if now < open_until then
+    return {'open', tostring(open_until - now)}
+end
+if open_until > 0 then
+    local probe_until = tonumber(state[2]) or 0
+    if now < probe_until then
+        return {'half_open', tostring(probe_until - now)}
+    end
+    redis.call('HSET', KEYS[1], 'probe_until', tostring(now + tonumber(ARGV[2])))
+    return {'probe', '0'}
+end
+return {'closed', '0'}
+"""
+
+# Record the outcome of an upstream call and trip or reset the circuit.
+# KEYS[1] = circuit hash, ARGV = now, outcome, window, min requests,
+# failure rate, open seconds, max open seconds, retry-after seconds
+RECORD_SCRIPT = """
+local now = tonumber(ARGV[1])
+local outcome = ARGV[2]
+local window = tonumber(ARGV[3])
+local max_open = tonumber(ARGV[7])
+local retry_after = tonumber(ARGV[8])
+local state = redis.call('HMGET', KEYS[1], 'open_until', 'window_start', 'requests', 'failures', 'trips')
+local open_until = tonumber(state[1]) or 0
+local window_start = tonumber(state[2]) or 0
+local requests = tonumber(state[3]) or 0
+local failures = tonumber(state[4]) or 0
+local trips = tonumber(state[5]) or 0
+
+if now - window_start >= window then
+    window_start, requests, failures = now, 0, 0
+end
+requests = requests + 1
+if outcome ~= 'success' then
+    failures = failures + 1
+end
+
+local result = 'closed'
+if now < open_until then
+    -- A call admitted before the circuit opened
+    result = 'open'
+elseif open_until > 0 and outcome == 'success' then
+    redis.call('HDEL', KEYS[1], 'open_until', 'probe_until', 'trips')
+    window_start, requests, failures = now, 0, 0
+    result = 'reset'
+elseif outcome == 'throttled' or (outcome == 'failure' and (open_until > 0 or
+        (requests >= tonumber(ARGV[4]) and failures / requests >= tonumber(ARGV[5])))) then
+    trips = trips + 1
+    local duration = math.min(tonumber(ARGV[6]) * 2 ^ (trips - 1), max_open)
+    duration = math.max(duration, retry_after)
+    redis.call('HSET', KEYS[1], 'open_until', tostring(now + duration), 'probe_until', '0', 'trips', trips)
+    window_start, requests, failures = now, 0, 0
+    result = 'tripped'
+end
+
+redis.call('HSET', KEYS[1], 'window_start', tostring(window_start), 'requests', requests, 'failures', failures)
+redis.call('EXPIRE', KEYS[1], math.ceil(max_open * 2 + window + retry_after))
+return result
+"""
+
+STATE_SCRIPT = "return redis.call('HGETALL', KEYS[1])"
+
+
+def classify_status(status_code):
+    """
+    Classify an upstream HTTP status for the circuit breaker
+    
+    Returns:
+        str: 'throttled' for 429, 'failure' for 5xx, else 'success'
+    """
+    if status_code == 429:
+        return 'throttled'
+    if status_code >= 500:
+        return 'failure'
+    return 'success'
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header given in seconds or as an HTTP date
+    
+    Returns:
+        float: Seconds to wait (0 if missing or malformed)
+    """
+    if not value:
+        return 0
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return 0
+
+
+class CircuitBreaker:
+    """
+    Fail fast while the upstream API is unhealthy
+    
+    State lives in a Redis hash (`circuit:{name}`) shared by all workers.
+    Outcomes are counted over a rolling CIRCUIT_WINDOW; once at least
+    CIRCUIT_MIN_REQUESTS calls have been made and CIRCUIT_FAILURE_RATE of
+    them failed (5xx, timeouts, connection errors) the circuit opens.
+    A 429 opens it immediately for at least the upstream's Retry-After.
+    Each consecutive trip doubles the open period, from CIRCUIT_OPEN_SECONDS
+    up to CIRCUIT_MAX_OPEN_SECONDS. After that one probe call is let
+    through; success closes the circuit and failure opens it again.
+    
+    Without Redis every call is allowed.
+    """
+    
+    def __init__(self, cache, name='upstream'):
+        """
+        Args:
+            cache (RedisCache): Cache used to share circuit state
+            name (str): Circuit name, part of the Redis key
+        """
+        self.cache = cache
+        self.key = f"circuit:{name}"
+        self.probe_timeout = math.ceil(Config.HTTP_CONNECT_TIMEOUT + Config.HTTP_READ_TIMEOUT)
+        # Open period learned from Redis, so rejections need no round trip
+        self._open_until = 0
+        self.rejected = 0
+        self.probes = 0
+    
+    def allow(self):
+        """
+        Check whether an upstream call may be made now
+        
+        Returns:
+            tuple: (allowed, retry_after) where retry_after is the number of
+                seconds until the next attempt may be allowed
+        """
+        now = time.time()
+        if now < self._open_until:
+            self.rejected += 1
+            return False, math.ceil(self._open_until - now)
+        result = self.cache.run_script(ALLOW_SCRIPT, [self.key], [now, self.probe_timeout])
+        return self._admit(result, now)
+    
+    def record(self, outcome, retry_after=0):
+        """
+        Record the outcome of an upstream call
+        
+        Args:
+            outcome (str): 'success', 'failure' or 'throttled'
+            retry_after (float): Upstream Retry-After in seconds, if any
+        """
+        result = self.cache.run_script(
+            RECORD_SCRIPT, [self.key], self._record_args(outcome, retry_after)
+        )
+        self._on_recorded(result, outcome)
+    
+    def get_stats(self):
+        """Get circuit state and counters"""
+        return self._format_stats(self.cache.run_script(STATE_SCRIPT, [self.key], []))
+    
+    def _admit(self, result, now):
+        if result is None:
+            return True, 0
+        state, wait = (value.decode('utf-8') for value in result)
+        if state == 'probe':
+            self.probes += 1
+            logger.info(f"Circuit {self.key} half-open, sending probe request")
+        if state in ('closed', 'probe'):
+            return True, 0
+        
+        wait = float(wait)
+        if state == 'open':
+            self._open_until = now + wait
+        self.rejected += 1
+        return False, max(1, math.ceil(wait))
+    
+    def _record_args(self, outcome, retry_after):
+        return [
+            time.time(),
+            outcome,
+            Config.CIRCUIT_WINDOW,
+            Config.CIRCUIT_MIN_REQUESTS,
+            Config.CIRCUIT_FAILURE_RATE,
+            Config.CIRCUIT_OPEN_SECONDS,
+            Config.CIRCUIT_MAX_OPEN_SECONDS,
+            math.ceil(retry_after)
+        ]
+    
+    def _on_recorded(self, result, outcome):
+        if result == b'tripped':
+            self._open_until = 0
+            logger.warning(f"Circuit {self.key} opened after upstream {outcome}")
+        elif result == b'reset':
+            logger.info(f"Circuit {self.key} closed after successful probe")
+    
+    def _format_stats(self, fields):
+        if fields is None:
+            return {"enabled": False, "rejected": self.rejected}
+        
+        state = {
+            fields[i].decode('utf-8'): float(fields[i + 1])
+            for i in range(0, len(fields), 2)
+        }
+        now = time.time()
+        open_until = state.get('open_until', 0)
+        if now < open_until:
+            status = 'open'
+        elif open_until:
+            status = 'half_open'
+        else:
+            status = 'closed'
+        return {
+            "enabled": True,
+            "state": status,
+            "open_for": max(0, round(open_until - now, 1)),
+            "trips": int(state.get('trips', 0)),
+            "window_requests": int(state.get('requests', 0)),
+            "window_failures": int(state.get('failures', 0)),
+            "rejected": self.rejected,
+            "probes": self.probes
+        }
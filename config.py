@@ -1,5 +1,6 @@
 import os
 from dotenv import load_dotenv
+from limits import parse
 
 # Load environment variables from .env file
 load_dotenv()
@@ -12,15 +13,133 @@ class Config:
     WEATHER_API_KEY = os.getenv('WEATHER_API_KEY', '')
     WEATHER_API_ENDPOINT = 'https://weather.visualcrossing.com/VisualCrossingWebServices/rest/services/timeline/'
     
+    # Upstream HTTP connection pool (timeouts in seconds)
+    HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', 4))
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 20))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 3.05))
+    HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 10))
+    
+    # Upstream circuit breaker, shared by all workers through Redis
+    # Opens when CIRCUIT_FAILURE_RATE of at least CIRCUIT_MIN_REQUESTS calls
+    # in CIRCUIT_WINDOW seconds fail; the open period doubles per trip
+    CIRCUIT_ENABLED = os.getenv('CIRCUIT_ENABLED', 'True').lower() == 'true'
+    CIRCUIT_WINDOW = int(os.getenv('CIRCUIT_WINDOW', 30))
+    CIRCUIT_MIN_REQUESTS = int(os.getenv('CIRCUIT_MIN_REQUESTS', 10))
+    CIRCUIT_FAILURE_RATE = float(os.getenv('CIRCUIT_FAILURE_RATE', 0.5))
+    CIRCUIT_OPEN_SECONDS = int(os.getenv('CIRCUIT_OPEN_SECONDS', 5))
+    CIRCUIT_MAX_OPEN_SECONDS = int(os.getenv('CIRCUIT_MAX_OPEN_SECONDS', 300))
+    
     # Redis Configuration
     REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
     REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
     REDIS_PASSWORD = os.getenv('REDIS_PASSWORD', '')
     REDIS_DB = int(os.getenv('REDIS_DB', 0))
+    REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 50))
+    REDIS_POOL_TIMEOUT = float(os.getenv('REDIS_POOL_TIMEOUT', 5))
+    REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', 5))
+    REDIS_CONNECT_TIMEOUT = float(os.getenv('REDIS_CONNECT_TIMEOUT', 5))
+    # Seconds between reconnection attempts while Redis is unreachable
+    REDIS_RECONNECT_INTERVAL = float(os.getenv('REDIS_RECONNECT_INTERVAL', 5))
     
     # Cache Configuration (in seconds)
     # Default: 12 hours = 43200 seconds
     CACHE_EXPIRATION = int(os.getenv('CACHE_EXPIRATION', 43200))
+    # Grace period after expiration during which an entry is served stale
+    # while it is refreshed in the background (0 disables stale serving)
+    CACHE_STALE_TTL = int(os.getenv('CACHE_STALE_TTL', 43200))
+    
+    # Prefix for every key the app stores in Redis
+    CACHE_NAMESPACE = os.getenv('CACHE_NAMESPACE', 'weather-api')
+    # Keys scanned per SCAN call when purging
+    PURGE_BATCH_SIZE = int(os.getenv('PURGE_BATCH_SIZE', 500))
+    
+    # Encoding for cached values: json, msgpack (zlib) or msgpack-zstd
+    # Entries in any format stay readable after switching
+    CACHE_SERIALIZER = os.getenv('CACHE_SERIALIZER', 'msgpack')
+    CACHE_COMPRESSION_LEVEL = int(os.getenv('CACHE_COMPRESSION_LEVEL', 3))
+    
+    # Per-worker in-memory cache tier in front of Redis
+    # TTL is capped at CACHE_EXPIRATION
+    LOCAL_CACHE_ENABLED = os.getenv('LOCAL_CACHE_ENABLED', 'True').lower() == 'true'
+    LOCAL_CACHE_SIZE = int(os.getenv('LOCAL_CACHE_SIZE', 1000))
+    LOCAL_CACHE_TTL = int(os.getenv('LOCAL_CACHE_TTL', 60))
+    
+    # Per-host SQLite tier behind Redis, shared by the workers on a host and
+    # used while Redis is down or after it restarts empty. Expired entries
+    # are removed, then the entries closest to expiry evicted to keep values
+    # under DISK_CACHE_MAX_MB, every DISK_CACHE_CLEANUP_INTERVAL seconds
+    DISK_CACHE_ENABLED = os.getenv('DISK_CACHE_ENABLED', 'True').lower() == 'true'
+    DISK_CACHE_PATH = os.getenv('DISK_CACHE_PATH', 'weather_cache.db')
+    DISK_CACHE_MAX_MB = int(os.getenv('DISK_CACHE_MAX_MB', 256))
+    DISK_CACHE_CLEANUP_INTERVAL = int(os.getenv('DISK_CACHE_CLEANUP_INTERVAL', 60))
+    
+    # Location alias index (spelling -> canonical resolved address)
+    # Default: 30 days = 2592000 seconds
+    ALIAS_EXPIRATION = int(os.getenv('ALIAS_EXPIRATION', 2592000))
+    ALIAS_LOCAL_SIZE = int(os.getenv('ALIAS_LOCAL_SIZE', 10000))
+    
+    # Coordinate ("lat,lon") locations: snapped to a grid of GEO_GRID_DEGREES
+    # (0 disables), and a miss reuses a fresh entry cached within
+    # GEO_RADIUS_METERS (0 disables)
+    GEO_GRID_DEGREES = float(os.getenv('GEO_GRID_DEGREES', 0.005))
+    GEO_RADIUS_METERS = float(os.getenv('GEO_RADIUS_METERS', 1000))
+    
+    # Negative cache for locations the upstream rejected (in seconds)
+    # Each worker also keeps two Bloom filter generations of
+    # NEGATIVE_FILTER_BITS bits, rotated every NEGATIVE_CACHE_TTL
+    NEGATIVE_CACHE_ENABLED = os.getenv('NEGATIVE_CACHE_ENABLED', 'True').lower() == 'true'
+    NEGATIVE_CACHE_TTL = int(os.getenv('NEGATIVE_CACHE_TTL', 300))
+    NEGATIVE_FILTER_BITS = int(os.getenv('NEGATIVE_FILTER_BITS', 1048576))
+    
+    # Single-flight coalescing of upstream fetches (in seconds)
+    # Lease should outlive the upstream connect + read timeouts. Waiters
+    # stop earlier when the fetch finishes or its lease goes away, so
+    # FETCH_WAIT_TIMEOUT should not be shorter than the lease either
+    FETCH_LOCK_TIMEOUT = int(os.getenv('FETCH_LOCK_TIMEOUT', 15))
+    FETCH_WAIT_TIMEOUT = float(os.getenv('FETCH_WAIT_TIMEOUT', FETCH_LOCK_TIMEOUT))
+    FETCH_POLL_INTERVAL = float(os.getenv('FETCH_POLL_INTERVAL', 0.05))
+    
+    # Background refresh threads per worker
+    REFRESH_WORKERS = int(os.getenv('REFRESH_WORKERS', 4))
+    
+    # Popularity-driven refresh of hot locations (in seconds)
+    # At most REFRESH_BUDGET upstream calls per REFRESH_INTERVAL
+    REFRESH_ENABLED = os.getenv('REFRESH_ENABLED', 'True').lower() == 'true'
+    REFRESH_INTERVAL = int(os.getenv('REFRESH_INTERVAL', 60))
+    REFRESH_TOP_N = int(os.getenv('REFRESH_TOP_N', 100))
+    REFRESH_AHEAD = int(os.getenv('REFRESH_AHEAD', 600))
+    REFRESH_BUDGET = int(os.getenv('REFRESH_BUDGET', 20))
+    POPULARITY_DECAY = float(os.getenv('POPULARITY_DECAY', 0.9))
+    
+    # Cache warm-up after a restart or failover. The most requested
+    # locations are written to WARMUP_SNAPSHOT_PATH every
+    # WARMUP_SNAPSHOT_INTERVAL seconds (0 disables) and, with
+    # WARMUP_SEED_LOCATIONS (separated by ';'), fetched again on startup
+    # or POST /cache/warm: at most WARMUP_CONCURRENCY at a time and
+    # WARMUP_RATE per second
+    WARMUP_ON_STARTUP = os.getenv('WARMUP_ON_STARTUP', 'True').lower() == 'true'
+    WARMUP_SNAPSHOT_PATH = os.getenv('WARMUP_SNAPSHOT_PATH', 'hot_locations.json')
+    WARMUP_SNAPSHOT_INTERVAL = int(os.getenv('WARMUP_SNAPSHOT_INTERVAL', 300))
+    WARMUP_SNAPSHOT_SIZE = int(os.getenv('WARMUP_SNAPSHOT_SIZE', 200))
+    WARMUP_SEED_LOCATIONS = os.getenv('WARMUP_SEED_LOCATIONS', '')
+    WARMUP_CONCURRENCY = int(os.getenv('WARMUP_CONCURRENCY', 4))
+    WARMUP_RATE = float(os.getenv('WARMUP_RATE', 5))
+    
+    # Date range endpoint: each day is cached separately (in seconds)
+    # Days before yesterday (UTC) no longer change and are kept for
+    # DAY_CACHE_PAST_TTL; recent and forecast days for DAY_CACHE_FUTURE_TTL
+    RANGE_MAX_DAYS = int(os.getenv('RANGE_MAX_DAYS', 366))
+    DAY_CACHE_PAST_TTL = int(os.getenv('DAY_CACHE_PAST_TTL', 31536000))
+    DAY_CACHE_FUTURE_TTL = int(os.getenv('DAY_CACHE_FUTURE_TTL', 3600))
+    
+    # Batch endpoint; BATCH_RATE_LIMIT counts locations, not requests, and
+    # must allow at least one batch of BATCH_MAX_LOCATIONS
+    BATCH_MAX_LOCATIONS = int(os.getenv('BATCH_MAX_LOCATIONS', 250))
+    BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', 8))
+    BATCH_RATE_LIMIT = os.getenv('BATCH_RATE_LIMIT', '2500 per hour')
+    
+    # Async serving mode (asgi.py): max concurrent upstream connections per worker
+    ASYNC_MAX_CONNECTIONS = int(os.getenv('ASYNC_MAX_CONNECTIONS', 100))
     
     # Flask Configuration
     FLASK_ENV = os.getenv('FLASK_ENV', 'development')
@@ -30,9 +149,23 @@ class Config:
     # Rate Limiting
     RATE_LIMIT = os.getenv('RATE_LIMIT', '100 per hour')
     
+    # Logging; records are written by a background thread from a bounded
+    # queue of LOG_QUEUE_SIZE records (extra records are dropped)
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+    # One line per request; cache hits are logged at ACCESS_LOG_SAMPLE_RATE
+    # (0-1), misses, stale hits and errors always
+    ACCESS_LOG_ENABLED = os.getenv('ACCESS_LOG_ENABLED', 'True').lower() == 'true'
+    ACCESS_LOG_SAMPLE_RATE = float(os.getenv('ACCESS_LOG_SAMPLE_RATE', 0.1))
+    
     @staticmethod
     def validate():
         """Validate required configuration"""
         if not Config.WEATHER_API_KEY:
             raise ValueError("WEATHER_API_KEY is required. Please set it in your .env file")
+        if parse(Config.BATCH_RATE_LIMIT).amount < Config.BATCH_MAX_LOCATIONS:
+            raise ValueError(
+                f"BATCH_RATE_LIMIT ({Config.BATCH_RATE_LIMIT}) must allow at least "
+                f"BATCH_MAX_LOCATIONS ({Config.BATCH_MAX_LOCATIONS}) locations"
+            )
         return True
@@ -0,0 +1,211 @@
+import os
+import sqlite3
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    value BLOB NOT NULL
+);
+-- Covers eviction and size queries without reading the values
+CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at, size);
+"""
+
+
+class DiskCache:
+    """
+    SQLite cache on local disk, used as a tier behind Redis
+    
+    Values are stored as already-encoded bytes under their logical cache
+    keys, with the same hard expiry as in Redis, so they outlive a Redis
+    outage or restart and a worker restart. The file is shared by every
+    worker on the host (WAL mode lets readers run alongside one writer);
+    each thread uses its own connection.
+    
+    Errors never propagate: a failing disk tier behaves like an empty one.
+    """
+    
+    def __init__(self, path, max_bytes):
+        """
+        Args:
+            path (str): SQLite database file
+            max_bytes (int): Total size of stored values above which the
+                entries closest to expiry are evicted (see cleanup)
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Fail early on an unusable path; the tier is disabled if it raises.
+        # Incremental vacuum (set before the tables exist) lets cleanup
+        # return freed pages to the filesystem
+        connection = self._connect()
+        connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        connection.executescript(SCHEMA)
+    
+    def _connect(self):
+        """Get this thread's connection"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # Writers wait at most a second for the lock before giving up
+            connection = sqlite3.connect(self.path, timeout=1)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+    
+    def get(self, key):
+        """Return the unexpired value for key, or None"""
+        try:
+            row = self._connect().execute(
+                "SELECT value FROM entries WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading disk cache: {e}")
+            return None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+    
+    def get_many(self, keys):
+        """
+        Get several unexpired values in one query
+        
+        Returns:
+            dict: Key -> value for the keys that were found
+        """
+        if not keys:
+            return {}
+        try:
+            rows = self._connect().execute(
+                f"SELECT key, value FROM entries WHERE key IN ({','.join('?' * len(keys))}) AND expires_at > ?",
+                (*keys, time.time())
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading disk cache: {e}")
+            return {}
+        self.hits += len(rows)
+        self.misses += len(keys) - len(rows)
+        return dict(rows)
+    
+    def set(self, key, value, ttl):
+        """Store encoded bytes for ttl seconds"""
+        return self.set_many({key: (value, ttl)})
+    
+    def set_many(self, items):
+        """
+        Store several values in one transaction
+        
+        Args:
+            items (dict): Key -> (encoded bytes, ttl in seconds)
+        """
+        if not items:
+            return False
+        now = time.time()
+        try:
+            with self._connect() as connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO entries (key, expires_at, size, value) VALUES (?, ?, ?, ?)",
+                    [(key, now + ttl, len(value), value) for key, (value, ttl) in items.items()]
+                )
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Error writing disk cache: {e}")
+            return False
+    
+    def delete(self, *keys):
+        """Remove keys if present"""
+        try:
+            with self._connect() as connection:
+                connection.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in keys])
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Error deleting from disk cache: {e}")
+            return False
+    
+    def purge(self, pattern):
+        """
+        Remove keys matching a glob pattern (same syntax as Redis SCAN)
+        
+        Returns:
+            int or None: Number of keys removed, or None on error
+        """
+        try:
+            with self._connect() as connection:
+                return connection.execute("DELETE FROM entries WHERE key GLOB ?", (pattern,)).rowcount
+        except sqlite3.Error as e:
+            logger.error(f"Error purging disk cache: {e}")
+            return None
+    
+    def cleanup(self):
+        """
+        Drop expired entries, then evict the entries closest to expiry
+        until the stored values fit in max_bytes
+        
+        Returns:
+            int: Number of entries removed
+        """
+        try:
+            with self._connect() as connection:
+                removed = connection.execute(
+                    "DELETE FROM entries WHERE expires_at <= ?", (time.time(),)
+                ).rowcount
+                total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                if total > self.max_bytes:
+                    # Walk entries by expiry until enough bytes are covered
+                    excess = total - self.max_bytes
+                    cutoff = None
+                    for expires_at, size in connection.execute(
+                        "SELECT expires_at, size FROM entries ORDER BY expires_at"
+                    ):
+                        excess -= size
+                        cutoff = expires_at
+                        if excess <= 0:
+                            break
+                    evicted = connection.execute(
+                        "DELETE FROM entries WHERE expires_at <= ?", (cutoff,)
+                    ).rowcount
+                    self.evictions += evicted
+                    removed += evicted
+            if removed:
+                self._connect().execute("PRAGMA incremental_vacuum")
+                logger.info(f"Removed {removed} entries from the disk cache")
+            return removed
+        except sqlite3.Error as e:
+            logger.error(f"Error cleaning up disk cache: {e}")
+            return 0
+    
+    def clear(self):
+        """Remove all entries"""
+        return self.purge('*') is not None
+    
+    def get_stats(self):
+        """Get disk tier statistics"""
+        stats = {
+            "enabled": True,
+            "path": self.path,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+        try:
+            count, size = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            stats.update(size=count, bytes=size, file_bytes=os.path.getsize(self.path))
+        except (sqlite3.Error, OSError) as e:
+            stats["error"] = str(e)
+        return stats
@@ -11,6 +11,8 @@ class WeatherClient:
     
     def __init__(self, base_url="http://localhost:5000"):
         self.base_url = base_url
+        # (url, unit, format) -> (etag, response body) for conditional requests
+        self._etag_cache = {}
     
     def get_weather(self, location, unit='metric', format='simple'):
         """
@@ -27,10 +29,50 @@ class WeatherClient:
         try:
             url = f"{self.base_url}/weather/{location}"
             params = {'unit': unit, 'format': format}
-            response = requests.get(url, params=params)
+            cache_key = (url, unit, format)
             
+            # Revalidate a previous response instead of re-downloading it
+            headers = {}
+            cached = self._etag_cache.get(cache_key)
+            if cached:
+                headers['If-None-Match'] = cached[0]
+            
+            response = requests.get(url, params=params, headers=headers)
+            
+            if response.status_code == 304 and cached:
+                return cached[1]
             if response.status_code == 200:
-                return response.json()
+                data = response.json()
+                if response.headers.get('ETag'):
+                    self._etag_cache[cache_key] = (response.headers['ETag'], data)
+                return data
+            else:
+                print(f"Error: {response.status_code}")
+                print(response.json())
+                return None
+        except Exception as e:
+            print(f"Error: {e}")
+            return None
+    
+    def get_weather_batch(self, locations, unit='metric', format='simple'):
+        """
+        Get weather data for several locations in one request
+        
+        Args:
+            locations (list): Location names
+            unit (str): Unit system - 'metric', 'us', or 'uk'
+            format (str): Response format - 'simple' or 'full'
+            
+        Returns:
+            list: Per-location results or None if error
+        """
+        try:
+            url = f"{self.base_url}/weather/batch"
+            payload = {'locations': locations, 'unit': unit, 'format': format}
+            response = requests.post(url, json=payload)
+            
+            if response.status_code == 200:
+                return response.json()['results']
             else:
                 print(f"Error: {response.status_code}")
                 print(response.json())
@@ -161,12 +203,14 @@ def example_batch():
     ]
     
     print("European Cities Weather:")
-    for city in cities:
-        weather = client.get_weather(city)
-        if weather:
-            current = weather['data']['current']
-            print(f"\n{weather['data']['location']}:")
-            print(f"  {current['temperature']}°C - {current['conditions']}")
+    results = client.get_weather_batch(cities) or []
+    for weather in results:
+        if 'error' in weather:
+            print(f"\n{weather['location']}: {weather['error']}")
+            continue
+        current = weather['data']['current']
+        print(f"\n{weather['data']['location']}:")
+        print(f"  {current['temperature']}°C - {current['conditions']}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,30 @@
+"""
+Gunicorn settings for the threaded Flask app
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Every setting can be overridden with the usual GUNICORN_CMD_ARGS or
+command line flags.
+"""
+import multiprocessing
+import os
+import threading
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# Requests mostly wait on Redis and the upstream API, so each worker
+# serves several at once
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+keepalive = 5
+
+# Import the app once in the master; workers fork from it without
+# re-importing. Nothing is connected before the fork (see app.init_services)
+preload_app = True
+
+
+def post_worker_init(worker):
+    """Create the worker's services in the background so its first request rarely waits"""
+    from app import init_services
+    threading.Thread(target=init_services, name='init-services', daemon=True).start()
@@ -0,0 +1,180 @@
+import re
+import time
+import uuid
+import logging
+import threading
+from config import Config
+from locations import normalize_location
+
+logger = logging.getLogger(__name__)
+
+
+class CachePurger:
+    """
+    Invalidates cache entries in background threads
+    
+    A purge drops the purging worker's in-memory tier and matching keys
+    in its host's disk tier at once, then scans the Redis namespace
+    incrementally and unlinks matching keys (or, for a unit group, only
+    that unit's pre-rendered bodies). While Redis is unavailable the job
+    waits for it to come back before purging Redis, so entries purged on
+    this host are not served from Redis afterwards. Progress is stored in
+    Redis under `job:{id}` so any worker can report it, and kept by the
+    purging worker so it can be reported during an outage. Other workers'
+    in-memory copies expire within LOCAL_CACHE_TTL; other hosts' disk
+    copies are no longer copied back into Redis (see RedisCache.purge).
+    Purges that can match negative entries also clear the purging
+    worker's negative cache filter; other workers' filters may keep
+    answering 400 for those locations for up to twice NEGATIVE_CACHE_TTL.
+    """
+    
+    def __init__(self, cache, location_index, negative_cache=None):
+        """
+        Args:
+            cache (RedisCache): Cache to purge
+            location_index (LocationIndex): Resolves location prefixes to
+                the canonical names entries are stored under
+            negative_cache (NegativeCache): Negative cache whose filter is
+                cleared with negative entries, or None if disabled
+        """
+        self.cache = cache
+        self.location_index = location_index
+        self.negative_cache = negative_cache
+        self._jobs = {}
+        self._lock = threading.Lock()
+    
+    def targets(self, pattern=None, location=None, unit_group=None):
+        """
+        Work out what to purge for a request
+        
+        Args:
+            pattern (str): Glob pattern of logical keys, e.g. "weather:lon*"
+            location (str): Location prefix, e.g. "london" for every
+                canonical name starting with the name "London" resolves to
+            unit_group (str): Only drop responses rendered for this unit group
+        
+        Returns:
+            list: (kind, pattern, unit_group) tuples where kind is 'keys'
+                or 'variants'
+        """
+        if pattern:
+            return [('keys', pattern, None)]
+        
+        # Entries live under canonical names; negative entries under the
+        # spelling the upstream rejected
+        spelling = normalize_location(location) if location else ''
+        prefix = self.location_index.resolve(location) if spelling else ''
+        if unit_group:
+            # Raw payloads are unit-independent; only rendered bodies differ
+            return [('variants', f"rendered:weather:{prefix}*", unit_group)]
+        if prefix:
+            return [
+                ('keys', f"weather:{prefix}*", None),
+                ('keys', f"rendered:weather:{prefix}*", None),
+                ('keys', f"day:{prefix}*", None),
+                ('keys', f"neg:{spelling}*", None)
+            ]
+        return [('keys', '*', None)]
+    
+    def start(self, targets):
+        """
+        Start a background purge
+        
+        Args:
+            targets (list): Tuples from targets()
+        
+        Returns:
+            dict: Initial job status; 'waiting' while Redis is unavailable
+        """
+        job = {
+            'id': uuid.uuid4().hex,
+            'state': 'running' if self.cache.enabled else 'waiting',
+            'targets': [
+                {'kind': kind, 'pattern': pattern, 'unit_group': unit_group}
+                for kind, pattern, unit_group in targets
+            ],
+            'matched': 0,
+            'deleted': 0,
+            'disk_deleted': 0,
+            'started_at': time.time(),
+            'finished_at': None
+        }
+        self._save(job)
+        threading.Thread(
+            target=self._run,
+            args=(job, targets),
+            name=f"purge-{job['id'][:8]}",
+            daemon=True
+        ).start()
+        return job
+    
+    def get(self, job_id):
+        """Get the status of a purge started by any worker"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                # Also known while Redis is unavailable
+                return dict(job)
+        return self.cache.get_job(job_id)
+    
+    def _save(self, job):
+        """Store a job's status in Redis and in this worker"""
+        with self._lock:
+            self._jobs[job['id']] = job
+            # Only the latest purges are kept; older ones are in Redis
+            while len(self._jobs) > 100:
+                del self._jobs[next(iter(self._jobs))]
+        self.cache.set_job(job['id'], job)
+    
+    def _clear_local(self, targets):
+        """Drop this worker's in-memory copies of what targets cover"""
+        if self.cache.local is not None:
+            self.cache.local.clear()
+        if self.negative_cache is not None and any(
+            kind == 'keys' and matches_negative(pattern) for kind, pattern, _ in targets
+        ):
+            self.negative_cache.clear()
+    
+    def _run(self, job, targets):
+        self._clear_local(targets)
+        for kind, pattern, unit_group in targets:
+            if kind == 'keys':
+                job['disk_deleted'] += self.cache.purge_disk(pattern)
+        
+        while not self.cache.enabled:
+            time.sleep(Config.REDIS_RECONNECT_INTERVAL)
+        job['state'] = 'running'
+        self._save(job)
+        
+        done_matched = done_deleted = 0
+        
+        def progress(matched, deleted):
+            job['matched'] = done_matched + matched
+            job['deleted'] = done_deleted + deleted
+            self._save(job)
+        
+        try:
+            for kind, pattern, unit_group in targets:
+                if kind == 'variants':
+                    deleted = self.cache.purge_variants(pattern, unit_group, progress)
+                else:
+                    deleted = self.cache.purge(pattern, progress)
+                if deleted is None:
+                    raise RuntimeError(f"Purge of {pattern} failed")
+                done_matched, done_deleted = job['matched'], job['deleted']
+            # Copies read from Redis before it was purged
+            self._clear_local(targets)
+            job['state'] = 'done'
+        except Exception as e:
+            logger.error(f"Cache purge {job['id']} failed: {e}")
+            job['state'] = 'failed'
+            job['error'] = str(e)
+        job['finished_at'] = time.time()
+        self._save(job)
+        logger.info(f"Cache purge {job['id']} {job['state']}: {job['deleted']} deleted")
+
+
+def matches_negative(pattern):
+    """Check whether a glob pattern of logical keys can match negative entries (`neg:*`)"""
+    literal = re.split(r'[*?\[]', pattern, maxsplit=1)[0]
+    return literal.startswith('neg:') or 'neg:'.startswith(literal)
@@ -0,0 +1,233 @@
+import re
+import unicodedata
+import logging
+from config import Config
+from cache import LocalCache
+
+logger = logging.getLogger(__name__)
+
+# "lat,lon" in decimal degrees, as sent by devices
+COORDINATES = re.compile(r'^\s*([-+]?\d{1,2}(?:\.\d+)?)\s*,\s*([-+]?\d{1,3}(?:\.\d+)?)\s*$')
+
+
+def parse_coordinates(location):
+    """
+    Parse a "lat,lon" location
+    
+    Args:
+        location (str): Location as given by the client or the upstream API
+        
+    Returns:
+        tuple or None: (latitude, longitude), or None if the location is
+            not a valid coordinate pair
+    """
+    match = COORDINATES.match(location)
+    if not match:
+        return None
+    latitude, longitude = float(match.group(1)), float(match.group(2))
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return latitude, longitude
+
+
+def snap_coordinates(latitude, longitude):
+    """
+    Snap a coordinate pair to the GEO_GRID_DEGREES grid
+    
+    Returns:
+        str: "lat,lon" of the grid point, e.g. "51.505,-0.125"
+    """
+    grid = Config.GEO_GRID_DEGREES
+    if grid > 0:
+        latitude = round(latitude / grid) * grid
+        longitude = round(longitude / grid) * grid
+    # Adding 0.0 turns -0.0 into 0.0
+    return ','.join(
+        f"{value + 0.0:.6f}".rstrip('0').rstrip('.') for value in (latitude, longitude)
+    )
+
+
+def normalize_location(location):
+    """
+    Normalize a location string for use in cache keys
+    
+    Lowercases, collapses whitespace and tidies punctuation so that e.g.
+    "London ,  UK" and "london,uk" produce the same key. Coordinate pairs
+    are snapped to the GEO_GRID_DEGREES grid, so nearby points share a key.
+    
+    Args:
+        location (str): Location as given by the client or the upstream API
+        
+    Returns:
+        str: Normalized location
+    """
+    text = unicodedata.normalize('NFKC', location).lower()
+    # Treat semicolons and pipes as list separators, drop other stray symbols
+    text = re.sub(r'[;|]', ',', text)
+    text = re.sub(r'[^\w\s,.\-]', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*,\s*', ',', text)
+    text = re.sub(r',+', ',', text)
+    text = text.strip(' ,.')
+    
+    coordinates = parse_coordinates(text)
+    if coordinates is not None:
+        return snap_coordinates(*coordinates)
+    return text
+
+
+def upstream_location(location):
+    """
+    Get the location to request upstream
+    
+    Coordinates are requested at their grid point so the payload matches
+    every request that shares its cache key; names are passed through.
+    """
+    coordinates = parse_coordinates(location)
+    if coordinates is None:
+        return location
+    return snap_coordinates(*coordinates)
+
+
+def refresh_query(canonical, payload=None):
+    """
+    Get the location to request upstream when refreshing a cached location
+    
+    Canonical names are normalized (lowercased, punctuation dropped), so
+    the upstream may not resolve them to the same place. The address the
+    upstream resolved the original request to is used instead, or the
+    coordinates it returned; the canonical name only when the payload has
+    neither (e.g. the entry is gone).
+    
+    Args:
+        canonical (str): Canonical location name
+        payload (dict): Cached upstream payload for the location, or None
+        
+    Returns:
+        str: Location to request upstream
+    """
+    if payload:
+        if payload.get('resolvedAddress'):
+            return payload['resolvedAddress']
+        if 'latitude' in payload and 'longitude' in payload:
+            return f"{payload['latitude']},{payload['longitude']}"
+    return upstream_location(canonical)
+
+
+def qualify_location(canonical, profile=None):
+    """
+    Name a canonical location fetched with a given upstream profile
+    
+    Normalized names never contain '|', so it separates the two parts.
+    
+    Args:
+        canonical (str): Canonical location name
+        profile (str): Fetch profile (see WeatherService.fetch_profile)
+        
+    Returns:
+        str: Name used in cache keys and by the refresh scheduler
+    """
+    return f"{canonical}|{profile}" if profile else canonical
+
+
+def split_location(name):
+    """
+    Split a name built by qualify_location
+    
+    Returns:
+        tuple: (canonical, profile or None)
+    """
+    canonical, _, profile = name.partition('|')
+    return canonical, profile or None
+
+
+class LocationIndex:
+    """
+    Maps spellings of a location to one canonical name
+    
+    The canonical name is the normalized `resolvedAddress` returned by the
+    upstream API, so "London", "london,uk" and "London, England, United
+    Kingdom" all share a cache entry once each spelling has been seen.
+    Aliases are stored in Redis and memoized per worker, including
+    spellings that are already canonical (as alias -> alias), so repeat
+    lookups never reach Redis.
+    """
+    
+    def __init__(self, cache):
+        self.cache = cache
+        self.local = LocalCache(Config.ALIAS_LOCAL_SIZE, Config.LOCAL_CACHE_TTL)
+    
+    def resolve(self, location):
+        """
+        Get the canonical name for a location
+        
+        Args:
+            location (str): Location as given by the client
+            
+        Returns:
+            str: Canonical name if the spelling is known, else its normalized form
+        """
+        alias = normalize_location(location)
+        canonical = self.local.get(alias)
+        if canonical is not None:
+            return canonical
+        
+        canonical = self.cache.get_alias(alias)
+        if canonical is None:
+            # A miss while Redis is down says nothing about the spelling
+            if self.cache.enabled:
+                self.local.set(alias, alias)
+            return alias
+        self.local.set(alias, canonical)
+        return canonical
+    
+    def resolve_many(self, locations):
+        """
+        Get canonical names for several locations with one Redis lookup
+        
+        Args:
+            locations (list): Locations as given by the client
+            
+        Returns:
+            list: Canonical name (or normalized form) for each location
+        """
+        aliases = [normalize_location(location) for location in locations]
+        canonicals = [self.local.get(alias) for alias in aliases]
+        unknown = [i for i, canonical in enumerate(canonicals) if canonical is None]
+        
+        stored = self.cache.get_aliases([aliases[i] for i in unknown])
+        memoize_misses = self.cache.enabled
+        for i, canonical in zip(unknown, stored):
+            if canonical is None:
+                canonicals[i] = aliases[i]
+                if memoize_misses:
+                    self.local.set(aliases[i], aliases[i])
+            else:
+                canonicals[i] = canonical
+                self.local.set(aliases[i], canonical)
+        return canonicals
+    
+    def learn(self, location, resolved_address):
+        """
+        Record that a spelling resolves to the upstream's resolved address
+        
+        Args:
+            location (str): Location as given by the client
+            resolved_address (str): `resolvedAddress` from the upstream payload
+            
+        Returns:
+            str: Canonical name to cache the payload under
+        """
+        alias = normalize_location(location)
+        if not resolved_address:
+            return alias
+        
+        canonical = normalize_location(resolved_address)
+        if not canonical:
+            return alias
+        if canonical != alias:
+            self.cache.set_alias(alias, canonical)
+            self.local.set(alias, canonical)
+            logger.debug("Learned alias: %s -> %s", alias, canonical)
+        self.local.set(canonical, canonical)
+        return canonical
@@ -0,0 +1,200 @@
+"""
+In-process metrics exposed in the Prometheus text format at /metrics
+
+Metrics are kept per worker process; scrape every worker (or aggregate in
+Prometheus) to see the whole deployment.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from sub-millisecond cache hits to timeouts
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0
+)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class _Metric:
+    type_name = None
+    
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        if not self.labelnames and self.type_name != 'histogram':
+            self._values[()] = 0
+        (registry if registry is not None else REGISTRY).register(self)
+    
+    def _key(self, labels):
+        return tuple(labels[name] for name in self.labelnames)
+    
+    def render(self):
+        """Render the metric in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}"
+        ]
+        with self._lock:
+            items = [(key, self._snapshot(value)) for key, value in sorted(self._values.items())]
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+    
+    def _snapshot(self, value):
+        return value
+    
+    def _render_value(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    type_name = 'counter'
+    
+    def inc(self, amount=1, **labels):
+        """Increase the count for the given label values"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    type_name = 'gauge'
+    
+    def inc(self, amount=1, **labels):
+        """Increase the value for the given label values"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def dec(self, amount=1, **labels):
+        """Decrease the value for the given label values"""
+        self.inc(-amount, **labels)
+    
+    def get(self, **labels):
+        """Get the current value for the given label values"""
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets"""
+    type_name = 'histogram'
+    
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, labelnames, registry)
+    
+    def observe(self, value, **labels):
+        """Record one observation for the given label values"""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (the last is +Inf), sum
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+    
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with-block in seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+    
+    def _snapshot(self, value):
+        return list(value[0]), value[1]
+    
+    def _render_value(self, key, value):
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, ('le', bound))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {total}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together"""
+    
+    def __init__(self):
+        self._metrics = []
+    
+    def register(self, metric):
+        """Add a metric to the registry"""
+        self._metrics.append(metric)
+    
+    def render(self):
+        """
+        Render all metrics in the Prometheus text exposition format
+        
+        Returns:
+            str: Exposition text
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+REQUEST_LATENCY = Histogram(
+    'weather_api_request_duration_seconds',
+    'Request latency by endpoint',
+    ('endpoint',)
+)
+STAGE_LATENCY = Histogram(
+    'weather_api_stage_duration_seconds',
+    'Latency of /weather request stages (limiter, cache_get, upstream, format, serialize)',
+    ('stage',)
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'weather_api_requests_in_flight',
+    'Requests currently being served'
+)
+CACHE_REQUESTS = Counter(
+    'weather_api_cache_requests_total',
+    'Cache lookups by tier (local, redis, disk, rendered, geo) and result (hit, stale, miss)',
+    ('tier', 'result')
+)
+UPSTREAM_RESPONSES = Counter(
+    'weather_api_upstream_responses_total',
+    'Upstream calls by HTTP status or failure (timeout, connection_error, error, circuit_open)',
+    ('status',)
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    'weather_api_upstream_in_flight',
+    'Upstream requests currently in flight'
+)
+LOG_RECORDS_DROPPED = Counter(
+    'weather_api_log_records_dropped_total',
+    'Log records dropped because the log queue was full'
+)
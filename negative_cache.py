@@ -0,0 +1,144 @@
+import time
+import hashlib
+import logging
+import threading
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Bit positions set per item
+BLOOM_HASHES = 4
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings
+    
+    Membership tests may return false positives but never false negatives.
+    With the default 2**20 bits and 4 hashes, 20,000 items give a false
+    positive rate of about 0.003%.
+    """
+    
+    def __init__(self, size_bits):
+        self.size = max(8, size_bits)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, item):
+        # Double hashing: two 64-bit halves of one digest give k positions
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(BLOOM_HASHES)]
+    
+    def add(self, item):
+        """Add an item to the filter"""
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def __contains__(self, item):
+        """Check whether an item may have been added"""
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class NegativeCache:
+    """
+    Remembers locations the upstream API rejected as invalid
+    
+    Rejections are stored in Redis under `neg:{name}` for
+    NEGATIVE_CACHE_TTL seconds and mirrored into a per-worker Bloom filter,
+    so repeated typos and bot probes are answered without a Redis lookup or
+    an upstream call. The filter keeps two generations and rotates every
+    NEGATIVE_CACHE_TTL, so a location is forgotten locally after at most
+    twice the TTL. Callers consult it only for cache misses, so a filter
+    false positive can never hide cached data. A purge of negative entries
+    clears the purging worker's filter (see clear); other workers keep
+    answering from theirs until it rotates out.
+    """
+    
+    def __init__(self, cache):
+        """
+        Args:
+            cache (RedisCache): Cache holding the shared negative entries
+        """
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._current = BloomFilter(Config.NEGATIVE_FILTER_BITS)
+        self._previous = BloomFilter(Config.NEGATIVE_FILTER_BITS)
+        self._rotated_at = time.monotonic()
+        self.filter_hits = 0
+        self.redis_hits = 0
+        self.stored = 0
+    
+    def is_invalid(self, name):
+        """
+        Check whether a location was recently rejected by the upstream API
+        
+        Args:
+            name (str): Normalized location, qualified by fetch profile
+        
+        Returns:
+            bool: True if the location is known to be invalid
+        """
+        if self._in_filter(name):
+            return True
+        if self.cache.is_negative(name):
+            self._on_redis_hit(name)
+            return True
+        return False
+    
+    def add(self, name):
+        """Record that the upstream API rejected a location"""
+        self._remember(name)
+        self.cache.set_negative(name)
+        self.stored += 1
+        logger.info(f"Negative-cached invalid location: {name}")
+    
+    def _in_filter(self, name):
+        self._rotate()
+        if name in self._current or name in self._previous:
+            self.filter_hits += 1
+            return True
+        return False
+    
+    def _on_redis_hit(self, name):
+        self.redis_hits += 1
+        self._remember(name)
+    
+    def _remember(self, name):
+        self._rotate()
+        with self._lock:
+            self._current.add(name)
+    
+    def _rotate(self):
+        if time.monotonic() - self._rotated_at < Config.NEGATIVE_CACHE_TTL:
+            return
+        with self._lock:
+            if time.monotonic() - self._rotated_at >= Config.NEGATIVE_CACHE_TTL:
+                self._previous = self._current
+                self._current = BloomFilter(Config.NEGATIVE_FILTER_BITS)
+                self._rotated_at = time.monotonic()
+    
+    def clear(self):
+        """
+        Forget every location in this worker's filter, e.g. after a purge
+        
+        Bloom filters cannot drop single items, so both generations are
+        replaced; locations still stored in Redis are re-learned on their
+        next lookup.
+        """
+        with self._lock:
+            self._current = BloomFilter(Config.NEGATIVE_FILTER_BITS)
+            self._previous = BloomFilter(Config.NEGATIVE_FILTER_BITS)
+            self._rotated_at = time.monotonic()
+    
+    def get_stats(self):
+        """Get negative cache statistics"""
+        return {
+            "ttl": Config.NEGATIVE_CACHE_TTL,
+            "filter_hits": self.filter_hits,
+            "redis_hits": self.redis_hits,
+            "stored": self.stored,
+            "filter_items": self._current.count + self._previous.count
+        }
@@ -0,0 +1,84 @@
+"""
+Helpers for the date range endpoint, which caches every day separately
+"""
+from datetime import date, datetime, timedelta, timezone
+from werkzeug.exceptions import BadRequest
+from werkzeug.routing import BaseConverter
+from config import Config
+
+
+class InvalidDate(BadRequest):
+    """A date in the URL that has the YYYY-MM-DD shape but does not exist"""
+    
+    def __init__(self, value):
+        super().__init__(f"Invalid date {value}, expected YYYY-MM-DD")
+        self.value = value
+
+
+class DateConverter(BaseConverter):
+    """
+    URL converter for ISO dates (YYYY-MM-DD) that yields datetime.date
+    
+    Impossible dates such as 2024-02-30 raise InvalidDate (a 400) rather
+    than falling through to a 404.
+    """
+    regex = r'\d{4}-\d{2}-\d{2}'
+    
+    def to_python(self, value):
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise InvalidDate(value)
+    
+    def to_url(self, value):
+        return value.isoformat()
+
+
+def days_between(start, end):
+    """List every date from start to end inclusive"""
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+
+def missing_runs(dates, missing):
+    """
+    Group missing dates into contiguous runs, one upstream call each
+    
+    Args:
+        dates (list): Consecutive dates of the requested range
+        missing (set): Dates not in the cache
+    
+    Returns:
+        list: (start, end) date pairs
+    """
+    runs = []
+    for day in dates:
+        if day not in missing:
+            continue
+        if runs and runs[-1][1] == day - timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return [tuple(run) for run in runs]
+
+
+def day_key(name, day):
+    """Cache key for one day of a qualified location name"""
+    return f"day:{name}:{day.isoformat()}"
+
+
+def meta_key(name):
+    """Cache key for the top-level values (resolvedAddress, timezone...) of a location"""
+    return f"day:{name}:meta"
+
+
+def day_expiration(day):
+    """
+    Seconds a day stays fresh
+    
+    Observations for a day can still be revised until the day has ended
+    in every timezone, so only days before yesterday (UTC) are settled.
+    """
+    today = datetime.now(timezone.utc).date()
+    if day < today - timedelta(days=1):
+        return Config.DAY_CACHE_PAST_TTL
+    return Config.DAY_CACHE_FUTURE_TTL
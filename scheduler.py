@@ -0,0 +1,117 @@
+import threading
+import time
+import logging
+from collections import Counter
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshScheduler:
+    """
+    Proactively refresh the most requested locations before they expire
+    
+    Each worker counts requests per location name (the canonical location
+    qualified by its fetch profile, see locations.qualify_location) and
+    flushes the counts to a Redis sorted set once per interval. One worker
+    at a time (holding a lease) picks the top locations whose entries are
+    about to expire and refreshes them, spreading the upstream calls evenly
+    over the interval and never exceeding REFRESH_BUDGET calls per interval.
+    With REFRESH_ENABLED off the thread still runs, only flushing and
+    decaying the counts.
+    """
+    
+    def __init__(self, cache, refresh):
+        """
+        Args:
+            cache (RedisCache): Cache holding the popularity set and entries
+            refresh (callable): Refreshes one location name, e.g. by
+                scheduling a background fetch
+        """
+        self.cache = cache
+        self.refresh = refresh
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.refreshed = 0
+        self.last_run = None
+    
+    def record(self, location):
+        """Count a request for a location name"""
+        with self._lock:
+            self._counts[location] += 1
+    
+    def start(self):
+        """Start the scheduler thread if it is not already running"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name='refresh-scheduler',
+            daemon=True
+        )
+        self._thread.start()
+        logger.info("Refresh scheduler started")
+    
+    def stop(self):
+        """Stop the scheduler thread"""
+        self._stop.set()
+    
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"Refresh scheduler tick failed: {e}")
+            elapsed = time.monotonic() - started
+            self._stop.wait(max(0, Config.REFRESH_INTERVAL - elapsed))
+    
+    def tick(self):
+        """Flush request counts and refresh hot locations that are due"""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        self.cache.incr_popularity(counts)
+        
+        # Only one worker per interval plans refreshes; the lease is left to
+        # expire rather than released so other workers skip this interval
+        if self.cache.acquire_lock('refresh-scheduler', Config.REFRESH_INTERVAL) is None:
+            return
+        
+        self.last_run = time.time()
+        self.cache.decay_popularity(Config.POPULARITY_DECAY)
+        if not Config.REFRESH_ENABLED:
+            return
+        due = self._due_locations()
+        if not due:
+            return
+        
+        logger.info(f"Refreshing {len(due)} hot locations")
+        pause = Config.REFRESH_INTERVAL / len(due)
+        for location in due:
+            if self.refresh(location):
+                self.refreshed += 1
+            if self._stop.wait(pause):
+                return
+    
+    def _due_locations(self):
+        """Hot locations whose entries expire within REFRESH_AHEAD seconds"""
+        deadline = time.time() + Config.REFRESH_AHEAD
+        due = []
+        for location in self.cache.get_popular(Config.REFRESH_TOP_N):
+            entry = self.cache.get_entry(f"weather:{location}")
+            if entry is None or entry['expires_at'] <= deadline:
+                due.append(location)
+                if len(due) >= Config.REFRESH_BUDGET:
+                    break
+        return due
+    
+    def get_stats(self):
+        """Get scheduler statistics"""
+        return {
+            "enabled": Config.REFRESH_ENABLED and self._thread is not None and self._thread.is_alive(),
+            "refreshed": self.refreshed,
+            "last_run": self.last_run
+        }
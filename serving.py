@@ -0,0 +1,454 @@
+"""
+Request logic shared by the WSGI app (app.py) and the ASGI app (asgi.py)
+
+Flows are generators that yield the I/O they need as call() tuples and
+are sent back each result, so the same steps run against the blocking
+services of app.py (drive them with run) and the asyncio services of
+asgi.py (drive them with run_async). Only the I/O differs between the
+two apps; validation, cache lookups, coalescing, rendering and headers
+are written once here.
+
+A flow returns a reply, (status, body, headers), where body is a dict to
+send as JSON, an already-serialized JSON body (bytes) or None.
+"""
+import hashlib
+import inspect
+import logging
+import time
+from config import Config
+from locations import (
+    normalize_location,
+    parse_coordinates,
+    qualify_location,
+    refresh_query,
+    upstream_location
+)
+from metrics import CACHE_REQUESTS, STAGE_LATENCY
+
+logger = logging.getLogger(__name__)
+
+
+class Services:
+    """One worker's services, as used by the flows"""
+    
+    def __init__(self, cache, weather_service, single_flight, location_index,
+                 negative_cache, refresh_scheduler):
+        """
+        Args:
+            cache: RedisCache or AsyncRedisCache
+            weather_service: WeatherService or AsyncWeatherService
+            single_flight: SingleFlight or AsyncSingleFlight
+            location_index: LocationIndex or AsyncLocationIndex
+            negative_cache: NegativeCache, AsyncNegativeCache or None if disabled
+            refresh_scheduler: Records requests per location name
+        """
+        self.cache = cache
+        self.weather_service = weather_service
+        self.single_flight = single_flight
+        self.location_index = location_index
+        self.negative_cache = negative_cache
+        self.refresh_scheduler = refresh_scheduler
+
+
+class Flow:
+    """
+    A flow handed to a service as a callable, e.g. a single-flight loader
+    
+    The driver turns it into a function running the flow with the same
+    driver, so the service calls it like any other loader.
+    """
+    
+    def __init__(self, function, *args):
+        self.function = function
+        self.args = args
+    
+    def start(self):
+        """Create the flow's generator"""
+        return self.function(*self.args)
+
+
+def call(function, *args):
+    """Describe a service call for the driver to make; yield the result"""
+    return function, args
+
+
+def run(flow):
+    """
+    Drive a flow with blocking services
+    
+    Returns:
+        The flow's return value
+    """
+    value, error = None, None
+    while True:
+        try:
+            function, args = flow.throw(error) if error is not None else flow.send(value)
+        except StopIteration as stop:
+            return stop.value
+        args = [(lambda arg=arg: run(arg.start())) if isinstance(arg, Flow) else arg for arg in args]
+        try:
+            value, error = function(*args), None
+        except Exception as e:
+            value, error = None, e
+
+
+async def run_async(flow):
+    """
+    Drive a flow with asyncio services; calls returning plain values
+    (e.g. the refresh scheduler's record) are not awaited
+    
+    Returns:
+        The flow's return value
+    """
+    value, error = None, None
+    while True:
+        try:
+            function, args = flow.throw(error) if error is not None else flow.send(value)
+        except StopIteration as stop:
+            return stop.value
+        args = [(lambda arg=arg: run_async(arg.start())) if isinstance(arg, Flow) else arg for arg in args]
+        try:
+            value, error = function(*args), None
+            if inspect.isawaitable(value):
+                value = await value
+        except Exception as e:
+            value, error = None, e
+
+
+def serve_weather(services, location, unit_group, response_format, fields, if_none_match, dumps):
+    """
+    Serve a /weather request
+    
+    Args:
+        services (Services): The worker's services
+        location (str): Location as given by the client
+        unit_group (str): Unit system - 'metric', 'us' or 'uk'
+        response_format (str): Response format - 'full' or 'simple'
+        fields (str or None): Comma-separated dotted paths to return
+        if_none_match (ETags): The request's If-None-Match header
+        dumps (callable): The app's JSON encoder
+    
+    Returns:
+        tuple: (status, body, headers)
+    """
+    if not location or location.strip() == '':
+        return 400, {
+            'error': 'Location parameter is required',
+            'example': '/weather/London,UK'
+        }, {}
+    
+    # Validate unit group
+    if unit_group not in ['metric', 'us', 'uk']:
+        return 400, {
+            'error': 'Invalid unit parameter',
+            'valid_values': ['metric', 'us', 'uk']
+        }, {}
+    
+    try:
+        fields = services.weather_service.parse_fields(fields)
+    except ValueError as e:
+        return 400, {
+            'error': 'Invalid fields parameter',
+            'message': str(e),
+            'example': 'current.temperature,forecast.temp_max'
+        }, {}
+    
+    # The raw metric payload is cached once per canonical location and fetch
+    # profile; formats and unit groups are derived from it locally
+    profile = services.weather_service.fetch_profile(response_format, fields)
+    canonical = yield call(services.location_index.resolve, location)
+    cache_key = f"weather:{qualify_location(canonical, profile)}"
+    variant = f"{unit_group}:{response_format}"
+    if fields:
+        variant = f"{variant}:{','.join(fields)}"
+    
+    # Conditional request: compare ETags without loading the payload
+    started = time.perf_counter()
+    if if_none_match:
+        rendered = yield call(services.cache.get_rendered, cache_key, variant, False)
+        if rendered and if_none_match.contains_weak(rendered['etag']):
+            STAGE_LATENCY.observe(time.perf_counter() - started, stage='cache_get')
+            CACHE_REQUESTS.inc(tier='rendered', result='hit')
+            yield from on_cache_hit(services, location, canonical, profile, stale=False)
+            return 304, None, cache_headers(True, False, rendered['etag'], rendered['expires_at'])
+    
+    # Fast path: send the body already rendered from the fresh cached entry
+    rendered = yield call(services.cache.get_rendered, cache_key, variant)
+    CACHE_REQUESTS.inc(tier='rendered', result='hit' if rendered else 'miss')
+    if rendered:
+        STAGE_LATENCY.observe(time.perf_counter() - started, stage='cache_get')
+        yield from on_cache_hit(services, location, canonical, profile, stale=False)
+        return 200, envelope(location, True, False, rendered['body'], dumps), cache_headers(
+            True, False, rendered['etag'], rendered['expires_at']
+        )
+    
+    entry = yield call(services.cache.get_entry, cache_key)
+    STAGE_LATENCY.observe(time.perf_counter() - started, stage='cache_get')
+    result = yield from load_weather(services, location, canonical, profile, entry)
+    
+    # Handle errors
+    if 'error' in result:
+        return error_reply(location, result)
+    
+    with STAGE_LATENCY.time(stage='format'):
+        data = services.weather_service.render_weather(result['data'], unit_group, response_format, fields)
+    with STAGE_LATENCY.time(stage='serialize'):
+        body = dumps(data).encode('utf-8')
+        etag = hashlib.sha1(body).hexdigest()
+    if not result['stale']:
+        # A miss may just have learned the location's canonical name
+        canonical = yield call(services.location_index.resolve, location)
+        yield call(
+            services.cache.set_rendered,
+            f"weather:{qualify_location(canonical, profile)}",
+            variant,
+            body,
+            etag,
+            result['expires_at']
+        )
+    
+    headers = cache_headers(result['cached'], result['stale'], etag, result['expires_at'])
+    if not result['stale'] and if_none_match.contains_weak(etag):
+        return 304, None, headers
+    return 200, envelope(location, result['cached'], result['stale'], body, dumps), headers
+
+
+def envelope(location, cached, stale, data_body, dumps):
+    """
+    Build a /weather response body around a pre-serialized data body
+    
+    The envelope fields are spliced in as bytes so the (possibly large)
+    data is never decoded or re-encoded.
+    """
+    return b''.join([
+        b'{"location":', dumps(location).encode('utf-8'),
+        b',"cached":', b'true' if cached else b'false',
+        b',"stale":', b'true' if stale else b'false',
+        b',"data":', data_body,
+        b'}'
+    ])
+
+
+def cache_headers(cached, stale, etag, expires_at):
+    """
+    Get X-Cache, ETag and Cache-Control for a /weather response
+    
+    The ETag is the content hash of the data body only, so it is weak: the
+    envelope (location spelling, cached, stale) may differ between
+    responses carrying the same data. Cache-Control lets clients and
+    proxies keep the response for the entry's remaining TTL; stale
+    responses must be revalidated.
+    """
+    max_age = 0 if stale else max(0, int(expires_at - time.time()))
+    return {
+        'X-Cache': 'STALE' if stale else 'HIT' if cached else 'MISS',
+        'ETag': f'W/"{etag}"',
+        'Cache-Control': f"public, max-age={max_age}"
+    }
+
+
+def error_reply(location, result):
+    """Turn a service error dict into a reply"""
+    headers = {}
+    if result.get('retry_after'):
+        headers['Retry-After'] = str(result['retry_after'])
+    return result.get('status_code', 500), {
+        'error': result['error'],
+        'location': location
+    }, headers
+
+
+def load_weather(services, location, canonical, profile, entry):
+    """
+    Get the raw payload for a location from its cache entry or upstream
+    
+    Stale entries are served as-is and refreshed in the background; misses
+    are fetched with concurrent requests for the same key coalesced.
+    
+    Args:
+        services (Services): The worker's services
+        location (str): Location as given by the client
+        canonical (str): Canonical name the location resolved to
+        profile (str): Upstream fetch profile, or None for the full payload
+        entry (dict or None): Cache entry for the canonical name and profile
+    
+    Returns:
+        dict: {'success', 'data', 'cached', 'stale', 'expires_at'} or the
+            service's error dict
+    """
+    if not entry:
+        nearby = yield from find_nearby_entry(services, location, profile)
+        if nearby:
+            canonical, entry = nearby
+    
+    cache_key = f"weather:{qualify_location(canonical, profile)}"
+    if entry:
+        yield from on_cache_hit(services, location, canonical, profile, entry['stale'])
+        return {
+            'success': True,
+            'data': entry['data'],
+            'cached': True,
+            'stale': entry['stale'],
+            'expires_at': entry['expires_at']
+        }
+    
+    # Locations the upstream recently rejected are not fetched again
+    error = yield from known_failure(services, location, profile)
+    if error is not None:
+        return error
+    
+    # Fetch from weather API, coalescing concurrent misses for the same key.
+    # The payload may land under a different canonical key once the
+    # upstream resolves the location, so waiters re-resolve before reading
+    result = yield call(
+        services.single_flight.do,
+        cache_key,
+        Flow(fetch_weather, services, location, profile),
+        Flow(get_fresh_data, services, location, profile),
+        Flow(known_failure, services, location, profile)
+    )
+    if 'error' in result:
+        return result
+    
+    # The fetch may have taught us the location's canonical name
+    canonical = yield call(services.location_index.resolve, location)
+    yield call(services.refresh_scheduler.record, qualify_location(canonical, profile))
+    
+    return {
+        'success': True,
+        'data': result['data'],
+        'cached': result.get('cached', False),
+        'stale': False,
+        # Approximately when the entry just stored expires
+        'expires_at': time.time() + Config.CACHE_EXPIRATION
+    }
+
+
+def known_failure(services, location, profile):
+    """
+    Get the error for a location the upstream recently rejected
+    
+    Returns:
+        dict or None: 400 error dict, or None if the location is not
+            known to be invalid
+    """
+    if services.negative_cache is not None and (yield call(
+        services.negative_cache.is_invalid, qualify_location(normalize_location(location), profile)
+    )):
+        return {
+            'error': 'Invalid location or parameters',
+            'status_code': 400
+        }
+    return None
+
+
+def find_nearby_entry(services, location, profile):
+    """
+    Find a fresh cached entry near a coordinate location
+    
+    Entries cached within GEO_RADIUS_METERS are reused for "lat,lon"
+    locations that miss, and the location is aliased to the entry's
+    canonical name so later requests hit it directly.
+    
+    Returns:
+        tuple or None: (canonical, entry), or None if there is none
+    """
+    coordinates = parse_coordinates(location)
+    if coordinates is None or Config.GEO_RADIUS_METERS <= 0:
+        return None
+    
+    latitude, longitude = coordinates
+    nearby = yield call(services.cache.find_nearby, profile, latitude, longitude, Config.GEO_RADIUS_METERS)
+    for canonical in nearby:
+        entry = yield call(services.cache.get_entry, f"weather:{qualify_location(canonical, profile)}")
+        if entry is None:
+            yield call(services.cache.remove_point, profile, canonical)
+        elif not entry['stale']:
+            yield call(services.location_index.learn, location, canonical)
+            CACHE_REQUESTS.inc(tier='geo', result='hit')
+            return canonical, entry
+    CACHE_REQUESTS.inc(tier='geo', result='miss')
+    return None
+
+
+def on_cache_hit(services, location, canonical, profile, stale):
+    """Count a hit for the refresh scheduler and refresh stale entries"""
+    name = qualify_location(canonical, profile)
+    yield call(services.refresh_scheduler.record, name)
+    if stale:
+        # Serve the stale copy now and refresh it off the request path
+        yield call(
+            services.single_flight.do_in_background,
+            f"weather:{name}",
+            Flow(fetch_weather, services, location, profile),
+            Flow(get_fresh_data, services, location, profile)
+        )
+    logger.debug("Returning cached data for: %s", location)
+
+
+def get_fresh_data(services, location, profile=None):
+    """Get the cached payload for a location if it has not expired"""
+    canonical = yield call(services.location_index.resolve, location)
+    entry = yield call(services.cache.get_entry, f"weather:{qualify_location(canonical, profile)}")
+    if entry and not entry['stale']:
+        return entry['data']
+    return None
+
+
+def fetch_weather(services, location, profile=None):
+    """
+    Fetch the raw metric payload from the upstream API and cache it under
+    the location's canonical name and fetch profile
+    
+    Args:
+        services (Services): The worker's services
+        location (str): Location as given by the client
+        profile (str): Upstream fetch profile, or None for the full payload
+    
+    Returns:
+        dict: {'success': True, 'data': ...} or the service's error dict
+    """
+    logger.debug("Fetching fresh data for: %s", location)
+    result = yield call(services.weather_service.get_weather, upstream_location(location), 'metric', profile)
+    if 'error' in result:
+        if result.get('status_code') == 400 and services.negative_cache is not None:
+            yield call(services.negative_cache.add, qualify_location(normalize_location(location), profile))
+        return result
+    
+    canonical = yield call(services.location_index.learn, location, result['data'].get('resolvedAddress'))
+    yield from store_weather(services, canonical, profile, result['data'])
+    return result
+
+
+def refresh_weather(services, canonical, profile=None):
+    """
+    Fetch a cached location again, for the refresh scheduler and warm-ups
+    
+    The upstream is asked for the address it resolved the location to
+    before (see locations.refresh_query), and the payload is stored under
+    the same canonical name.
+    
+    Args:
+        services (Services): The worker's services
+        canonical (str): Canonical location name
+        profile (str): Upstream fetch profile, or None for the full payload
+    
+    Returns:
+        dict: {'success': True, 'data': ...} or the service's error dict
+    """
+    entry = yield call(services.cache.get_entry, f"weather:{qualify_location(canonical, profile)}")
+    query = refresh_query(canonical, entry['data'] if entry else None)
+    logger.debug("Refreshing %s as: %s", canonical, query)
+    result = yield call(services.weather_service.get_weather, query, 'metric', profile)
+    if 'error' in result:
+        return result
+    
+    yield from store_weather(services, canonical, profile, result['data'])
+    return result
+
+
+def store_weather(services, canonical, profile, data):
+    """Cache a payload under a canonical name and fetch profile and index its position"""
+    yield call(services.cache.set, f"weather:{qualify_location(canonical, profile)}", data)
+    if Config.GEO_RADIUS_METERS > 0 and 'latitude' in data and 'longitude' in data:
+        yield call(services.cache.add_point, profile, canonical, data['latitude'], data['longitude'])
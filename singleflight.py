@@ -0,0 +1,185 @@
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def in_flight_error():
+    """
+    Error returned when a fetch another request was waiting on produced no data
+    
+    Fetching again would only repeat the upstream call that just failed or
+    timed out, so the client is asked to retry instead.
+    """
+    return {
+        'error': 'Weather data is being fetched. Please try again shortly.',
+        'status_code': 503,
+        'retry_after': 1
+    }
+
+
+class _Call:
+    """An in-flight fetch that other threads can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent upstream fetches for the same cache key
+
+    Within a process, threads asking for the same key share one call and
+    its result. Across processes (e.g. gunicorn workers), the leader of
+    each process takes a short Redis lease; processes that lose the race
+    poll the cache until the winner has stored the fresh value.
+    
+    Waiters never fetch themselves: they wait until the fetch finishes,
+    its lease is released or expires, or FETCH_WAIT_TIMEOUT passes, and
+    then get the leader's result, the failure it recorded (e.g. an invalid
+    location, see do) or in_flight_error().
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._pending = set()
+        self._executor = ThreadPoolExecutor(
+            max_workers=Config.REFRESH_WORKERS,
+            thread_name_prefix='refresh'
+        )
+
+    def do(self, key, loader, lookup=None, failure=None):
+        """
+        Run loader once per key, sharing its result with concurrent callers
+
+        Args:
+            key (str): Cache key the loader populates
+            loader (callable): Fetches fresh data, stores it in the cache and
+                returns a result dict ({'success': True, 'data': ...} or
+                {'error': ..., 'status_code': ...})
+            lookup (callable): Returns the cached value the loader produces,
+                or None. Defaults to reading key from the cache.
+            failure (callable): Returns the error dict for a failure the
+                loader records in the cache (such as a negative entry), or
+                None. Asked when another worker's fetch stored no value.
+
+        Returns:
+            dict: The loader's result, or {'success': True, 'data': ...,
+                'cached': True} when another worker filled the cache first
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        lookup = lookup or (lambda: self.cache.get(key))
+        
+        if not leader:
+            call.done.wait(Config.FETCH_WAIT_TIMEOUT)
+            if call.result is not None:
+                return call.result
+            logger.warning(f"In-flight fetch of {key} produced no result")
+            return in_flight_error()
+
+        try:
+            call.result = self._load(key, loader, lookup, failure)
+            return call.result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def do_in_background(self, key, loader, lookup=None):
+        """
+        Schedule a non-blocking refresh of key
+        
+        The refresh is skipped if one is already pending in this process,
+        a foreground fetch of the key is in flight, or another worker holds
+        the key's lease.
+        
+        Args:
+            key (str): Cache key the loader populates
+            loader (callable): Fetches fresh data and stores it in the cache
+            lookup (callable): Returns fresh cached data, or None
+            
+        Returns:
+            bool: True if a refresh was scheduled
+        """
+        with self._lock:
+            if key in self._pending or key in self._calls:
+                return False
+            self._pending.add(key)
+        
+        lookup = lookup or (lambda: self.cache.get(key))
+        self._executor.submit(self._refresh, key, loader, lookup)
+        return True
+    
+    def _refresh(self, key, loader, lookup):
+        """Run a background refresh if no other worker is already doing it"""
+        try:
+            token = self.cache.acquire_lock(key, Config.FETCH_LOCK_TIMEOUT)
+            if token is None:
+                return
+            try:
+                if lookup() is None:
+                    loader()
+            finally:
+                self.cache.release_lock(key, token)
+        except Exception as e:
+            logger.error(f"Background refresh of {key} failed: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+    
+    def _load(self, key, loader, lookup, failure=None):
+        """Fetch under a cross-process lease, or wait for the lease holder"""
+        if not self.cache.enabled:
+            return loader()
+
+        token = self.cache.acquire_lock(key, Config.FETCH_LOCK_TIMEOUT)
+        if token is None:
+            cached_data = self._wait_for_value(key, lookup)
+            if cached_data is not None:
+                return {'success': True, 'data': cached_data, 'cached': True}
+            # Without Redis there is no lease to coordinate on
+            if not self.cache.enabled:
+                return loader()
+            # The lease holder's fetch may have failed for good
+            error = failure() if failure is not None else None
+            if error is not None:
+                return error
+            logger.warning(f"Lease holder of {key} stored no value")
+            return in_flight_error()
+
+        try:
+            # Another worker may have filled the cache between our miss and the lease
+            cached_data = lookup()
+            if cached_data is not None:
+                return {'success': True, 'data': cached_data, 'cached': True}
+            return loader()
+        finally:
+            self.cache.release_lock(key, token)
+
+    def _wait_for_value(self, key, lookup):
+        """
+        Poll the cache until the value is populated, the lease holder is
+        done (its lease released or expired) or the wait times out
+        """
+        deadline = time.monotonic() + Config.FETCH_WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(Config.FETCH_POLL_INTERVAL)
+            cached_data = lookup()
+            if cached_data is not None:
+                return cached_data
+            if not self.cache.is_locked(key):
+                # The value may have been stored just before the release
+                return lookup()
+        return None
@@ -0,0 +1,68 @@
+"""
+Shared fixtures for the unit tests
+
+Redis is faked in-process with fakeredis (lupa runs the Lua scripts), the
+same way benchmarks/load_benchmark.py does it, so the tests need no Redis
+server, API key or network access:
+
+    pip install -r requirements-dev.txt
+    python -m pytest -q
+"""
+import os
+import sys
+import tempfile
+
+# App configuration is read when config.py is imported, so set it first
+os.environ['WEATHER_API_KEY'] = 'test'
+os.environ['RATE_LIMIT'] = '100000000 per hour'
+os.environ['BATCH_RATE_LIMIT'] = '100000000 per hour'
+os.environ['REFRESH_ENABLED'] = 'False'
+os.environ['WARMUP_ON_STARTUP'] = 'False'
+os.environ['WARMUP_SNAPSHOT_INTERVAL'] = '0'
+os.environ['DISK_CACHE_PATH'] = os.path.join(tempfile.mkdtemp(), 'weather_cache.db')
+# Make the app's own connection attempt fail fast; the fake client is
+# swapped in by the fixtures
+os.environ['REDIS_HOST'] = '127.0.0.1'
+os.environ['REDIS_PORT'] = '1'
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fakeredis
+import pytest
+
+
+def use_fake_redis(cache):
+    """Point a RedisCache at a fresh in-process fake Redis"""
+    cache.client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+    cache.pool = None
+    cache.enabled = True
+    if cache.local is not None:
+        cache.local.clear()
+    return cache
+
+
+@pytest.fixture
+def cache():
+    """A RedisCache backed by an empty fake Redis"""
+    from cache import RedisCache
+    return use_fake_redis(RedisCache())
+
+
+@pytest.fixture(scope='session')
+def app():
+    """The Flask app with this process's services created"""
+    import app as weather_app
+    flask_app = weather_app.create_app()
+    weather_app.init_services()
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    """A test client for the app, with empty cache tiers"""
+    import app as weather_app
+    use_fake_redis(weather_app.cache)
+    weather_app.cache.purge_disk('*')
+    if weather_app.negative_cache is not None:
+        weather_app.negative_cache.clear()
+    return app.test_client()
@@ -0,0 +1,97 @@
+import pytest
+import app as weather_app
+from config import Config
+
+
+def payload(location):
+    return {
+        'resolvedAddress': f"{location}, Somewhere",
+        'timezone': 'Europe/London',
+        'currentConditions': {'datetime': '12:00:00', 'temp': 18.0, 'conditions': 'Clear'},
+        'days': [{'datetime': '2024-01-01', 'tempmax': 20.0, 'tempmin': 10.0}]
+    }
+
+
+@pytest.fixture
+def upstream(client, monkeypatch):
+    """Answers upstream calls from a dict of location -> error, recording the calls"""
+    calls = []
+    errors = {}
+
+    def get_weather(location, unit_group='metric', profile=None, start=None, end=None):
+        calls.append(location)
+        if location in errors:
+            if isinstance(errors[location], Exception):
+                raise errors[location]
+            return errors[location]
+        return {'success': True, 'data': payload(location)}
+
+    monkeypatch.setattr(weather_app.weather_service, 'get_weather', get_weather)
+    upstream.calls = calls
+    upstream.errors = errors
+    return upstream
+
+
+@pytest.mark.parametrize('kwargs, error', [
+    ({'data': 'not json', 'content_type': 'application/json'}, 'Request body must be a JSON object'),
+    ({'json': ['London']}, 'Request body must be a JSON object'),
+    ({'json': 'London'}, 'Request body must be a JSON object'),
+    ({'json': {}}, 'locations must be a non-empty list of location names'),
+    ({'json': {'locations': []}}, 'locations must be a non-empty list of location names'),
+    ({'json': {'locations': 'London'}}, 'locations must be a non-empty list of location names'),
+    ({'json': {'locations': ['London', ' ']}}, 'locations must be a non-empty list of location names'),
+    ({'json': {'locations': ['London', 7]}}, 'locations must be a non-empty list of location names'),
+    ({'json': {'locations': ['London'], 'unit': 'kelvin'}}, 'Invalid unit parameter'),
+    ({'json': {'locations': ['London'], 'format': 'xml'}}, 'Invalid format parameter'),
+    ({'json': {'locations': ['London'], 'fields': ['current']}}, 'Invalid fields parameter'),
+    ({'json': {'locations': ['London'], 'fields': 'current..temp'}}, 'Invalid fields parameter'),
+])
+def test_batch_rejects_bad_requests(client, upstream, kwargs, error):
+    response = client.post('/weather/batch', **kwargs)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == error
+    assert upstream.calls == []
+
+
+def test_batch_rejects_too_many_locations(client, upstream, monkeypatch):
+    monkeypatch.setattr(Config, 'BATCH_MAX_LOCATIONS', 2)
+    response = client.post('/weather/batch', json={'locations': ['a', 'b', 'c']})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Too many locations (max 2)'
+
+
+def test_batch_reports_errors_per_location(client, upstream):
+    upstream.errors['Broken'] = {'error': 'Weather API error: 500', 'status_code': 500}
+    upstream.errors['Nowhere'] = {'error': 'Invalid location or parameters', 'status_code': 400}
+    upstream.errors['Vague'] = {'error': 'Something went wrong'}
+
+    response = client.post('/weather/batch', json={
+        'locations': ['London', 'Broken', 'Nowhere', 'Vague'],
+        'unit': 'us'
+    })
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert results[0]['location'] == 'London'
+    assert results[0]['data']['current']['temperature'] == 64.4
+    assert not results[0]['cached']
+    assert [(item['location'], item['status_code']) for item in results[1:]] == [
+        ('Broken', 500), ('Nowhere', 400), ('Vague', 500)
+    ]
+    assert results[1]['error'] == 'Weather API error: 500'
+
+    # Hits and known-invalid locations do not go upstream again
+    upstream.calls.clear()
+    results = client.post('/weather/batch', json={'locations': ['London', 'Nowhere']}).get_json()['results']
+    assert results[0]['cached']
+    assert results[1]['status_code'] == 400
+    assert upstream.calls == []
+
+
+def test_batch_unexpected_failure_is_a_500(client, upstream):
+    upstream.errors['Exploding'] = RuntimeError('boom')
+    response = client.post('/weather/batch', json={'locations': ['London', 'Exploding']})
+    assert response.status_code == 500
+    assert response.get_json() == {
+        'error': 'Internal server error',
+        'message': 'An unexpected error occurred'
+    }
@@ -0,0 +1,114 @@
+import json
+import pytest
+import cache as cache_module
+from cache import JsonSerializer, LocalCache, MsgpackSerializer, decode_value, get_serializer, purge_time
+
+VALUE = {'resolvedAddress': 'London, England, United Kingdom', 'days': [{'temp': 12.5, 'hours': []}]}
+
+
+@pytest.mark.parametrize('serializer, header', [
+    (JsonSerializer(), b''),
+    (MsgpackSerializer('zlib'), b'\x01'),
+    (MsgpackSerializer('zstd'), b'\x02'),
+])
+def test_decode_value_reads_every_format(serializer, header):
+    encoded = serializer.encode(VALUE)
+    assert encoded[:len(header)] == header
+    assert decode_value(encoded) == VALUE
+
+
+def test_decode_value_reads_legacy_json_text():
+    assert decode_value(json.dumps(VALUE).encode('utf-8')) == VALUE
+    assert decode_value(b'[1, 2]') == [1, 2]
+
+
+@pytest.mark.parametrize('name, serializer_name', [
+    ('json', 'json'),
+    ('msgpack', 'msgpack-zlib'),
+    ('msgpack-zstd', 'msgpack-zstd'),
+])
+def test_get_serializer(name, serializer_name):
+    assert get_serializer(name).name == serializer_name
+
+
+def test_get_serializer_falls_back_to_json_without_msgpack(monkeypatch):
+    monkeypatch.setattr(cache_module, 'msgpack', None)
+    assert get_serializer('msgpack-zstd').name == 'json'
+
+
+def test_purge_time():
+    purges = {'weather:lon*': 10.0, 'weather:*': 5.0, 'rendered:*': 20.0}
+    assert purge_time(purges, 'weather:london|simple') == 10.0
+    assert purge_time(purges, 'weather:paris|simple') == 5.0
+    assert purge_time(purges, 'day:london|days-simple:2024-01-01') == 0
+    assert purge_time(None, 'weather:london') == 0
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module.time, 'monotonic', clock)
+    return clock
+
+
+def test_local_cache_expires_entries(clock):
+    local = LocalCache(max_size=10, ttl=60)
+    local.set('a', 1)
+    local.set('b', 2, ttl=5)
+    local.set('c', 3, ttl=600)
+    assert (local.get('a'), local.get('b'), local.get('c')) == (1, 2, 3)
+
+    clock.now += 5
+    assert local.get('b') is None
+    assert local.get('a') == 1
+    # TTLs are capped at the tier's TTL
+    clock.now += 55
+    assert local.get('c') is None
+    assert local.get_stats()['size'] == 1
+
+
+def test_local_cache_ignores_non_positive_ttl(clock):
+    local = LocalCache(max_size=10, ttl=60)
+    local.set('a', 1, ttl=-1)
+    assert local.get('a') is None
+
+
+def test_local_cache_evicts_least_recently_used(clock):
+    local = LocalCache(max_size=2, ttl=60)
+    local.set('a', 1)
+    local.set('b', 2)
+    assert local.get('a') == 1
+    local.set('c', 3)
+    assert local.get('b') is None
+    assert (local.get('a'), local.get('c')) == (1, 3)
+
+    stats = local.get_stats()
+    assert (stats['size'], stats['evictions'], stats['hits'], stats['misses']) == (2, 1, 3, 1)
+
+
+def test_local_cache_delete_and_clear(clock):
+    local = LocalCache(max_size=10, ttl=60)
+    local.set('a', 1)
+    local.set('b', 2)
+    local.delete('a')
+    local.delete('missing')
+    assert local.get('a') is None
+    local.clear()
+    assert local.get('b') is None
+
+
+def test_redis_cache_round_trip(cache):
+    cache.set('weather:london|simple', VALUE, 60)
+    cache.local.clear()
+    entry = cache.get_entry('weather:london|simple')
+    assert entry['data'] == VALUE
+    assert not entry['stale']
+    assert cache.get_entries(['weather:london|simple', 'weather:paris|simple'])[1] is None
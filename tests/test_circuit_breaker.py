@@ -0,0 +1,97 @@
+import pytest
+import circuit_breaker as circuit_breaker_module
+from circuit_breaker import CircuitBreaker, classify_status, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(circuit_breaker_module.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def breaker(cache, clock, monkeypatch):
+    config = circuit_breaker_module.Config
+    monkeypatch.setattr(config, 'CIRCUIT_WINDOW', 30)
+    monkeypatch.setattr(config, 'CIRCUIT_MIN_REQUESTS', 4)
+    monkeypatch.setattr(config, 'CIRCUIT_FAILURE_RATE', 0.5)
+    monkeypatch.setattr(config, 'CIRCUIT_OPEN_SECONDS', 5)
+    monkeypatch.setattr(config, 'CIRCUIT_MAX_OPEN_SECONDS', 300)
+    return CircuitBreaker(cache)
+
+
+def test_trip_probe_reset(breaker, clock):
+    assert breaker.allow() == (True, 0)
+    breaker.record('success')
+    breaker.record('failure')
+    breaker.record('failure')
+    assert breaker.get_stats()['state'] == 'closed'
+
+    # Half of at least CIRCUIT_MIN_REQUESTS calls failed
+    breaker.record('failure')
+    assert breaker.get_stats()['state'] == 'open'
+    assert breaker.allow() == (False, 5)
+    clock.now += 2
+    assert breaker.allow() == (False, 3)
+
+    # After the open period exactly one probe is let through
+    clock.now += 3
+    assert breaker.allow() == (True, 0)
+    assert breaker.probes == 1
+    allowed, retry_after = breaker.allow()
+    assert not allowed and retry_after >= 1
+    assert breaker.get_stats()['state'] == 'half_open'
+
+    breaker.record('success')
+    stats = breaker.get_stats()
+    assert (stats['state'], stats['trips'], stats['window_requests']) == ('closed', 0, 0)
+    assert breaker.allow() == (True, 0)
+
+
+def test_failed_probe_doubles_open_period(breaker, clock):
+    for _ in range(4):
+        breaker.record('failure')
+    clock.now += 5
+    assert breaker.allow() == (True, 0)
+
+    breaker.record('failure')
+    stats = breaker.get_stats()
+    assert (stats['state'], stats['trips'], stats['open_for']) == ('open', 2, 10)
+
+
+def test_throttling_trips_for_retry_after(breaker):
+    breaker.record('throttled', retry_after=42)
+    assert breaker.allow() == (False, 42)
+    assert breaker.rejected == 1
+
+
+def test_allows_everything_without_redis(breaker):
+    breaker.cache.enabled = False
+    for _ in range(10):
+        breaker.record('failure')
+    assert breaker.allow() == (True, 0)
+    assert breaker.get_stats() == {'enabled': False, 'rejected': 0}
+
+
+@pytest.mark.parametrize('status_code, outcome', [
+    (200, 'success'), (400, 'success'), (429, 'throttled'), (500, 'failure'), (503, 'failure')
+])
+def test_classify_status(status_code, outcome):
+    assert classify_status(status_code) == outcome
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) == 0
+    assert parse_retry_after('7') == 7.0
+    assert parse_retry_after('-3') == 0
+    assert parse_retry_after('soon') == 0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0
@@ -0,0 +1,73 @@
+import pytest
+from config import Config
+from locations import (
+    LocationIndex,
+    normalize_location,
+    qualify_location,
+    refresh_query,
+    snap_coordinates,
+    split_location
+)
+
+
+@pytest.mark.parametrize('location, normalized', [
+    ('London,UK', 'london,uk'),
+    ('  London ,  UK ', 'london,uk'),
+    ('London;UK', 'london,uk'),
+    ('London|UK', 'london,uk'),
+    ('London,,UK.', 'london,uk'),
+    ('New   York!', 'new york'),
+    ('ＬＯＮＤＯＮ', 'london'),
+    ('São Paulo, Brazil', 'são paulo,brazil'),
+])
+def test_normalize_location(location, normalized):
+    assert normalize_location(location) == normalized
+
+
+def test_normalize_location_snaps_coordinates(monkeypatch):
+    monkeypatch.setattr(Config, 'GEO_GRID_DEGREES', 0.005)
+    assert normalize_location('51.5074, -0.1278') == '51.505,-0.13'
+    assert normalize_location('51.5051,-0.1299') == '51.505,-0.13'
+    # Out of range pairs are names, not coordinates
+    assert normalize_location('95.0,10.0') == '95.0,10.0'
+
+
+@pytest.mark.parametrize('latitude, longitude, snapped', [
+    (51.5074, -0.1278, '51.505,-0.13'),
+    (0.001, -0.001, '0,0'),
+    (-33.8688, 151.2093, '-33.87,151.21'),
+    (90, 180, '90,180'),
+])
+def test_snap_coordinates(monkeypatch, latitude, longitude, snapped):
+    monkeypatch.setattr(Config, 'GEO_GRID_DEGREES', 0.005)
+    assert snap_coordinates(latitude, longitude) == snapped
+
+
+def test_snap_coordinates_without_grid(monkeypatch):
+    monkeypatch.setattr(Config, 'GEO_GRID_DEGREES', 0)
+    assert snap_coordinates(51.5074, -0.1278) == '51.5074,-0.1278'
+
+
+def test_qualify_and_split_location():
+    assert qualify_location('london', 'simple') == 'london|simple'
+    assert qualify_location('london') == 'london'
+    assert split_location('london|days;datetime,temp') == ('london', 'days;datetime,temp')
+    assert split_location('london') == ('london', None)
+
+
+def test_refresh_query():
+    assert refresh_query('london,england,united kingdom', {
+        'resolvedAddress': 'London, England, United Kingdom', 'latitude': 51.5, 'longitude': -0.1
+    }) == 'London, England, United Kingdom'
+    assert refresh_query('51.5,-0.1', {'latitude': 51.5, 'longitude': -0.1}) == '51.5,-0.1'
+    assert refresh_query('london,england,united kingdom') == 'london,england,united kingdom'
+
+
+def test_location_index_learns_spellings(cache):
+    index = LocationIndex(cache)
+    assert index.resolve('London, UK') == 'london,uk'
+    canonical = index.learn('London, UK', 'London, England, United Kingdom')
+    assert canonical == 'london,england,united kingdom'
+    # Another worker sees the alias through Redis
+    assert LocationIndex(cache).resolve('london,uk') == canonical
+    assert LocationIndex(cache).resolve_many(['LONDON,UK', 'Paris']) == [canonical, 'paris']
@@ -0,0 +1,64 @@
+import negative_cache as negative_cache_module
+from negative_cache import BloomFilter, NegativeCache
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1 << 16)
+    names = [f"location-{i}|simple" for i in range(1000)]
+    for name in names:
+        bloom.add(name)
+    assert all(name in bloom for name in names)
+    assert bloom.count == 1000
+
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(1 << 20)
+    for i in range(20000):
+        bloom.add(f"added-{i}")
+    false_positives = sum(f"other-{i}" in bloom for i in range(20000))
+    # About 0.003% expected; allow plenty of slack
+    assert false_positives < 20
+
+
+def test_bloom_filter_minimum_size():
+    bloom = BloomFilter(0)
+    assert bloom.size == 8
+    bloom.add('london')
+    assert 'london' in bloom
+
+
+def test_negative_cache_shares_rejections_through_redis(cache):
+    negative = NegativeCache(cache)
+    assert not negative.is_invalid('nowhere|simple')
+    negative.add('nowhere|simple')
+    assert negative.is_invalid('nowhere|simple')
+    assert negative.filter_hits == 1
+
+    # Another worker learns it from Redis, then answers from its filter
+    other = NegativeCache(cache)
+    assert other.is_invalid('nowhere|simple')
+    assert other.is_invalid('nowhere|simple')
+    assert (other.redis_hits, other.filter_hits) == (1, 1)
+
+
+def test_negative_cache_clear_forgets_filter(cache):
+    negative = NegativeCache(cache)
+    negative.add('nowhere|simple')
+    cache.purge('neg:*')
+    negative.clear()
+    assert not negative.is_invalid('nowhere|simple')
+
+
+def test_negative_cache_filter_rotates(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(negative_cache_module.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(negative_cache_module.Config, 'NEGATIVE_CACHE_TTL', 60)
+    negative = NegativeCache(cache)
+    negative.add('nowhere|simple')
+    cache.client.flushall()
+
+    # Kept for one more generation, then forgotten
+    now[0] += 60
+    assert negative.is_invalid('nowhere|simple')
+    now[0] += 60
+    assert not negative.is_invalid('nowhere|simple')
@@ -0,0 +1,51 @@
+from datetime import date, datetime, timedelta, timezone
+import pytest
+from config import Config
+from ranges import DateConverter, InvalidDate, day_expiration, days_between, missing_runs
+
+
+def test_days_between():
+    assert days_between(date(2024, 2, 28), date(2024, 3, 1)) == [
+        date(2024, 2, 28), date(2024, 2, 29), date(2024, 3, 1)
+    ]
+    assert days_between(date(2024, 1, 1), date(2024, 1, 1)) == [date(2024, 1, 1)]
+
+
+def test_missing_runs():
+    dates = days_between(date(2024, 1, 1), date(2024, 1, 7))
+    missing = {date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 4), date(2024, 1, 6), date(2024, 1, 7)}
+    assert missing_runs(dates, missing) == [
+        (date(2024, 1, 1), date(2024, 1, 2)),
+        (date(2024, 1, 4), date(2024, 1, 4)),
+        (date(2024, 1, 6), date(2024, 1, 7))
+    ]
+
+
+def test_missing_runs_nothing_or_everything_missing():
+    dates = days_between(date(2024, 1, 1), date(2024, 1, 3))
+    assert missing_runs(dates, set()) == []
+    assert missing_runs(dates, set(dates)) == [(date(2024, 1, 1), date(2024, 1, 3))]
+
+
+def test_day_expiration():
+    today = datetime.now(timezone.utc).date()
+    assert day_expiration(today - timedelta(days=2)) == Config.DAY_CACHE_PAST_TTL
+    # Yesterday may still be revised in timezones behind UTC
+    assert day_expiration(today - timedelta(days=1)) == Config.DAY_CACHE_FUTURE_TTL
+    assert day_expiration(today) == Config.DAY_CACHE_FUTURE_TTL
+    assert day_expiration(today + timedelta(days=7)) == Config.DAY_CACHE_FUTURE_TTL
+
+
+def test_date_converter_rejects_impossible_dates():
+    converter = DateConverter(None)
+    assert converter.to_python('2024-02-29') == date(2024, 2, 29)
+    with pytest.raises(InvalidDate) as excinfo:
+        converter.to_python('2024-02-30')
+    assert excinfo.value.code == 400
+    assert 'YYYY-MM-DD' in excinfo.value.description
+
+
+def test_range_endpoint_impossible_date(client):
+    response = client.get('/weather/London,UK/2024-02-28/2024-02-30')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid date 2024-02-30, expected YYYY-MM-DD'
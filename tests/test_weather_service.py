@@ -0,0 +1,114 @@
+import pytest
+from weather_service import SIMPLE_ELEMENTS, SIMPLE_PROFILE, WeatherService
+
+
+@pytest.fixture
+def service():
+    return WeatherService()
+
+
+def test_convert_units_metric_is_unchanged(service):
+    data = {'currentConditions': {'temp': 20.0}}
+    assert service.convert_units(data, 'metric') is data
+
+
+def test_convert_units_us(service):
+    data = {
+        'currentConditions': {'temp': 20.0, 'windspeed': 10.0, 'conditions': 'Clear'},
+        'days': [{
+            'tempmax': 30.0,
+            'precip': 25.4,
+            'snow': 2.54,
+            'hours': [{'temp': 0.0, 'visibility': 10.0}]
+        }]
+    }
+    converted = service.convert_units(data, 'us')
+    assert converted['currentConditions'] == {'temp': 68.0, 'windspeed': 6.2, 'conditions': 'Clear'}
+    day = converted['days'][0]
+    assert (day['tempmax'], day['precip'], day['snow']) == (86.0, 1.0, 1.0)
+    assert day['hours'] == [{'temp': 32.0, 'visibility': 6.2}]
+    # The cached payload is shared, so it must not be modified
+    assert data['currentConditions']['temp'] == 20.0
+    assert data['days'][0]['hours'][0]['temp'] == 0.0
+
+
+def test_convert_units_uk_only_converts_distances(service):
+    data = {'currentConditions': {'temp': 20.0, 'windspeed': 10.0, 'visibility': 10.0}}
+    converted = service.convert_units(data, 'uk')
+    assert converted['currentConditions'] == {'temp': 20.0, 'windspeed': 6.2, 'visibility': 6.2}
+
+
+def test_convert_units_can_skip_hours(service):
+    data = {'days': [{'temp': 0.0, 'hours': [{'temp': 0.0}]}]}
+    converted = service.convert_units(data, 'us', include_hours=False)
+    assert converted['days'][0]['temp'] == 32.0
+    assert converted['days'][0]['hours'] == [{'temp': 0.0}]
+
+
+def test_convert_units_ignores_missing_and_non_numeric_values(service):
+    data = {'currentConditions': {'temp': None, 'windspeed': 'calm'}}
+    assert service.convert_units(data, 'us') == data
+
+
+@pytest.mark.parametrize('response_format, fields, profile', [
+    ('simple', None, SIMPLE_PROFILE),
+    ('simple', ('current.temperature',), SIMPLE_PROFILE),
+    ('full', None, None),
+    ('full', ('resolvedAddress',), None),
+    ('full', ('currentConditions.temp',), 'current;datetime,temp'),
+    ('full', ('days.tempmax', 'days.tempmin'), 'days;datetime,tempmax,tempmin'),
+    ('full', ('days',), 'days,hours;'),
+    ('full', ('days.hours.temp',), 'days,hours;datetime,temp'),
+    ('full', ('days.notanelement',), 'days;'),
+    ('full', ('days.temp', 'days.notanelement'), 'days;'),
+    ('full', ('alerts', 'currentConditions'), 'alerts,current;'),
+])
+def test_fetch_profile(response_format, fields, profile):
+    assert WeatherService.fetch_profile(response_format, fields) == profile
+
+
+@pytest.mark.parametrize('profile, params', [
+    (None, {}),
+    (SIMPLE_PROFILE, {'include': 'current,days', 'elements': ','.join(SIMPLE_ELEMENTS)}),
+    ('days-full', {'include': 'days,hours'}),
+    ('days,hours;', {'include': 'days,hours'}),
+    ('current;datetime,temp', {'include': 'current', 'elements': 'datetime,temp'}),
+])
+def test_profile_params(profile, params):
+    assert WeatherService.profile_params(profile) == params
+
+
+def test_profile_params_round_trip_fetch_profile():
+    profile = WeatherService.fetch_profile('full', ('days.hours.temp', 'currentConditions.humidity'))
+    assert WeatherService.profile_params(profile) == {
+        'include': 'current,days,hours',
+        'elements': 'datetime,humidity,temp'
+    }
+
+
+def test_project_fields():
+    data = {
+        'location': 'London',
+        'current': {'temperature': 18, 'humidity': 60},
+        'forecast': [
+            {'date': '2024-01-01', 'temp_max': 10, 'temp_min': 2},
+            {'date': '2024-01-02', 'temp_max': 11, 'temp_min': 3}
+        ]
+    }
+    projected = WeatherService.project_fields(data, ('current.temperature', 'forecast.temp_max', 'missing.path'))
+    assert projected == {
+        'current': {'temperature': 18},
+        'forecast': [{'temp_max': 10}, {'temp_max': 11}]
+    }
+
+
+def test_project_fields_keeps_whole_subtrees():
+    data = {'current': {'temperature': 18, 'humidity': 60}, 'location': 'London'}
+    assert WeatherService.project_fields(data, ('current',)) == {'current': data['current']}
+
+
+def test_parse_fields():
+    assert WeatherService.parse_fields(None) is None
+    assert WeatherService.parse_fields(' b.c , a,b.c,') == ('a', 'b.c')
+    with pytest.raises(ValueError):
+        WeatherService.parse_fields('current..temperature')
@@ -0,0 +1,248 @@
+import json
+import os
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from locations import qualify_location
+from weather_service import SIMPLE_PROFILE
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """
+    Re-warm the cache after a restart or failover from a hot-key snapshot
+    
+    Every worker periodically writes the most requested location names
+    (from the popularity set kept by the refresh scheduler) to a local
+    JSON file, so the list survives the loss of Redis. A warm-up reads the
+    snapshot or the configured seed list and fetches the locations that
+    have no fresh entry, in a background thread, with at most
+    WARMUP_CONCURRENCY fetches in flight and WARMUP_RATE fetches started
+    per second. Progress is stored like a purge job (see CachePurger).
+    
+    The snapshot depends on the RefreshScheduler flushing request counts
+    to the popularity set, so it must be running in every worker (it is,
+    whether or not REFRESH_ENABLED is set). A warm-up started while Redis
+    is unavailable waits for the cache to reconnect, so a worker booting
+    during a failover still warms the new primary.
+    """
+    
+    def __init__(self, cache, location_index, warm):
+        """
+        Args:
+            cache (RedisCache): Cache holding the popularity set and entries,
+                kept filled by a running RefreshScheduler
+            location_index (LocationIndex): Resolves seed locations to
+                their canonical names
+            warm (callable): Fetches and caches one location name; returns
+                the service's result dict
+        """
+        self.cache = cache
+        self.location_index = location_index
+        self.warm = warm
+        self._stop = threading.Event()
+        self._thread = None
+        self._job = None
+        self._lock = threading.Lock()
+        self.snapshots = 0
+        self.last_snapshot = None
+    
+    def seed_locations(self):
+        """Location names from WARMUP_SEED_LOCATIONS, fetched with the simple profile"""
+        locations = [location for location in Config.WARMUP_SEED_LOCATIONS.split(';') if location.strip()]
+        if not locations:
+            return []
+        return [
+            qualify_location(canonical, SIMPLE_PROFILE)
+            for canonical in self.location_index.resolve_many(locations)
+        ]
+    
+    def load_snapshot(self):
+        """
+        Read location names from the snapshot file
+        
+        Returns:
+            list: Location names, most popular first; empty if there is no
+                readable snapshot
+        """
+        try:
+            with open(Config.WARMUP_SNAPSHOT_PATH) as f:
+                return json.load(f)['locations']
+        except FileNotFoundError:
+            return []
+        except Exception as e:
+            logger.error(f"Error reading hot key snapshot: {e}")
+            return []
+    
+    def snapshot(self):
+        """
+        Write the most requested location names to the snapshot file
+        
+        Names still in the previous snapshot fill the list up to
+        WARMUP_SNAPSHOT_SIZE, so a popularity set that is being rebuilt
+        (e.g. after a Redis failover) does not shrink the snapshot.
+        
+        Returns:
+            int: Number of names written (0 if nothing was written)
+        """
+        # Filled by RefreshScheduler.tick from every worker's request counts
+        popular = self.cache.get_popular(Config.WARMUP_SNAPSHOT_SIZE)
+        if not popular:
+            return 0
+        
+        names = list(dict.fromkeys(popular + self.load_snapshot()))[:Config.WARMUP_SNAPSHOT_SIZE]
+        path = Config.WARMUP_SNAPSHOT_PATH
+        temporary = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, 'w') as f:
+                json.dump({'saved_at': time.time(), 'locations': names}, f)
+            # Atomic, so readers and other workers never see a partial file
+            os.replace(temporary, path)
+        except Exception as e:
+            logger.error(f"Error writing hot key snapshot: {e}")
+            return 0
+        
+        self.snapshots += 1
+        self.last_snapshot = time.time()
+        logger.debug("Wrote %d hot locations to %s", len(names), path)
+        return len(names)
+    
+    def start_snapshots(self):
+        """Start the snapshot thread if it is not already running"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._snapshot_loop,
+            name='hot-key-snapshot',
+            daemon=True
+        )
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the snapshot thread and any warm-up still waiting for Redis"""
+        self._stop.set()
+    
+    def _snapshot_loop(self):
+        while not self._stop.wait(Config.WARMUP_SNAPSHOT_INTERVAL):
+            try:
+                self.snapshot()
+            except Exception as e:
+                logger.error(f"Hot key snapshot failed: {e}")
+    
+    def start(self, names, source, exclusive=False):
+        """
+        Start a background warm-up
+        
+        Args:
+            names (list): Location names (see locations.qualify_location)
+            source (str): Where the names came from, for the job status
+            exclusive (bool): Skip the warm-up if another worker started
+                one recently, e.g. when every worker boots at once
+        
+        Returns:
+            dict: Initial job status; 'waiting' while Redis is unavailable
+        """
+        names = list(dict.fromkeys(names))
+        job = {
+            'id': uuid.uuid4().hex,
+            'state': 'running' if self.cache.enabled else 'waiting',
+            'source': source,
+            'total': len(names),
+            'skipped': 0,
+            'warmed': 0,
+            'failed': 0,
+            'started_at': time.time(),
+            'finished_at': None
+        }
+        self.cache.set_job(job['id'], job)
+        with self._lock:
+            self._job = job
+        threading.Thread(
+            target=self._run,
+            args=(job, names, exclusive),
+            name=f"warmup-{job['id'][:8]}",
+            daemon=True
+        ).start()
+        return job
+    
+    def get(self, job_id):
+        """Get the status of a warm-up started by any worker"""
+        with self._lock:
+            if self._job is not None and self._job['id'] == job_id:
+                # Also known while Redis is unavailable
+                return dict(self._job)
+        return self.cache.get_job(job_id)
+    
+    def _run(self, job, names, exclusive):
+        # Warming only the local tiers would leave the new Redis cold
+        while not self.cache.enabled:
+            if self._stop.wait(Config.REDIS_RECONNECT_INTERVAL):
+                return
+        
+        # Long enough for the whole warm-up at WARMUP_RATE
+        lease = int(len(names) / Config.WARMUP_RATE) + Config.FETCH_LOCK_TIMEOUT
+        if exclusive and self.cache.acquire_lock('warmup', lease) is None:
+            logger.info("Cache warm-up skipped: another worker is warming")
+            job['state'] = 'skipped'
+            job['finished_at'] = time.time()
+            self.cache.set_job(job['id'], job)
+            return
+        
+        job['state'] = 'running'
+        try:
+            entries = self.cache.get_entries([f"weather:{name}" for name in names])
+            due = [name for name, entry in zip(names, entries) if entry is None or entry['stale']]
+            job['skipped'] = len(names) - len(due)
+            self.cache.set_job(job['id'], job)
+            
+            slots = threading.BoundedSemaphore(Config.WARMUP_CONCURRENCY)
+            
+            def warm_one(name):
+                try:
+                    result = self.warm(name)
+                except Exception as e:
+                    logger.error(f"Warming {name} failed: {e}")
+                    result = {'error': str(e)}
+                with self._lock:
+                    job['failed' if 'error' in result else 'warmed'] += 1
+                slots.release()
+            
+            # A fetch starts only when a slot is free, and starts are at
+            # least 1/WARMUP_RATE seconds apart
+            pause = 1 / Config.WARMUP_RATE
+            with ThreadPoolExecutor(
+                max_workers=Config.WARMUP_CONCURRENCY,
+                thread_name_prefix='warmup'
+            ) as executor:
+                for i, name in enumerate(due):
+                    slots.acquire()
+                    executor.submit(warm_one, name)
+                    if i % Config.WARMUP_CONCURRENCY == 0:
+                        self.cache.set_job(job['id'], job)
+                    time.sleep(pause)
+            job['state'] = 'done'
+        except Exception as e:
+            logger.error(f"Cache warm-up {job['id']} failed: {e}")
+            job['state'] = 'failed'
+            job['error'] = str(e)
+        job['finished_at'] = time.time()
+        self.cache.set_job(job['id'], job)
+        logger.info(
+            f"Cache warm-up {job['id']} {job['state']}: {job['warmed']} warmed, "
+            f"{job['skipped']} already fresh, {job['failed']} failed"
+        )
+    
+    def get_stats(self):
+        """Get snapshot and warm-up statistics for this worker"""
+        with self._lock:
+            job = dict(self._job) if self._job else None
+        return {
+            "snapshots": self.snapshots,
+            "last_snapshot": self.last_snapshot,
+            "last_warmup": job
+        }
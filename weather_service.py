@@ -1,96 +1,190 @@
+import re
 import requests
 import logging
+import time
+from requests.adapters import HTTPAdapter
 from urllib.parse import quote
 from config import Config
+from circuit_breaker import classify_status, parse_retry_after
+from metrics import STAGE_LATENCY, UPSTREAM_IN_FLIGHT, UPSTREAM_RESPONSES
 
 logger = logging.getLogger(__name__)
 
 
+def _celsius_to_fahrenheit(value):
+    return round(value * 9 / 5 + 32, 1)
+
+
+def _mm_to_inches(value):
+    return round(value / 25.4, 2)
+
+
+def _cm_to_inches(value):
+    return round(value / 2.54, 2)
+
+
+def _km_to_miles(value):
+    return round(value * 0.621371, 1)
+
+
+# Per-element converters from Visual Crossing's metric unit group.
+# UK differs from metric only in wind speed and visibility (mph, miles).
+_UK_CONVERSIONS = {
+    'windspeed': _km_to_miles,
+    'windgust': _km_to_miles,
+    'visibility': _km_to_miles
+}
+UNIT_CONVERSIONS = {
+    'metric': {},
+    'uk': _UK_CONVERSIONS,
+    'us': {
+        **_UK_CONVERSIONS,
+        'temp': _celsius_to_fahrenheit,
+        'tempmax': _celsius_to_fahrenheit,
+        'tempmin': _celsius_to_fahrenheit,
+        'feelslike': _celsius_to_fahrenheit,
+        'feelslikemax': _celsius_to_fahrenheit,
+        'feelslikemin': _celsius_to_fahrenheit,
+        'dew': _celsius_to_fahrenheit,
+        'precip': _mm_to_inches,
+        'snow': _cm_to_inches,
+        'snowdepth': _cm_to_inches
+    }
+}
+
+
+# Dotted paths accepted by the `fields` query parameter
+FIELD_PATH_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$')
+MAX_FIELDS = 32
+
+# Upstream `include=` sections behind each top-level payload key
+SECTION_INCLUDES = {
+    'currentConditions': 'current',
+    'days': 'days',
+    'alerts': 'alerts',
+    'events': 'events'
+}
+
+# Elements the upstream returns for current conditions, days and hours.
+# Only these narrow a fetch; any other name fetches the whole section, so
+# made-up names cannot create new cache keys and upstream calls
+UPSTREAM_ELEMENTS = frozenset((
+    'cloudcover', 'conditions', 'datetime', 'datetimeEpoch', 'description',
+    'dew', 'feelslike', 'feelslikemax', 'feelslikemin', 'humidity', 'icon',
+    'moonphase', 'precip', 'precipcover', 'precipprob', 'preciptype',
+    'pressure', 'severerisk', 'snow', 'snowdepth', 'solarenergy',
+    'solarradiation', 'source', 'stations', 'sunrise', 'sunriseEpoch',
+    'sunset', 'sunsetEpoch', 'temp', 'tempmax', 'tempmin', 'uvindex',
+    'visibility', 'winddir', 'windgust', 'windspeed'
+))
+
+# Fetch profile for the simple format: only the sections and elements
+# read by format_weather_response
+SIMPLE_PROFILE = 'simple'
+SIMPLE_INCLUDE = ('current', 'days')
+SIMPLE_ELEMENTS = (
+    'conditions', 'datetime', 'description', 'feelslike', 'humidity',
+    'precipprob', 'pressure', 'temp', 'tempmax', 'tempmin', 'uvindex',
+    'visibility', 'windspeed'
+)
+
+# Fetch profiles for date ranges: daily values read by format_day for the
+# simple format, or every daily and hourly value for the full format
+RANGE_SIMPLE_PROFILE = 'days-simple'
+RANGE_FULL_PROFILE = 'days-full'
+RANGE_SIMPLE_ELEMENTS = (
+    'conditions', 'datetime', 'description', 'humidity', 'precipprob',
+    'temp', 'tempmax', 'tempmin', 'windspeed'
+)
+
+
 class WeatherService:
     """Service for fetching weather data from Visual Crossing API"""
     
-    def __init__(self):
+    def __init__(self, breaker=None):
+        """
+        Args:
+            breaker (CircuitBreaker): Optional circuit breaker guarding
+                upstream calls
+        """
         self.api_key = Config.WEATHER_API_KEY
         self.endpoint = Config.WEATHER_API_ENDPOINT
+        self.timeout = (Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT)
+        
+        # Long-lived session so misses reuse keep-alive TLS connections
+        # instead of paying a handshake each time
+        self.adapter = HTTPAdapter(
+            pool_connections=Config.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=Config.HTTP_POOL_MAXSIZE
+        )
+        self.session = requests.Session()
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+        
+        self.breaker = breaker
     
-    def get_weather(self, location, unit_group='metric'):
+    def get_weather(self, location, unit_group='metric', profile=None, start=None, end=None):
         """
         Fetch weather data for a location
         
         Args:
             location (str): Location name (e.g., "London,UK" or "New York")
             unit_group (str): Unit system - 'metric', 'us', or 'uk'
+            profile (str): Fetch profile from fetch_profile, or None for
+                the full payload
+            start (date): First day of a date range, or None for the
+                default forecast
+            end (date): Last day of the date range
             
         Returns:
             dict: Weather data or error information
         """
+        # Fail fast instead of waiting out timeouts while upstream is down
+        if self.breaker is not None:
+            allowed, retry_after = self.breaker.allow()
+            if not allowed:
+                return self._circuit_open_error(retry_after)
+        
         try:
-            # Encode location for URL
-            encoded_location = quote(location)
+            url, params = self._build_request(location, unit_group, profile, start, end)
             
-            # Build the URL
-            url = f"{self.endpoint}{encoded_location}"
-            
-            # Set query parameters
-            params = {
-                'unitGroup': unit_group,
-                'contentType': 'json',
-                'key': self.api_key
-            }
-            
-            logger.info(f"Fetching weather data for location: {location}")
+            logger.debug("Fetching weather data for location: %s", location)
             
             # Make the request
-            response = requests.get(url, params=params, timeout=10)
-            
-            # Check for HTTP errors
-            if response.status_code == 400:
-                logger.error(f"Bad request for location: {location}")
-                return {
-                    'error': 'Invalid location or parameters',
-                    'status_code': 400
-                }
-            elif response.status_code == 401:
-                logger.error("Invalid API key")
-                return {
-                    'error': 'Invalid API key',
-                    'status_code': 401
-                }
-            elif response.status_code == 429:
-                logger.error("Rate limit exceeded on weather API")
-                return {
-                    'error': 'Weather API rate limit exceeded. Please try again later.',
-                    'status_code': 429
-                }
-            elif response.status_code != 200:
-                logger.error(f"Weather API error: {response.status_code}")
-                return {
-                    'error': f'Weather API error: {response.status_code}',
-                    'status_code': response.status_code
-                }
+            UPSTREAM_IN_FLIGHT.inc()
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            finally:
+                UPSTREAM_IN_FLIGHT.dec()
+                STAGE_LATENCY.observe(time.perf_counter() - started, stage='upstream')
+            UPSTREAM_RESPONSES.inc(status=str(response.status_code))
+            self._record(
+                classify_status(response.status_code),
+                parse_retry_after(response.headers.get('Retry-After'))
+            )
             
-            # Parse and return the data
-            weather_data = response.json()
-            logger.info(f"Successfully fetched weather data for: {location}")
-            
-            return {
-                'success': True,
-                'data': weather_data
-            }
+            return self._parse_response(location, response.status_code, response.json)
             
         except requests.exceptions.Timeout:
+            UPSTREAM_RESPONSES.inc(status='timeout')
+            self._record('failure')
             logger.error("Weather API request timed out")
             return {
                 'error': 'Weather API request timed out',
                 'status_code': 504
             }
         except requests.exceptions.ConnectionError:
+            UPSTREAM_RESPONSES.inc(status='connection_error')
+            self._record('failure')
             logger.error("Failed to connect to weather API")
             return {
                 'error': 'Failed to connect to weather API',
                 'status_code': 503
             }
         except requests.exceptions.RequestException as e:
+            UPSTREAM_RESPONSES.inc(status='error')
+            self._record('failure')
             logger.error(f"Request error: {e}")
             return {
                 'error': f'Request error: {str(e)}',
@@ -103,6 +197,334 @@ class WeatherService:
                 'status_code': 500
             }
     
+    def _record(self, outcome, retry_after=0):
+        if self.breaker is not None:
+            self.breaker.record(outcome, retry_after)
+    
+    def _circuit_open_error(self, retry_after):
+        UPSTREAM_RESPONSES.inc(status='circuit_open')
+        logger.warning(f"Weather API circuit open, failing fast (retry in {retry_after}s)")
+        return {
+            'error': 'Weather API temporarily unavailable. Please try again later.',
+            'status_code': 503,
+            'retry_after': retry_after
+        }
+    
+    def get_pool_stats(self):
+        """Get upstream connection pool utilization"""
+        pools = {}
+        try:
+            pool_manager = self.adapter.poolmanager
+            for pool_key in list(pool_manager.pools.keys()):
+                pool = pool_manager.pools.get(pool_key)
+                if pool is None:
+                    continue
+                pools[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                    "connections_created": pool.num_connections,
+                    "requests": pool.num_requests
+                }
+        except Exception as e:
+            logger.error(f"Error getting pool stats: {e}")
+        
+        return {
+            "in_flight": UPSTREAM_IN_FLIGHT.get(),
+            "max_size": Config.HTTP_POOL_MAXSIZE,
+            "utilization": round(UPSTREAM_IN_FLIGHT.get() / Config.HTTP_POOL_MAXSIZE, 3),
+            "pools": pools
+        }
+    
+    def _build_request(self, location, unit_group, profile=None, start=None, end=None):
+        """
+        Build the upstream URL and query parameters
+        
+        Args:
+            location (str): Location name
+            unit_group (str): Unit system - 'metric', 'us', or 'uk'
+            profile (str): Fetch profile from fetch_profile, or None for
+                the full payload
+            start (date): First day of a date range, or None
+            end (date): Last day of the date range
+            
+        Returns:
+            tuple: (url, params)
+        """
+        # Encode location for URL
+        encoded_location = quote(location)
+        
+        # Build the URL
+        url = f"{self.endpoint}{encoded_location}"
+        if start is not None:
+            url = f"{url}/{start.isoformat()}/{(end or start).isoformat()}"
+        
+        # Set query parameters
+        params = {
+            'unitGroup': unit_group,
+            'contentType': 'json',
+            'key': self.api_key
+        }
+        params.update(self.profile_params(profile))
+        return url, params
+    
+    @staticmethod
+    def fetch_profile(response_format, fields=None):
+        """
+        Get the narrowest upstream fetch that can serve a response
+        
+        The simple format only needs current conditions and a few daily
+        elements. A full response limited by `fields` only needs the
+        sections and elements the paths point into; the upstream always
+        returns top-level values such as resolvedAddress. A path naming an
+        element outside UPSTREAM_ELEMENTS fetches every element instead.
+        
+        Args:
+            response_format (str): Response format - 'simple' or 'full'
+            fields (tuple): Dotted paths to keep (see parse_fields), or None
+            
+        Returns:
+            str or None: Profile name, used in cache keys and passed back to
+                get_weather, or None if the full payload is needed
+        """
+        if response_format == 'simple':
+            return SIMPLE_PROFILE
+        if not fields:
+            return None
+        
+        includes = set()
+        elements = set()
+        all_elements = False
+        for path in fields:
+            parts = path.split('.')
+            section = SECTION_INCLUDES.get(parts[0])
+            if section is None:
+                continue
+            includes.add(section)
+            if section == 'days' and len(parts) == 1:
+                # A bare `days` keeps each day whole, hours included
+                includes.add('hours')
+            elif section == 'days' and parts[1] == 'hours':
+                includes.add('hours')
+                parts = parts[1:]
+            if section in ('current', 'days'):
+                if len(parts) > 1 and parts[1] in UPSTREAM_ELEMENTS:
+                    elements.add(parts[1])
+                else:
+                    all_elements = True
+        
+        if not includes:
+            return None
+        if all_elements:
+            elements = set()
+        elif elements:
+            elements.add('datetime')
+        return f"{','.join(sorted(includes))};{','.join(sorted(elements))}"
+    
+    @staticmethod
+    def range_profile(response_format):
+        """
+        Get the upstream fetch profile for a date range
+        
+        Args:
+            response_format (str): Response format - 'simple' or 'full'
+            
+        Returns:
+            str: Profile name, used in per-day cache keys
+        """
+        return RANGE_SIMPLE_PROFILE if response_format == 'simple' else RANGE_FULL_PROFILE
+    
+    @staticmethod
+    def profile_params(profile):
+        """
+        Get the upstream `include` and `elements` parameters for a profile
+        
+        Args:
+            profile (str): Profile from fetch_profile, or None
+            
+        Returns:
+            dict: Extra query parameters (empty for the full payload)
+        """
+        if not profile:
+            return {}
+        if profile == SIMPLE_PROFILE:
+            include, elements = SIMPLE_INCLUDE, SIMPLE_ELEMENTS
+        elif profile == RANGE_SIMPLE_PROFILE:
+            include, elements = ('days',), RANGE_SIMPLE_ELEMENTS
+        elif profile == RANGE_FULL_PROFILE:
+            include, elements = ('days', 'hours'), ()
+        else:
+            include, _, elements = profile.partition(';')
+            include, elements = include.split(','), [e for e in elements.split(',') if e]
+        
+        params = {'include': ','.join(include)}
+        if elements:
+            params['elements'] = ','.join(elements)
+        return params
+    
+    def _parse_response(self, location, status_code, load_json):
+        """
+        Map an upstream response to weather data or error information
+        
+        Args:
+            location (str): Requested location, for logging
+            status_code (int): Upstream HTTP status code
+            load_json (callable): Parses the response body
+            
+        Returns:
+            dict: Weather data or error information
+        """
+        # Check for HTTP errors
+        if status_code == 400:
+            logger.error(f"Bad request for location: {location}")
+            return {
+                'error': 'Invalid location or parameters',
+                'status_code': 400
+            }
+        elif status_code == 401:
+            logger.error("Invalid API key")
+            return {
+                'error': 'Invalid API key',
+                'status_code': 401
+            }
+        elif status_code == 429:
+            logger.error("Rate limit exceeded on weather API")
+            return {
+                'error': 'Weather API rate limit exceeded. Please try again later.',
+                'status_code': 429
+            }
+        elif status_code != 200:
+            logger.error(f"Weather API error: {status_code}")
+            return {
+                'error': f'Weather API error: {status_code}',
+                'status_code': status_code
+            }
+        
+        # Parse and return the data
+        weather_data = load_json()
+        logger.debug("Successfully fetched weather data for: %s", location)
+        
+        return {
+            'success': True,
+            'data': weather_data
+        }
+    
+    def render_weather(self, weather_data, unit_group, response_format, fields=None):
+        """
+        Derive the requested unit group and format from a raw metric payload
+        
+        Args:
+            weather_data (dict): Raw weather data fetched with unitGroup=metric
+            unit_group (str): Unit system - 'metric', 'us', or 'uk'
+            response_format (str): Response format - 'simple' or 'full'
+            fields (tuple): Dotted paths to keep (see parse_fields), or None
+            
+        Returns:
+            dict: Response data
+        """
+        if response_format == 'simple':
+            # Hourly data is dropped by the simple format, so skip converting it
+            converted = self.convert_units(weather_data, unit_group, include_hours=False)
+            formatted = self.format_weather_response(converted)
+            return self.project_fields(formatted, fields) if fields else formatted
+        
+        # Project before converting so only the kept values are converted
+        if fields:
+            weather_data = self.project_fields(weather_data, fields)
+        return self.convert_units(weather_data, unit_group)
+    
+    @staticmethod
+    def parse_fields(raw_fields):
+        """
+        Parse a `fields` query parameter into dotted paths
+        
+        Args:
+            raw_fields (str): Comma-separated dotted paths, e.g.
+                "current.temperature,forecast.temp_max"
+                
+        Returns:
+            tuple or None: Sorted unique paths, or None if none were given
+            
+        Raises:
+            ValueError: If a path is malformed or too many are given
+        """
+        if not raw_fields:
+            return None
+        paths = {path.strip() for path in raw_fields.split(',') if path.strip()}
+        for path in paths:
+            if not FIELD_PATH_PATTERN.match(path):
+                raise ValueError(f"Invalid field path: {path}")
+        if len(paths) > MAX_FIELDS:
+            raise ValueError(f"Too many fields (max {MAX_FIELDS})")
+        return tuple(sorted(paths)) or None
+    
+    @staticmethod
+    def project_fields(data, fields):
+        """
+        Keep only the given dotted paths of a response document
+        
+        Lists are projected element by element, so "forecast.temp_max"
+        keeps temp_max of every forecast day. Unknown paths are ignored.
+        
+        Args:
+            data (dict): Response document
+            fields (tuple): Dotted paths to keep
+            
+        Returns:
+            dict: Projected copy of the document
+        """
+        tree = {}
+        for path in fields:
+            node = tree
+            for part in path.split('.'):
+                node = node.setdefault(part, {})
+        
+        def project(value, node):
+            if not node:
+                return value
+            if isinstance(value, list):
+                return [project(item, node) for item in value]
+            if isinstance(value, dict):
+                return {key: project(value[key], child) for key, child in node.items() if key in value}
+            return value
+        
+        return project(data, tree)
+    
+    def convert_units(self, weather_data, unit_group, include_hours=True):
+        """
+        Convert a metric Visual Crossing payload to another unit group
+        
+        Args:
+            weather_data (dict): Raw weather data fetched with unitGroup=metric
+            unit_group (str): Target unit system - 'metric', 'us', or 'uk'
+            include_hours (bool): Also convert hourly data inside each day
+            
+        Returns:
+            dict: Converted copy of the data (the input is not modified)
+        """
+        conversions = UNIT_CONVERSIONS.get(unit_group)
+        if not conversions:
+            return weather_data
+        
+        def convert(values):
+            converted = dict(values)
+            for element, converter in conversions.items():
+                if isinstance(converted.get(element), (int, float)):
+                    converted[element] = converter(converted[element])
+            return converted
+        
+        converted_data = dict(weather_data)
+        if weather_data.get('currentConditions'):
+            converted_data['currentConditions'] = convert(weather_data['currentConditions'])
+        
+        if 'days' in weather_data:
+            days = []
+            for day in weather_data['days']:
+                converted_day = convert(day)
+                if include_hours and day.get('hours'):
+                    converted_day['hours'] = [convert(hour) for hour in day['hours']]
+                days.append(converted_day)
+            converted_data['days'] = days
+        
+        return converted_data
+    
     def format_weather_response(self, weather_data):
         """
         Format weather data into a simplified response
@@ -137,20 +559,56 @@ class WeatherService:
             
             # Add forecast for next days
             for day in days[:7]:  # Limit to 7 days
-                formatted['forecast'].append({
-                    'date': day.get('datetime', ''),
-                    'temp_max': day.get('tempmax', 0),
-                    'temp_min': day.get('tempmin', 0),
-                    'temp_avg': day.get('temp', 0),
-                    'conditions': day.get('conditions', ''),
-                    'description': day.get('description', ''),
-                    'precipitation_prob': day.get('precipprob', 0),
-                    'humidity': day.get('humidity', 0),
-                    'wind_speed': day.get('windspeed', 0)
-                })
+                formatted['forecast'].append(self.format_day(day))
             
             return formatted
             
         except Exception as e:
             logger.error(f"Error formatting weather data: {e}")
             return weather_data
+    
+    @staticmethod
+    def format_day(day):
+        """
+        Format one day of raw weather data for the simplified response
+        
+        Args:
+            day (dict): Day from the upstream `days` list
+            
+        Returns:
+            dict: Formatted day
+        """
+        return {
+            'date': day.get('datetime', ''),
+            'temp_max': day.get('tempmax', 0),
+            'temp_min': day.get('tempmin', 0),
+            'temp_avg': day.get('temp', 0),
+            'conditions': day.get('conditions', ''),
+            'description': day.get('description', ''),
+            'precipitation_prob': day.get('precipprob', 0),
+            'humidity': day.get('humidity', 0),
+            'wind_speed': day.get('windspeed', 0)
+        }
+    
+    def render_days(self, days, meta, unit_group, response_format):
+        """
+        Derive the requested unit group and format for a date range
+        
+        Args:
+            days (list): Raw metric days, in date order
+            meta (dict): Top-level upstream values such as resolvedAddress
+                and timezone (may be empty)
+            unit_group (str): Unit system - 'metric', 'us', or 'uk'
+            response_format (str): Response format - 'simple' or 'full'
+            
+        Returns:
+            dict: Response data
+        """
+        if response_format == 'simple':
+            converted = self.convert_units({'days': days}, unit_group, include_hours=False)
+            return {
+                'location': meta.get('resolvedAddress', 'Unknown'),
+                'timezone': meta.get('timezone', 'UTC'),
+                'days': [self.format_day(day) for day in converted['days']]
+            }
+        return self.convert_units(dict(meta, days=days), unit_group)
@@ -0,0 +1,12 @@
+"""
+WSGI entry point for production servers
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Importing this module builds the application without connecting to
+anything; each worker creates its own Redis pool, upstream session and
+background threads after it has been forked.
+"""
+from app import create_app
+
+app = create_app()